@@ -0,0 +1,152 @@
+"""Commit files to a repository through the GitHub Git Data API, without a clone."""
+
+import time
+
+import github3
+import http_session
+
+
+class BranchExistsError(github3.exceptions.UnprocessableEntity):
+    """The branch to create already exists."""
+
+
+def api_request(session, method, url, expected_status, **kwargs):
+    """
+    Make a request with the github3 session and return the decoded JSON body.
+
+    Args:
+        session (github3.session.GitHubSession): the authenticated session
+        method (str): the HTTP method
+        url (str): the full URL of the endpoint
+        expected_status (int): the status code that indicates success
+
+    Returns:
+        dict: the JSON response body
+
+    Raises:
+        github3.exceptions.GitHubError: the matching github3 exception when the
+            response status is not expected_status
+    """
+    response = session.request(method, url, **kwargs)
+    if response.status_code != expected_status:
+        raise github3.exceptions.error_for(response)
+    return response.json()
+
+
+def api_post(session, url, expected_status, find_existing=None, **kwargs):
+    """
+    POST to url, retrying a 5xx response as many times as the session's adapter retries a GET.
+
+    The adapter does not retry a POST, as an attempt answered with a 5xx may
+    still have been applied; its retry then fails with a 422. In that case
+    find_existing is called for what the earlier attempt created.
+
+    Args:
+        session (github3.session.GitHubSession): the authenticated session
+        url (str): the full URL of the endpoint
+        expected_status (int): the status code that indicates success
+        find_existing (Callable[[], dict | None] | None): returns the object an
+            earlier attempt created, or None if it was not created
+
+    Returns:
+        dict: the JSON response body, or what find_existing returned
+
+    Raises:
+        github3.exceptions.GitHubError: the matching github3 exception when the
+            response status is not expected_status
+    """
+    retries = session.get_adapter(url).max_retries.total or 0
+    attempt = 0
+    response = session.request("POST", url, **kwargs)
+    while response.status_code in http_session.RETRY_STATUSES and attempt < retries:
+        time.sleep(http_session.BACKOFF_FACTOR * 2**attempt)
+        attempt += 1
+        response = session.request("POST", url, **kwargs)
+    if response.status_code == expected_status:
+        return response.json()
+    if attempt and response.status_code == 422 and find_existing is not None:
+        existing = find_existing()
+        if existing is not None:
+            return existing
+    raise github3.exceptions.error_for(response)
+
+
+def commit_files(
+    github_connection,
+    organization,
+    repo_name,
+    default_branch,
+    branch_name,
+    files,
+    message,
+):
+    """
+    Create branch_name from the head of default_branch with one commit adding files.
+
+    The file contents are sent inline with the new tree, so GitHub creates the
+    blobs and nothing is downloaded from the repository.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        organization (str): the owner of the repository
+        repo_name (str): the name of the repository
+        default_branch (str): the branch to start from
+        branch_name (str): the branch to create
+        files (dict[str, str]): file path to file contents
+        message (str): the commit message
+
+    Returns:
+        str: the SHA of the new commit
+
+    Raises:
+        BranchExistsError: if branch_name already exists
+        github3.exceptions.GitHubError: if any other API call fails, including
+            a 422 for the tree or commit
+    """
+    session = github_connection.session
+    repo_url = f"{session.base_url}/repos/{organization}/{repo_name}"
+
+    branch = api_request(session, "GET", f"{repo_url}/branches/{default_branch}", 200)
+    head_sha = branch["commit"]["sha"]
+    base_tree_sha = branch["commit"]["commit"]["tree"]["sha"]
+
+    tree = api_post(
+        session,
+        f"{repo_url}/git/trees",
+        201,
+        json={
+            "base_tree": base_tree_sha,
+            "tree": [
+                {"path": path, "mode": "100644", "type": "blob", "content": content}
+                for path, content in files.items()
+            ],
+        },
+    )
+    commit = api_post(
+        session,
+        f"{repo_url}/git/commits",
+        201,
+        json={"message": message, "tree": tree["sha"], "parents": [head_sha]},
+    )
+
+    def find_ref():
+        """Return the branch if an earlier attempt created it at the new commit."""
+        try:
+            ref = api_request(
+                session, "GET", f"{repo_url}/git/ref/heads/{branch_name}", 200
+            )
+        except github3.exceptions.NotFoundError:
+            return None
+        return ref if ref["object"]["sha"] == commit["sha"] else None
+
+    try:
+        api_post(
+            session,
+            f"{repo_url}/git/refs",
+            201,
+            find_ref,
+            json={"ref": f"refs/heads/{branch_name}", "sha": commit["sha"]},
+        )
+    except github3.exceptions.UnprocessableEntity as e:
+        raise BranchExistsError(e.response) from e
+    return commit["sha"]
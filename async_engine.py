@@ -0,0 +1,65 @@
+"""Run the per-repository workflow for many repositories on one asyncio event loop."""
+
+import asyncio
+import functools
+
+
+def in_thread(func):
+    """
+    Wrap a blocking function so that it can be awaited without blocking the event loop.
+
+    Args:
+        func (Callable): the blocking function
+
+    Returns:
+        Callable: a coroutine function that runs func in the default thread pool
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return wrapper
+
+
+async def run_workers(worker, repos, max_workers):
+    """
+    Await worker for every repository with at most max_workers in flight.
+
+    Like open_contrib_pr.run_workers, repositories are pulled from the iterable
+    only when a slot is free. The iterable is advanced in a thread, because
+    reading the inventory and the pre-flight queries block.
+
+    Args:
+        worker (Callable[[inventory.RepoRecord], Awaitable]): the coroutine function that processes one repository
+        repos (Iterable[inventory.RepoRecord]): the repositories to process
+        max_workers (int): the number of repositories to process concurrently
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+    repos = iter(repos)
+    tasks: set[asyncio.Task] = set()
+
+    async def process(repo):
+        try:
+            await worker(repo)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Failed to process {repo.full_name}: {e}")
+        finally:
+            semaphore.release()
+
+    while True:
+        await semaphore.acquire()
+        repo = await asyncio.to_thread(next, repos, None)
+        if repo is None:
+            semaphore.release()
+            break
+        task = asyncio.create_task(process(repo))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+def run(worker, repos, max_workers):
+    """Run run_workers to completion on a new event loop."""
+    asyncio.run(run_workers(worker, repos, max_workers))
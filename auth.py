@@ -1,8 +1,17 @@
 """This is the module that contains functions related to authenticating to GitHub with a personal access token."""
 
+import threading
+import time
+from datetime import datetime
+
 import github3
+import http_session
 import requests
 
+# Refresh installation tokens this many seconds before GitHub expires them, so
+# a token handed to a long clone or push does not run out part way through.
+TOKEN_REFRESH_MARGIN = 5 * 60
+
 
 def auth_to_github(
     token: str | None,
@@ -68,14 +77,156 @@ def get_github_app_installation_token(
     Returns:
         str: the GitHub App token
     """
+    response = request_installation_token(
+        ghe, gh_app_id, gh_app_private_key_bytes, gh_app_installation_id
+    )
+    return response.get("token") if response else None
+
+
+def request_installation_token(
+    ghe: str | None,
+    gh_app_id: int | None,
+    gh_app_private_key_bytes: bytes,
+    gh_app_installation_id: int | None,
+    session: requests.Session | None = None,
+) -> dict | None:
+    """
+    Mint a GitHub App Installation token.
+
+    Args:
+        ghe (str): the GitHub Enterprise endpoint
+        gh_app_id (str): the GitHub App ID
+        gh_app_private_key_bytes (bytes): the GitHub App Private Key
+        gh_app_installation_id (str): the GitHub App Installation ID
+        session (requests.Session | None): the session to send the request with,
+            so it reuses the run's connection pool and retries
+
+    Returns:
+        dict | None: the access token response, including "token" and
+        "expires_at", or None if the request failed
+    """
     jwt_headers = github3.apps.create_jwt_headers(gh_app_private_key_bytes, gh_app_id)
     api_endpoint = f"{ghe}/api/v3" if ghe else "https://api.github.com"
     url = f"{api_endpoint}/app/installations/{gh_app_installation_id}/access_tokens"
 
     try:
-        response = requests.post(url, headers=jwt_headers, json=None, timeout=5)
+        response = (session or requests).post(
+            url, headers=jwt_headers, json=None, timeout=http_session.TIMEOUT
+        )
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print(f"Request failed: {e}")
         return None
-    return response.json().get("token")
+    return response.json()
+
+
+class StaticToken:
+    """
+    A token that never needs refreshing, such as a personal access token.
+
+    Attributes:
+        value (str | None): The token
+    """
+
+    def __init__(self, value: str | None):
+        self.value = value
+
+    def token(self) -> str | None:
+        """Return the token."""
+        return self.value
+
+
+class InstallationTokenProvider:
+    # pylint: disable=too-many-instance-attributes
+    """
+    Hand out a GitHub App Installation token, minting a new one before the old one expires.
+
+    Installation tokens last an hour. The current token is cached with its
+    expiry and replaced once fewer than refresh_margin seconds remain, so
+    every caller gets a token that is valid for at least that long. If a
+    refresh fails the cached token is used for as long as it is still valid.
+
+    Attributes:
+        ghe (str | None): The GitHub Enterprise endpoint
+        gh_app_id (int | None): The GitHub App ID
+        gh_app_private_key_bytes (bytes): The GitHub App Private Key
+        gh_app_installation_id (int | None): The GitHub App Installation ID
+        refresh_margin (float): Seconds before expiry at which the token is replaced
+        session (requests.Session | None): The session to mint tokens with
+        expires_at (float): When the cached token expires, as a Unix timestamp
+    """
+
+    def __init__(
+        self,
+        ghe: str | None,
+        gh_app_id: int | None,
+        gh_app_private_key_bytes: bytes,
+        gh_app_installation_id: int | None,
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+        clock=time.time,
+        session: requests.Session | None = None,
+    ):
+        self.ghe = ghe
+        self.gh_app_id = gh_app_id
+        self.gh_app_private_key_bytes = gh_app_private_key_bytes
+        self.gh_app_installation_id = gh_app_installation_id
+        self.refresh_margin = refresh_margin
+        self.session = session
+        self.expires_at = 0.0
+        self._token: str | None = None
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def token(self) -> str:
+        """
+        Return an installation token that is valid for at least refresh_margin seconds.
+
+        Returns:
+            str: the installation token
+
+        Raises:
+            ValueError: if no token could be minted and there is no valid cached token
+        """
+        with self._lock:
+            now = self._clock()
+            if self._token and now < self.expires_at - self.refresh_margin:
+                return self._token
+
+            response = request_installation_token(
+                self.ghe,
+                self.gh_app_id,
+                self.gh_app_private_key_bytes,
+                self.gh_app_installation_id,
+                self.session,
+            )
+            if response and response.get("token"):
+                self._token = response["token"]
+                self.expires_at = parse_timestamp(response["expires_at"])
+            elif self._token and now < self.expires_at:
+                print("Unable to refresh the installation token, using the current one")
+            else:
+                raise ValueError("Unable to get a GitHub App installation token")
+            return str(self._token)
+
+
+class TokenAuth(requests.auth.AuthBase):
+    """
+    Authenticate each request with the provider's current token.
+
+    Setting this as the github3 session's auth replaces the fixed token that
+    login_as_app_installation stores, which stops working after an hour.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+
+    def __call__(self, request):
+        request.headers["Authorization"] = f"token {self.provider.token()}"
+        return request
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """
+    Convert a GitHub ISO 8601 timestamp such as "2024-01-01T00:00:00Z" to a Unix timestamp.
+    """
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+"""End-to-end benchmark: run the whole action offline against N synthetic repositories.
+
+Each repository is a local bare git repository, listed in a generated
+repos.json. The REST and GraphQL endpoints are served by
+fake_github.FakeGitHub, with optional latency and a primary rate limit.
+git reaches the bare repositories through a url.<base>.insteadOf rule in a
+temporary global git config, so the action's code runs unmodified.
+
+open_contrib_pr.main() runs in a fresh process for every mode. The
+benchmark reports repositories per second, the peak RSS of that process
+and its children, and API calls per repository. It exits with status 1 if
+a mode did not open a pull request for every repository.
+
+Usage: python benchmarks/bench_end_to_end.py [repositories] [--latency-ms MS]
+       [--rate-limit N] [--rate-limit-window SECONDS] [--workers N]
+       [--modes threads,async,api] [--organizations N] [--discover]
+       [--bundle FILES] [--large N] [--large-mb MB] [--large-files N]
+       [--schedules inventory,longest-first] [--api-above-mb MB]
+       [--bandwidth-mbps MBPS] [--workspace-dir DIR] [--workspace-max-mb MB]
+       [--tmpfs-mb MB]
+
+--large makes the last N repositories of the inventory MB each, the skewed
+inventory that SCHEDULE=longest-first is measured on, in --large-files
+files each. --bandwidth-mbps
+throttles every pack git serves, so that clones wait on the network as they
+do against GitHub rather than on the CPU. The checkouts go to a temporary
+directory, or --workspace-dir to measure a particular disk, and
+--workspace-max-mb and --tmpfs-mb set WORKSPACE_MAX_MB and
+WORKSPACE_TMPFS_MB.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from fake_github import FakeGitHub  # noqa: E402
+
+ORGANIZATION = "bench"
+MODES = {
+    "threads": {"EXECUTION_MODE": "threads", "COMMIT_MODE": "git"},
+    "async": {"EXECUTION_MODE": "async", "COMMIT_MODE": "git"},
+    "api": {"EXECUTION_MODE": "threads", "COMMIT_MODE": "api"},
+}
+RUN_MAIN = (
+    "import open_contrib_pr\n"
+    "open_contrib_pr.TEMPLATE_PATH = {template!r}\n"
+    "open_contrib_pr.main()\n"
+)
+
+
+def git(*args, cwd=None):
+    """Run a git command for the set up."""
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def make_seed(directory, size_mb=0, files=1):
+    """
+    Create a bare repository with one commit on main to copy for every repository.
+
+    With size_mb, the commit also has that many MB of random data, which git
+    cannot compress, spread over files files.
+    """
+    work = os.path.join(directory, f"seed-{size_mb}-work")
+    seed = os.path.join(directory, f"seed-{size_mb}.git")
+    git("init", "-q", "-b", "main", work)
+    with open(os.path.join(work, "README.md"), "w", encoding="utf-8") as readme:
+        readme.write("# seed\n")
+    for i in range(files if size_mb else 0):
+        path = os.path.join(work, "data", str(i // 100), f"{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as data:
+            data.write(os.urandom(size_mb * 1024 * 1024 // files))
+    git("add", ".", cwd=work)
+    git(
+        "-c",
+        "user.name=Seed",
+        "-c",
+        "user.email=seed@example.com",
+        "commit",
+        "-q",
+        "-m",
+        "seed",
+        cwd=work,
+    )
+    git("clone", "-q", "--bare", work, seed)
+    # Packed like on GitHub: loose objects would set off git gc --auto after each push
+    git("repack", "-a", "-d", "-q", cwd=seed)
+    shutil.rmtree(work)
+    return seed
+
+
+def organizations(count):
+    """Return the names of count organizations."""
+    if count == 1:
+        return [ORGANIZATION]
+    return [f"{ORGANIZATION}-{i}" for i in range(count)]
+
+
+def make_repositories(directory, seeds, server, args):
+    """Copy the seed for every repository, register them with the fake and write repos.json."""
+    remotes = os.path.join(directory, "remotes")
+    owners = organizations(args.organizations)
+    inventory = []
+    for i in range(args.repositories):
+        name = f"repo-{i}"
+        full_name = f"{owners[i % len(owners)]}/{name}"
+        bare = os.path.join(remotes, full_name)
+        large = i >= args.repositories - args.large
+        shutil.copytree(seeds[large], bare)
+        repository = server.add_repository(
+            full_name, files={"README.md": "# seed\n"}, git_dir=bare
+        )
+        repository.disk_usage = args.large_mb * 1024 if large else 1
+        inventory.append(
+            {
+                "name": name,
+                "full_name": full_name,
+                "default_branch": "main",
+                "size": repository.disk_usage,
+            }
+        )
+    repos_json = os.path.join(directory, "repos.json")
+    with open(repos_json, "w", encoding="utf-8") as repos_file:
+        json.dump(inventory, repos_file)
+    return remotes, repos_json
+
+
+def write_bundle(directory, count):
+    """Write a bundle of count files, all from CONTRIBUTING-template.md, and return its path."""
+    template = os.path.join(ROOT, "CONTRIBUTING-template.md")
+    paths = ["CONTRIBUTING.md", "SECURITY.md", "CODE_OF_CONDUCT.md", "SUPPORT.md"]
+    paths += [f".github/ISSUE_TEMPLATE/template-{i}.md" for i in range(count)]
+    bundle = os.path.join(directory, "bundle.json")
+    with open(bundle, "w", encoding="utf-8") as bundle_file:
+        json.dump(
+            {"files": [{"path": path, "template": template} for path in paths[:count]]},
+            bundle_file,
+        )
+    return bundle
+
+
+def write_gitconfig(directory, server, remotes, bandwidth_mbps=0.0):
+    """Point the clone URLs the action builds for the fake server at the bare repositories."""
+    gitconfig = os.path.join(directory, "gitconfig")
+    with open(gitconfig, "w", encoding="utf-8") as config_file:
+        config_file.write(
+            f'[url "file://{remotes}/"]\n\tinsteadOf = https://{server.url}/\n'
+        )
+        if bandwidth_mbps:
+            # git runs the hook with the pack-objects command line appended
+            config_file.write(
+                f"[uploadpack]\n\tpackObjectsHook = {sys.executable} "
+                f"{os.path.abspath(__file__)} --throttle {bandwidth_mbps}\n"
+            )
+    return gitconfig
+
+
+def throttle(bandwidth_mbps, command):
+    """Run a pack-objects command and pass its output on at bandwidth_mbps."""
+    chunk_size = 64 * 1024
+    with subprocess.Popen(command, stdout=subprocess.PIPE) as process:
+        assert process.stdout is not None
+        start = time.monotonic()
+        sent = 0
+        while chunk := process.stdout.read(chunk_size):
+            sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            sent += len(chunk)
+            ahead = sent / (bandwidth_mbps * 1024 * 1024) - (time.monotonic() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    return process.returncode
+
+
+def run_mode(mode, schedule, seeds, args):
+    """
+    Run main() for one mode and schedule and return its measurements.
+
+    Returns:
+        dict: seconds, peak RSS in MiB, API calls and pull requests opened
+    """
+    with tempfile.TemporaryDirectory() as directory, FakeGitHub(
+        latency=args.latency_ms / 1000, rate_limit=args.rate_limit
+    ) as server:
+        server.rate_limit_window = args.rate_limit_window
+        remotes, repos_json = make_repositories(directory, seeds, server, args)
+        work = os.path.join(directory, "work")
+        os.mkdir(work)
+        env = {
+            **os.environ,
+            **MODES[mode],
+            "GIT_CONFIG_GLOBAL": write_gitconfig(
+                directory, server, remotes, args.bandwidth_mbps
+            ),
+            "GIT_CONFIG_NOSYSTEM": "1",
+            "GH_ACTOR": "bench",
+            "GH_TOKEN": "bench-token",
+            "GH_ENTERPRISE_URL": server.url,
+            "ORGANIZATION": ",".join(organizations(args.organizations)),
+            "REPOS_JSON_LOCATION": repos_json,
+            "RATE_LIMIT_PER_HOUR": str(10**9),
+            "RATE_LIMIT_BURST": str(args.repositories),
+            "MAX_WORKERS": str(args.workers),
+            "CACHE_DIR": os.path.join(directory, "cache"),
+            "RESUME": "false",
+            "REPOS_JSON_SOURCE": "discover" if args.discover else "git",
+            "SCHEDULE": schedule,
+            "API_MODE_ABOVE_MB": str(args.api_above_mb),
+            "WORKSPACE_DIR": args.workspace_dir or os.path.join(directory, "workspace"),
+            "WORKSPACE_MAX_MB": str(args.workspace_max_mb),
+            "WORKSPACE_TMPFS_MB": str(args.tmpfs_mb),
+            "PYTHONPATH": ROOT,
+        }
+        if args.bundle:
+            env["BUNDLE_PATH"] = write_bundle(directory, args.bundle)
+        code = RUN_MAIN.format(template=os.path.join(ROOT, "CONTRIBUTING-template.md"))
+        start = time.perf_counter()
+        with subprocess.Popen(  # pylint: disable=consider-using-with
+            [sys.executable, "-c", code],
+            cwd=work,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        ) as process:
+            # wait4 reports the peak RSS of this run alone, unlike RUSAGE_CHILDREN
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+        seconds = time.perf_counter() - start
+        return {
+            "seconds": seconds,
+            "peak_rss_mib": usage.ru_maxrss / 1024,
+            "api_calls": len(server.requests),
+            "pulls": sum(len(repo.pulls) for repo in server.repositories.values()),
+            "returncode": process.returncode,
+        }
+
+
+def main():
+    """Run every requested mode and print a comparison."""
+    if len(sys.argv) > 2 and sys.argv[1] == "--throttle":
+        sys.exit(throttle(float(sys.argv[2]), sys.argv[3:]))
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("repositories", nargs="?", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None)
+    parser.add_argument("--rate-limit-window", type=float, default=60.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--organizations", type=int, default=1)
+    parser.add_argument("--discover", action="store_true")
+    parser.add_argument("--bundle", type=int, default=0)
+    parser.add_argument("--large", type=int, default=0)
+    parser.add_argument("--large-mb", type=int, default=50)
+    parser.add_argument("--large-files", type=int, default=1)
+    parser.add_argument("--schedules", default="inventory")
+    parser.add_argument("--api-above-mb", type=int, default=0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0)
+    parser.add_argument("--workspace-dir", default="")
+    parser.add_argument("--workspace-max-mb", type=int, default=0)
+    parser.add_argument("--tmpfs-mb", type=int, default=0)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        seeds = {False: make_seed(directory)}
+        seeds[True] = (
+            make_seed(directory, args.large_mb, args.large_files)
+            if args.large
+            else seeds[False]
+        )
+        print(
+            f"{args.repositories} repositories in {args.organizations} "
+            f"organizations, {args.workers} workers, "
+            f"{args.latency_ms:g}ms API latency, "
+            f"rate limit {args.rate_limit} per {args.rate_limit_window:g}s, "
+            f"{args.large} of {args.large_mb}MB at the end, "
+            f"{args.bandwidth_mbps or 'unlimited'} MB/s per clone"
+        )
+        print(
+            f"{'mode':<8} {'schedule':<14} {'seconds':>8} {'repos/s':>8} "
+            f"{'peak RSS':>10} {'API calls/repo':>15} {'PRs':>6}"
+        )
+        for mode, schedule in itertools.product(
+            args.modes.split(","), args.schedules.split(",")
+        ):
+            result = run_mode(mode, schedule, seeds, args)
+            print(
+                f"{mode:<8} {schedule:<14} {result['seconds']:>8.2f} "
+                f"{args.repositories / result['seconds']:>8.1f} "
+                f"{result['peak_rss_mib']:>7.1f}MiB "
+                f"{result['api_calls'] / args.repositories:>15.2f} "
+                f"{result['pulls']:>6}"
+            )
+            if result["returncode"] or result["pulls"] != args.repositories:
+                failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
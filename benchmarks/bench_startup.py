@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""Benchmark: how long a fresh interpreter takes to import the action.
+
+Each run of the action starts a new container, so this cost is paid once per
+job. The modules the Dockerfile copies into the image are imported in a new
+interpreter, as a container would:
+
+- eager, no bytecode: every module up front, compiled on start-up (the
+  image before lazy imports and precompiled bytecode)
+- lazy, no bytecode: only what every run needs, still compiled on start-up
+- lazy, precompiled: only what every run needs, compiled when the image is
+  built, as the Dockerfile does
+
+The time of an interpreter that imports nothing is reported as a baseline,
+followed by the dependencies that take longest to import. With
+GITHUB_STEP_SUMMARY set the table is added to the job summary, so CI keeps a
+record of every run.
+
+Usage: python benchmarks/bench_startup.py [--runs N]
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules that only some runs import
+OPTIONAL_MODULES = ("async_engine", "discovery", "scheduler", "tracker")
+
+
+def image_files() -> list[str]:
+    """Return the files the Dockerfile copies into /action/workspace."""
+    with open(os.path.join(ROOT, "Dockerfile"), "r", encoding="utf-8") as dockerfile:
+        for line in dockerfile:
+            if line.startswith("COPY ") and " open_contrib_pr.py " in line:
+                return line.split()[1:-1]
+    raise ValueError("The Dockerfile has no COPY line for the action's modules")
+
+
+def workspace(precompile: bool) -> str:
+    """Return a new directory with the image's files, compiled if precompile is set."""
+    directory = tempfile.mkdtemp(prefix="bench-startup-")
+    for name in image_files():
+        shutil.copy(os.path.join(ROOT, name), directory)
+    if precompile:
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "compileall",
+                "-q",
+                "--invalidation-mode",
+                "unchecked-hash",
+                directory,
+            ],
+            check=True,
+        )
+    return directory
+
+
+def time_import(code: str, precompile: bool, runs: int) -> float:
+    """Return the median seconds of a new interpreter running code in a new workspace."""
+    samples = []
+    for _ in range(runs):
+        directory = workspace(precompile)
+        try:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=directory, check=True)
+            samples.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(directory)
+    return statistics.median(samples)
+
+
+def slowest_imports(count: int) -> list[tuple[str, float]]:
+    """Return the top-level dependencies of the action that take longest to import."""
+    directory = workspace(precompile=True)
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import open_contrib_pr"],
+            cwd=directory,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    finally:
+        shutil.rmtree(directory)
+    local = {os.path.splitext(name)[0] for name in glob.glob("*.py", root_dir=ROOT)}
+    # A module is listed after everything it imported, one level of indentation
+    # deeper, so reading backwards finds each parent before its imports
+    parents: dict[int, str] = {}
+    imports = {}
+    for line in reversed(completed.stderr.splitlines()[1:]):
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        parents[level] = name
+        if level and parents[level - 1] in local and name not in local:
+            imports[name] = int(cumulative) / 1e6
+    return sorted(imports.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main():
+    """Time each way of starting the action and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    eager = "import open_contrib_pr, " + ", ".join(OPTIONAL_MODULES)
+    baseline = time_import("pass", False, args.runs)
+    results = [
+        ("eager, no bytecode", time_import(eager, False, args.runs)),
+        ("lazy, no bytecode", time_import("import open_contrib_pr", False, args.runs)),
+        ("lazy, precompiled", time_import("import open_contrib_pr", True, args.runs)),
+    ]
+
+    lines = [
+        f"Python {sys.version.split()[0]}, median of {args.runs} runs, "
+        f"an empty interpreter takes {baseline * 1000:.0f}ms",
+        "",
+        "| Start-up | Total (ms) | Importing the action (ms) |",
+        "| --- | --- | --- |",
+    ]
+    for name, seconds in results:
+        lines.append(
+            f"| {name} | {seconds * 1000:.0f} | {(seconds - baseline) * 1000:.0f} |"
+        )
+    lines += ["", "| Slowest dependency | Import (ms) |", "| --- | --- |"]
+    for name, seconds in slowest_imports(5):
+        lines.append(f"| {name} | {seconds * 1000:.0f} |")
+    report = "\n".join(lines) + "\n"
+    print(report)
+
+    step_summary = os.getenv("GITHUB_STEP_SUMMARY")
+    if step_summary:
+        with open(step_summary, "a", encoding="utf-8") as summary_file:
+            summary_file.write("## Start-up benchmark\n\n" + report)
+
+
+if __name__ == "__main__":
+    main()
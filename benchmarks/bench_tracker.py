@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""Benchmark: track the pull requests of many repositories against the local fake GitHub.
+
+Every repository gets a pull request from the action's branch, a tenth of
+them behind their base, and is recorded as opened in the journal. The
+search finds the latest 1,000 and the journal the rest. The benchmark
+reports how long tracker.track() takes and how many requests it makes,
+against one REST call per repository for the same information.
+
+Usage: python benchmarks/bench_tracker.py [pull_requests] [--latency-ms MS]
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+import github3  # noqa: E402
+from fake_github import FakeGitHub  # noqa: E402
+from installations import Installation  # noqa: E402
+from journal import PR_OPENED, RunJournal  # noqa: E402
+from tracker import track  # noqa: E402
+
+BRANCH = "contributing-doc"
+
+
+def main():
+    """Run tracker.track() once and print its time and request count."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("pull_requests", nargs="?", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    with FakeGitHub(latency=args.latency_ms / 1000) as server:
+        run_journal = RunJournal(None)
+        for i in range(args.pull_requests):
+            repository = server.add_repository(f"bench/repo-{i}")
+            repository.pulls.append(
+                {
+                    "number": 1,
+                    "head": BRANCH,
+                    "head_sha": f"head-{i}",
+                    "base": "main",
+                    "state": ("OPEN", "MERGED", "CLOSED")[i % 3],
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "merged_at": "2024-01-02T00:00:00Z" if i % 3 == 1 else None,
+                    "closed_at": "2024-01-02T00:00:00Z" if i % 3 else None,
+                    "merge_state": "BEHIND" if i % 10 == 0 else "CLEAN",
+                }
+            )
+            run_journal.record(repository.full_name, PR_OPENED)
+        connection = github3.GitHubEnterprise(url=server.url, token="token")
+        installation = Installation("bench", connection, None, MagicMock())
+
+        start = time.perf_counter()
+        with patch("builtins.print"):
+            summary = track([installation], run_journal, BRANCH, True, "", None)
+        seconds = time.perf_counter() - start
+
+    print(
+        f"{summary['pull_requests']} pull requests ({summary['refreshed']} branches "
+        f"updated) in {seconds:.2f}s with {len(server.requests)} requests, "
+        f"{args.latency_ms:g}ms API latency"
+    )
+    print(
+        f"one REST call per repository: {args.pull_requests} requests, "
+        f"at least {args.pull_requests * args.latency_ms / 1000:.0f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
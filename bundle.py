@@ -0,0 +1,178 @@
+"""The set of files a run adds to each repository, and which of them a repository still needs."""
+
+import hashlib
+import json
+import os
+
+import preflight
+import templates
+
+# The message of the original single-file commit, kept for the default bundle
+CONTRIBUTING_COMMIT_MESSAGE = "Request to add a document outlining how to contribute"
+
+
+class BundleFile:
+    """
+    One file of the bundle.
+
+    Attributes:
+        path (str): Where the rendered template is added in the repository
+        template (templates.Template): The compiled template
+        exists (tuple[str, ...]): Paths any of which means the repository already has the file
+    """
+
+    def __init__(self, path: str, template: templates.Template, exists=()):
+        self.path = path
+        self.template = template
+        self.exists = tuple(exists) or (path,)
+
+
+def default_bundle(template_path: str) -> list[BundleFile]:
+    """
+    Return the bundle of a run without BUNDLE_PATH: CONTRIBUTING.md from template_path.
+
+    Args:
+        template_path (str): the CONTRIBUTING.md template
+
+    Returns:
+        list[BundleFile]: the single file bundle
+    """
+    return [
+        BundleFile(
+            "CONTRIBUTING.md",
+            templates.load_template(template_path),
+            preflight.CONTRIBUTING_PATHS,
+        )
+    ]
+
+
+def load_bundle(path: str) -> list[BundleFile]:
+    """
+    Read a bundle file and compile its templates.
+
+    The bundle is a JSON object with a "files" list. Each file has a "path"
+    in the repository, a "template" relative to the bundle file and optional
+    "exists" paths, any of which counts as the repository already having it.
+
+    Args:
+        path (str): the bundle file
+
+    Returns:
+        list[BundleFile]: the files, in order
+
+    Raises:
+        ValueError: if the bundle is not valid or a template uses an unknown variable
+    """
+    with open(path, "r", encoding="utf-8") as bundle_file:
+        try:
+            entries = json.load(bundle_file)["files"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"{path} must be a JSON object with a files list") from e
+    directory = os.path.dirname(path)
+    files = []
+    for entry in entries:
+        if (
+            not isinstance(entry, dict)
+            or not entry.get("path")
+            or not entry.get("template")
+        ):
+            raise ValueError(f"Every file in {path} needs a path and a template")
+        exists = entry.get("exists", [])
+        if not isinstance(exists, list) or not all(
+            isinstance(exists_path, str) and exists_path for exists_path in exists
+        ):
+            raise ValueError(
+                f"The exists of {entry['path']} in {path} must be a list of paths"
+            )
+        files.append(
+            BundleFile(
+                entry["path"],
+                templates.load_template(os.path.join(directory, entry["template"])),
+                exists,
+            )
+        )
+    if not files:
+        raise ValueError(f"{path} has no files")
+    return files
+
+
+def fingerprint(files) -> str:
+    """
+    Return a short hash of the paths and template sources of a bundle.
+
+    The journal stores it with every entry, so a repository completed with
+    a different bundle is worked on again.
+    """
+    content = json.dumps(
+        [
+            [bundle_file.path, list(bundle_file.exists), bundle_file.template.source]
+            for bundle_file in files
+        ]
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def check_paths(files) -> list[str]:
+    """Return every path that is looked for to decide which files a repository has."""
+    return list(
+        dict.fromkeys(path for bundle_file in files for path in bundle_file.exists)
+    )
+
+
+def missing(files, existing) -> list[BundleFile]:
+    """
+    Return the files that have none of their paths in existing.
+
+    A path can also be a directory, such as .github/ISSUE_TEMPLATE, which
+    exists if any file is under it.
+
+    Args:
+        files (list[BundleFile]): the bundle
+        existing (Iterable[str]): the file paths the repository has
+
+    Returns:
+        list[BundleFile]: the files to add
+    """
+    existing = set(existing)
+    directories = {
+        "/".join(parts[:index])
+        for parts in (path.split("/") for path in existing)
+        for index in range(1, len(parts))
+    }
+    return [
+        bundle_file
+        for bundle_file in files
+        if not any(
+            path.rstrip("/") in existing or path.rstrip("/") in directories
+            for path in bundle_file.exists
+        )
+    ]
+
+
+def for_repository(files, repo) -> list[BundleFile]:
+    """Return the files the pre-flight check found missing, or every file if it did not run."""
+    if repo.missing is None:
+        return list(files)
+    return [bundle_file for bundle_file in files if bundle_file.path in repo.missing]
+
+
+def contributing_only(files) -> bool:
+    """Return whether every file of the bundle is a contributing guide."""
+    return all(
+        set(bundle_file.exists) & set(preflight.CONTRIBUTING_PATHS)
+        for bundle_file in files
+    )
+
+
+def render(files, repo) -> dict[str, str]:
+    """Render each file for a repository, keyed by its path."""
+    return {
+        bundle_file.path: bundle_file.template.render(repo) for bundle_file in files
+    }
+
+
+def commit_message(files) -> str:
+    """Return the message of the commit adding files."""
+    if [bundle_file.path for bundle_file in files] == ["CONTRIBUTING.md"]:
+        return CONTRIBUTING_COMMIT_MESSAGE
+    return "Add " + ", ".join(bundle_file.path for bundle_file in files)
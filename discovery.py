@@ -0,0 +1,221 @@
+"""Build the list of repositories from an organization with GraphQL instead of a repos.json."""
+
+import json
+import os
+
+import preflight
+import requests
+from inventory import RepoRecord
+
+PAGE_SIZE = 100
+
+
+def build_query(paths):
+    """
+    Build a query for a page of an organization's repositories, most recently updated first.
+
+    Args:
+        paths (Iterable[str]): the contributing file paths to look for on the default branch
+
+    Returns:
+        str: the GraphQL query, taking $organization and $cursor
+    """
+    files = " ".join(
+        f'f{index}: object(expression: "HEAD:{path}") {{ id }}'
+        for index, path in enumerate(paths)
+    )
+    return (
+        "query($organization: String!, $cursor: String) { "
+        "organization(login: $organization) { "
+        f"repositories(first: {PAGE_SIZE}, after: $cursor, "
+        "orderBy: {field: UPDATED_AT, direction: DESC}) { "
+        "totalCount pageInfo { hasNextPage endCursor } "
+        "nodes { name nameWithOwner isArchived isFork isEmpty pushedAt updatedAt diskUsage "
+        f"defaultBranchRef {{ name }} {files} }} }} }} }}"
+    )
+
+
+def entry(node):
+    """
+    Convert a repository node to the entry kept in the cache.
+
+    Args:
+        node (dict): the GraphQL node of one repository
+
+    Returns:
+        dict: the fields the action uses
+    """
+    guidelines = next(
+        (
+            path
+            for index, path in enumerate(preflight.CONTRIBUTING_PATHS)
+            if node.get(f"f{index}")
+        ),
+        None,
+    )
+    return {
+        "name": node["name"],
+        "full_name": node["nameWithOwner"],
+        "default_branch": (node.get("defaultBranchRef") or {}).get("name"),
+        "archived": node["isArchived"],
+        "fork": node["isFork"],
+        "empty": node["isEmpty"],
+        "pushed_at": node.get("pushedAt"),
+        "updated_at": node.get("updatedAt"),
+        "size": node.get("diskUsage") or 0,
+        "guidelines": guidelines,
+    }
+
+
+def fetch_pages(github_connection, organization, since=None):
+    """
+    Page through an organization's repositories, stopping at those not updated since since.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        organization (str): the organization to list
+        since (str | None): the newest updatedAt of the last run, or None to list every repository
+
+    Returns:
+        tuple[dict[str, dict], int]: the entries fetched by full name, and the
+        number of repositories the organization has
+
+    Raises:
+        requests.exceptions.HTTPError: if a page cannot be fetched
+        ValueError: if GraphQL reports an error, such as an unknown organization
+    """
+    url = preflight.graphql_url(github_connection)
+    query = build_query(preflight.CONTRIBUTING_PATHS)
+    entries: dict[str, dict] = {}
+    cursor = None
+    while True:
+        response = github_connection.session.post(
+            url,
+            json={
+                "query": query,
+                "variables": {"organization": organization, "cursor": cursor},
+            },
+        )
+        response.raise_for_status()
+        body = response.json()
+        organization_data = (body.get("data") or {}).get("organization")
+        if body.get("errors") or not organization_data:
+            raise ValueError(
+                f"Unable to list the repositories of {organization}: "
+                f"{body.get('errors')}"
+            )
+        repositories = organization_data["repositories"]
+        for node in repositories["nodes"]:
+            if since and node.get("updatedAt") and node["updatedAt"] < since:
+                # Updated before the last run, and so is every repository after it
+                return entries, repositories["totalCount"]
+            entries[node["nameWithOwner"]] = entry(node)
+        if not repositories["pageInfo"]["hasNextPage"]:
+            return entries, repositories["totalCount"]
+        cursor = repositories["pageInfo"]["endCursor"]
+
+
+def cache_path(cache_dir: str, organization: str) -> str:
+    """Return the file the repositories of an organization are cached in."""
+    return os.path.join(cache_dir, f"discovery-{organization.lower()}.json")
+
+
+def load_cache(path: str) -> dict:
+    """Return the cached listing at path, or an empty one."""
+    try:
+        with open(path, "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+        return {"since": cache["since"], "repositories": cache["repositories"]}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {"since": None, "repositories": {}}
+
+
+def save_cache(path: str, since: str | None, repositories: dict) -> None:
+    """Write the listing to path, replacing the previous one only once it is complete."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial_path = f"{path}.partial"
+    with open(partial_path, "w", encoding="utf-8") as cache_file:
+        json.dump({"since": since, "repositories": repositories}, cache_file)
+    os.replace(partial_path, path)
+
+
+def list_repositories(
+    github_connection, organization: str, cache_dir: str, save: bool = True
+) -> dict:
+    """
+    Return every repository of an organization, refreshing the local cache incrementally.
+
+    The first run lists the whole organization. Later runs only fetch the
+    repositories updated since the newest updatedAt in the cache, as they
+    come first in the listing, and merge them in. Archiving, unarchiving,
+    renaming or transferring a repository updates it, so its entry is
+    replaced. A renamed or transferred repository is fetched under its new
+    name while the cache still has the old one, so, as when one was deleted,
+    the cache then has a different number of repositories than the
+    organization and the whole organization is listed again.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        organization (str): the organization to list
+        cache_dir (str): the directory to keep the listing in
+        save (bool): whether to write the refreshed listing back to the cache
+
+    Returns:
+        dict[str, dict]: the cache entry of every repository, by full name
+    """
+    path = cache_path(cache_dir, organization)
+    cache = load_cache(path)
+    repositories = cache["repositories"]
+    fetched, total = fetch_pages(github_connection, organization, cache["since"])
+    repositories.update(fetched)
+    if cache["since"] and len(repositories) != total:
+        print(f"The repositories of {organization} changed, listing them all again")
+        repositories, total = fetch_pages(github_connection, organization)
+    print(
+        f"Discovered {len(repositories)} repositories in {organization} "
+        f"({len(fetched)} updated since the last run)"
+    )
+    updated = [
+        item["updated_at"] for item in repositories.values() if item.get("updated_at")
+    ]
+    if save:
+        save_cache(path, max(updated, default=None), repositories)
+    return repositories
+
+
+def discover_repos(
+    github_connection, organization: str, cache_dir: str, save: bool = True
+):
+    """
+    Yield the repositories of an organization that a pull request can be opened in.
+
+    Archived, forked and empty repositories are left out. A repository that
+    already has a contributing file has it as its guidelines, like an
+    InnerSource crawler inventory.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        organization (str): the organization to list
+        cache_dir (str): the directory to keep the listing in
+        save (bool): whether to write the refreshed listing back to the cache
+
+    Yields:
+        inventory.RepoRecord: the repositories of the organization
+    """
+    try:
+        repositories = list_repositories(
+            github_connection, organization, cache_dir, save
+        )
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Discovery of {organization} failed: {e}")
+        return
+    for item in repositories.values():
+        if item["archived"] or item["fork"] or item["empty"]:
+            continue
+        yield RepoRecord(
+            item["name"],
+            item["full_name"],
+            item["default_branch"],
+            item["guidelines"],
+            size=item.get("size", 0),
+        )
@@ -3,12 +3,25 @@ Sets up the environment variables for the action.
 """
 
 import os
+import re
 from os.path import dirname, join
 
 from dotenv import load_dotenv
 
 MAX_TITLE_LENGTH = 70
 MAX_BODY_LENGTH = 65536
+DEFAULT_RATE_LIMIT_PER_HOUR = 500
+DEFAULT_RATE_LIMIT_BURST = 10
+DEFAULT_MAX_WORKERS = 1
+COMMIT_MODES = ("git", "api")
+CLONE_STRATEGIES = ("full", "shallow")
+REPOS_JSON_SOURCES = ("git", "api", "discover")
+DEFAULT_CACHE_DIR = ".automatic-contrib-prs-cache"
+DEFAULT_HTTP_POOL_SIZE = 10
+DEFAULT_HTTP_RETRIES = 3
+EXECUTION_MODES = ("threads", "async")
+DEFAULT_MIRROR_CACHE_MAX_MB = 10240
+SCHEDULES = ("inventory", "longest-first")
 
 
 def get_bool_env_var(env_var_name: str, default: bool = False) -> bool:
@@ -46,6 +59,32 @@ def get_int_env_var(env_var_name: str, default: int = -1) -> int | None:
         return default if default > default_place_holder else None
 
 
+def split_list(value: str) -> list[str]:
+    """Split a comma or whitespace separated environment variable into its items."""
+    return [item for item in re.split(r"[,\s]+", value) if item]
+
+
+def get_installations_env_var(env_var_name: str) -> dict[str, int]:
+    """Get a list of organization:installation_id pairs.
+
+    Args:
+        env_var_name: The name of the environment variable to retrieve.
+
+    Returns:
+        The installation ID of each organization, keyed by the lower-cased organization.
+    """
+    installations = {}
+    for item in split_list(os.environ.get(env_var_name, "")):
+        organization, _, installation_id = item.partition(":")
+        if not organization or not installation_id.isdigit():
+            raise ValueError(
+                f"{env_var_name} environment variable must be a list of "
+                "organization:installation_id pairs"
+            )
+        installations[organization.lower()] = int(installation_id)
+    return installations
+
+
 class EnvVars:
     # pylint: disable=too-many-instance-attributes
     """
@@ -59,10 +98,38 @@ class EnvVars:
         ghe (str): The GitHub Enterprise URL to use for authentication
         gh_token (str | None): GitHub personal access token (PAT) for API authentication
         gh_actor (str): The GitHub actor to use for authentication
-        organization (str): The GitHub organization to use for the PR
+        organization (str): The GitHub organization, or comma-separated organizations, to use for the PR
         pr_body (str): The PR body to use for the PR
         pr_title (str): The PR title to use for the PR
         repos_json_location (str): The location of the repos.json file
+        rate_limit_per_hour (int): The number of repositories to process per hour
+        rate_limit_burst (int): The number of repositories that can be processed back to back
+        max_workers (int): The number of repositories to process concurrently
+        commit_mode (str): How the file is committed, "git" (clone and push) or "api" (no clone)
+        clone_strategy (str): How repositories are cloned in git mode, "full" or "shallow"
+        preflight (bool): Whether to skip repositories that already have a file or pull request before cloning
+        repos_json_source (str): How the repos.json file is fetched, "git" (clone) or "api" (contents API), or "discover" (GraphQL)
+        cache_dir (str): The directory for files kept between runs
+        resume (bool): Whether to skip repositories whose pull request was opened by an earlier run
+        http_pool_size (int): The number of keep-alive connections to keep open per host
+        http_retries (int): How many times a request is retried after a connection error or 5xx response
+        execution_mode (str): How repositories are processed concurrently, "threads" (a thread per worker) or "async" (one event loop)
+        mirror_cache (bool): Whether to keep bare mirrors of the repositories in the cache directory between runs
+        mirror_cache_max_mb (int): The size in megabytes the mirror cache is trimmed to
+        metrics_dir (str): The directory to write metrics.json and metrics.csv to, or empty for none
+        otel_exporter_otlp_endpoint (str): The OpenTelemetry collector to send the run metrics to, or empty for none
+        dry_run (bool): Whether to only print the repositories that would get a pull request
+        shard_count (int): The number of jobs the repositories are split across
+        shard_index (int): The shard of the repositories this job processes, from 0 to shard_count - 1
+        organizations (list[str]): The GitHub organizations to open pull requests in
+        gh_app_installations (dict[str, int]): The GitHub App Installation ID of each organization, keyed by the lower-cased organization
+        bundle_path (str): The JSON file listing the templates to add and where, or empty for CONTRIBUTING.md alone
+        track_pull_requests (bool): Whether to report on the pull requests opened by earlier runs instead of opening new ones
+        schedule (str): The order repositories are processed in, "inventory" or "longest-first"
+        api_mode_above_mb (int): The size in MB above which a repository is committed through the API instead of cloned, or 0 for none
+        workspace_dir (str): The directory repositories are checked out in, or empty for one in the system's temporary directory
+        workspace_max_mb (int): The size in MB of the checkouts on disk above which new clones wait, or 0 for no limit
+        workspace_tmpfs_mb (int): The size in MB of the checkouts kept on tmpfs, or 0 to check out every repository on disk
     """
 
     def __init__(
@@ -78,6 +145,34 @@ class EnvVars:
         pr_body: str | None,
         pr_title: str | None,
         repos_json_location: str,
+        rate_limit_per_hour: int,
+        rate_limit_burst: int,
+        max_workers: int,
+        commit_mode: str,
+        clone_strategy: str,
+        preflight: bool,
+        repos_json_source: str,
+        cache_dir: str,
+        resume: bool,
+        http_pool_size: int,
+        http_retries: int,
+        execution_mode: str,
+        mirror_cache: bool,
+        mirror_cache_max_mb: int,
+        metrics_dir: str,
+        otel_exporter_otlp_endpoint: str,
+        dry_run: bool,
+        shard_count: int,
+        shard_index: int,
+        organizations: list[str],
+        gh_app_installations: dict[str, int],
+        bundle_path: str,
+        track_pull_requests: bool,
+        schedule: str,
+        api_mode_above_mb: int,
+        workspace_dir: str,
+        workspace_max_mb: int,
+        workspace_tmpfs_mb: int,
     ):
         self.gh_actor = gh_actor
         self.gh_app_id = gh_app_id
@@ -90,6 +185,34 @@ class EnvVars:
         self.pr_body = pr_body
         self.pr_title = pr_title
         self.repos_json_location = repos_json_location
+        self.rate_limit_per_hour = rate_limit_per_hour
+        self.rate_limit_burst = rate_limit_burst
+        self.max_workers = max_workers
+        self.commit_mode = commit_mode
+        self.clone_strategy = clone_strategy
+        self.preflight = preflight
+        self.repos_json_source = repos_json_source
+        self.cache_dir = cache_dir
+        self.resume = resume
+        self.http_pool_size = http_pool_size
+        self.http_retries = http_retries
+        self.execution_mode = execution_mode
+        self.mirror_cache = mirror_cache
+        self.mirror_cache_max_mb = mirror_cache_max_mb
+        self.metrics_dir = metrics_dir
+        self.otel_exporter_otlp_endpoint = otel_exporter_otlp_endpoint
+        self.dry_run = dry_run
+        self.shard_count = shard_count
+        self.shard_index = shard_index
+        self.organizations = organizations
+        self.gh_app_installations = gh_app_installations
+        self.bundle_path = bundle_path
+        self.track_pull_requests = track_pull_requests
+        self.schedule = schedule
+        self.api_mode_above_mb = api_mode_above_mb
+        self.workspace_dir = workspace_dir
+        self.workspace_max_mb = workspace_max_mb
+        self.workspace_tmpfs_mb = workspace_tmpfs_mb
 
     def __repr__(self):
         return (
@@ -104,7 +227,35 @@ class EnvVars:
             f"{self.organization},"
             f"{self.pr_body},"
             f"{self.pr_title},"
-            f"{self.repos_json_location})"
+            f"{self.repos_json_location},"
+            f"{self.rate_limit_per_hour},"
+            f"{self.rate_limit_burst},"
+            f"{self.max_workers},"
+            f"{self.commit_mode},"
+            f"{self.clone_strategy},"
+            f"{self.preflight},"
+            f"{self.repos_json_source},"
+            f"{self.cache_dir},"
+            f"{self.resume},"
+            f"{self.http_pool_size},"
+            f"{self.http_retries},"
+            f"{self.execution_mode},"
+            f"{self.mirror_cache},"
+            f"{self.mirror_cache_max_mb},"
+            f"{self.metrics_dir},"
+            f"{self.otel_exporter_otlp_endpoint},"
+            f"{self.dry_run},"
+            f"{self.shard_count},"
+            f"{self.shard_index},"
+            f"{self.organizations},"
+            f"{self.gh_app_installations},"
+            f"{self.bundle_path},"
+            f"{self.track_pull_requests},"
+            f"{self.schedule},"
+            f"{self.api_mode_above_mb},"
+            f"{self.workspace_dir},"
+            f"{self.workspace_max_mb},"
+            f"{self.workspace_tmpfs_mb})"
         )
 
 
@@ -123,10 +274,38 @@ def get_env_vars(test: bool = False) -> EnvVars:
         gh_app_enterprise_only (bool): Set this to true if the GH APP is created on GHE and needs to communicate with GHE api only
         gh_enterprise_url (str): The GitHub Enterprise URL to use for authentication
         gh_token (str | None): The GitHub token to use for authentication
-        organization (str): The GitHub organization to use for the PR
+        organization (str): The GitHub organization, or comma-separated organizations, to use for the PR
         pr_body (str): The PR body to use for the PR
         pr_title (str): The PR title to use for the PR
         repos_json_location (str): The location of the repos.json file
+        rate_limit_per_hour (int): The number of repositories to process per hour
+        rate_limit_burst (int): The number of repositories that can be processed back to back
+        max_workers (int): The number of repositories to process concurrently
+        commit_mode (str): How the file is committed, "git" (clone and push) or "api" (no clone)
+        clone_strategy (str): How repositories are cloned in git mode, "full" or "shallow"
+        preflight (bool): Whether to skip repositories that already have a file or pull request before cloning
+        repos_json_source (str): How the repos.json file is fetched, "git" (clone) or "api" (contents API), or "discover" (GraphQL)
+        cache_dir (str): The directory for files kept between runs
+        resume (bool): Whether to skip repositories whose pull request was opened by an earlier run
+        http_pool_size (int): The number of keep-alive connections to keep open per host
+        http_retries (int): How many times a request is retried after a connection error or 5xx response
+        execution_mode (str): How repositories are processed concurrently, "threads" (a thread per worker) or "async" (one event loop)
+        mirror_cache (bool): Whether to keep bare mirrors of the repositories in the cache directory between runs
+        mirror_cache_max_mb (int): The size in megabytes the mirror cache is trimmed to
+        metrics_dir (str): The directory to write metrics.json and metrics.csv to, or empty for none
+        otel_exporter_otlp_endpoint (str): The OpenTelemetry collector to send the run metrics to, or empty for none
+        dry_run (bool): Whether to only print the repositories that would get a pull request
+        shard_count (int): The number of jobs the repositories are split across
+        shard_index (int): The shard of the repositories this job processes, from 0 to shard_count - 1
+        organizations (list[str]): The GitHub organizations to open pull requests in
+        gh_app_installations (dict[str, int]): The GitHub App Installation ID of each organization, keyed by the lower-cased organization
+        bundle_path (str): The JSON file listing the templates to add and where, or empty for CONTRIBUTING.md alone
+        track_pull_requests (bool): Whether to report on the pull requests opened by earlier runs instead of opening new ones
+        schedule (str): The order repositories are processed in, "inventory" or "longest-first"
+        api_mode_above_mb (int): The size in MB above which a repository is committed through the API instead of cloned, or 0 for none
+        workspace_dir (str): The directory repositories are checked out in, or empty for one in the system's temporary directory
+        workspace_max_mb (int): The size in MB of the checkouts on disk above which new clones wait, or 0 for no limit
+        workspace_tmpfs_mb (int): The size in MB of the checkouts kept on tmpfs, or 0 to check out every repository on disk
     """
     if not test:
         # Load from .env file if it exists
@@ -138,8 +317,17 @@ def get_env_vars(test: bool = False) -> EnvVars:
     gh_app_private_key_bytes = os.environ.get("GH_APP_PRIVATE_KEY", "").encode("utf8")
     gh_app_installation_id = get_int_env_var("GH_APP_INSTALLATION_ID")
     gh_app_enterprise_only = get_bool_env_var("GITHUB_APP_ENTERPRISE_ONLY")
+    gh_app_installations = get_installations_env_var("GH_APP_INSTALLATIONS")
 
-    if gh_app_id and (not gh_app_private_key_bytes or not gh_app_installation_id):
+    if gh_app_installations and (not gh_app_id or not gh_app_private_key_bytes):
+        raise ValueError(
+            "GH_APP_INSTALLATIONS set and GH_APP_ID or GH_APP_PRIVATE_KEY variable not set"
+        )
+
+    if gh_app_id and (
+        not gh_app_private_key_bytes
+        or not (gh_app_installation_id or gh_app_installations)
+    ):
         raise ValueError(
             "GH_APP_ID set and GH_APP_INSTALLATION_ID or GH_APP_PRIVATE_KEY variable not set"
         )
@@ -155,9 +343,16 @@ def get_env_vars(test: bool = False) -> EnvVars:
 
     gh_enterprise_url = os.getenv("GH_ENTERPRISE_URL", default="").strip()
 
-    organization = os.getenv("ORGANIZATION")
-    if not organization:
+    organization = os.getenv("ORGANIZATION") or ",".join(gh_app_installations)
+    organizations = split_list(organization)
+    if not organizations:
         raise ValueError("ORGANIZATION environment variable not set")
+    if gh_app_id and not gh_app_installation_id:
+        for name in organizations:
+            if name.lower() not in gh_app_installations:
+                raise ValueError(
+                    f"GH_APP_INSTALLATIONS has no installation for the {name} organization"
+                )
 
     pr_title = os.getenv("PR_TITLE", "chore: Add new CONTRIBUTING.md file")
     # make sure that title is a string with less than 70 characters
@@ -174,6 +369,111 @@ def get_env_vars(test: bool = False) -> EnvVars:
 
     repos_json_location = os.getenv("REPOS_JSON_LOCATION", default="repos.json").strip()
 
+    rate_limit_per_hour = get_int_env_var(
+        "RATE_LIMIT_PER_HOUR", DEFAULT_RATE_LIMIT_PER_HOUR
+    )
+    if not rate_limit_per_hour or rate_limit_per_hour < 1:
+        raise ValueError("RATE_LIMIT_PER_HOUR environment variable must be at least 1")
+
+    rate_limit_burst = get_int_env_var("RATE_LIMIT_BURST", DEFAULT_RATE_LIMIT_BURST)
+    if not rate_limit_burst or rate_limit_burst < 1:
+        raise ValueError("RATE_LIMIT_BURST environment variable must be at least 1")
+
+    max_workers = get_int_env_var("MAX_WORKERS", DEFAULT_MAX_WORKERS)
+    if not max_workers or max_workers < 1:
+        raise ValueError("MAX_WORKERS environment variable must be at least 1")
+
+    commit_mode = os.getenv("COMMIT_MODE", default="git").strip().lower() or "git"
+    if commit_mode not in COMMIT_MODES:
+        raise ValueError("COMMIT_MODE environment variable must be one of: git, api")
+
+    clone_strategy = (
+        os.getenv("CLONE_STRATEGY", default="full").strip().lower() or "full"
+    )
+    if clone_strategy not in CLONE_STRATEGIES:
+        raise ValueError(
+            "CLONE_STRATEGY environment variable must be one of: full, shallow"
+        )
+
+    preflight = get_bool_env_var("PREFLIGHT", True)
+
+    repos_json_source = (
+        os.getenv("REPOS_JSON_SOURCE", default="git").strip().lower() or "git"
+    )
+    if repos_json_source not in REPOS_JSON_SOURCES:
+        raise ValueError(
+            "REPOS_JSON_SOURCE environment variable must be one of: git, api, discover"
+        )
+
+    cache_dir = os.getenv("CACHE_DIR", default="").strip() or DEFAULT_CACHE_DIR
+
+    resume = get_bool_env_var("RESUME", True)
+
+    http_pool_size = get_int_env_var("HTTP_POOL_SIZE", DEFAULT_HTTP_POOL_SIZE)
+    if not http_pool_size or http_pool_size < 1:
+        raise ValueError("HTTP_POOL_SIZE environment variable must be at least 1")
+
+    http_retries = get_int_env_var("HTTP_RETRIES", DEFAULT_HTTP_RETRIES)
+    if http_retries is None or http_retries < 0:
+        raise ValueError("HTTP_RETRIES environment variable must be at least 0")
+
+    execution_mode = (
+        os.getenv("EXECUTION_MODE", default="threads").strip().lower() or "threads"
+    )
+    if execution_mode not in EXECUTION_MODES:
+        raise ValueError(
+            "EXECUTION_MODE environment variable must be one of: threads, async"
+        )
+
+    mirror_cache = get_bool_env_var("MIRROR_CACHE", False)
+
+    mirror_cache_max_mb = get_int_env_var(
+        "MIRROR_CACHE_MAX_MB", DEFAULT_MIRROR_CACHE_MAX_MB
+    )
+    if not mirror_cache_max_mb or mirror_cache_max_mb < 1:
+        raise ValueError("MIRROR_CACHE_MAX_MB environment variable must be at least 1")
+
+    metrics_dir = os.getenv("METRICS_DIR", default="").strip()
+
+    otel_exporter_otlp_endpoint = os.getenv(
+        "OTEL_EXPORTER_OTLP_ENDPOINT", default=""
+    ).strip()
+
+    dry_run = get_bool_env_var("DRY_RUN", False)
+
+    shard_count = get_int_env_var("SHARD_COUNT", 1)
+    if not shard_count or shard_count < 1:
+        raise ValueError("SHARD_COUNT environment variable must be at least 1")
+
+    shard_index = get_int_env_var("SHARD_INDEX", 0)
+    if shard_index is None or not 0 <= shard_index < shard_count:
+        raise ValueError(
+            "SHARD_INDEX environment variable must be between 0 and SHARD_COUNT - 1"
+        )
+
+    bundle_path = os.getenv("BUNDLE_PATH", "").strip()
+    track_pull_requests = get_bool_env_var("TRACK_PULL_REQUESTS", False)
+
+    schedule = os.getenv("SCHEDULE", default="inventory").strip().lower() or "inventory"
+    if schedule not in SCHEDULES:
+        raise ValueError(
+            "SCHEDULE environment variable must be one of: inventory, longest-first"
+        )
+
+    api_mode_above_mb = get_int_env_var("API_MODE_ABOVE_MB", 0)
+    if api_mode_above_mb is None or api_mode_above_mb < 0:
+        raise ValueError("API_MODE_ABOVE_MB environment variable must be at least 0")
+
+    workspace_dir = os.getenv("WORKSPACE_DIR", "").strip()
+
+    workspace_max_mb = get_int_env_var("WORKSPACE_MAX_MB", 0)
+    if workspace_max_mb is None or workspace_max_mb < 0:
+        raise ValueError("WORKSPACE_MAX_MB environment variable must be at least 0")
+
+    workspace_tmpfs_mb = get_int_env_var("WORKSPACE_TMPFS_MB", 0)
+    if workspace_tmpfs_mb is None or workspace_tmpfs_mb < 0:
+        raise ValueError("WORKSPACE_TMPFS_MB environment variable must be at least 0")
+
     return EnvVars(
         gh_actor,
         gh_app_id,
@@ -186,4 +486,32 @@ def get_env_vars(test: bool = False) -> EnvVars:
         pr_body,
         pr_title,
         repos_json_location,
+        rate_limit_per_hour,
+        rate_limit_burst,
+        max_workers,
+        commit_mode,
+        clone_strategy,
+        preflight,
+        repos_json_source,
+        cache_dir,
+        resume,
+        http_pool_size,
+        http_retries,
+        execution_mode,
+        mirror_cache,
+        mirror_cache_max_mb,
+        metrics_dir,
+        otel_exporter_otlp_endpoint,
+        dry_run,
+        shard_count,
+        shard_index,
+        organizations,
+        gh_app_installations,
+        bundle_path,
+        track_pull_requests,
+        schedule,
+        api_mode_above_mb,
+        workspace_dir,
+        workspace_max_mb,
+        workspace_tmpfs_mb,
     )
@@ -0,0 +1,815 @@
+"""A local, in-memory stand-in for the parts of the GitHub API this action uses.
+
+The server speaks plain HTTP on 127.0.0.1 and serves the GitHub Enterprise
+URL layout (``/api/v3/...`` and ``/api/graphql``), so a
+``github3.GitHubEnterprise(url=server.url)`` client talks to it unmodified.
+Latency and a primary rate limit can be added to every response. It is used
+by the tests and the benchmarks and has no runtime use.
+"""
+
+import hashlib
+import json
+import re
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qsl, urlsplit
+
+TIMESTAMP = "2024-01-01T00:00:00Z"
+
+USER_URL_KEYS = [
+    "avatar_url",
+    "events_url",
+    "followers_url",
+    "following_url",
+    "gists_url",
+    "html_url",
+    "organizations_url",
+    "received_events_url",
+    "repos_url",
+    "starred_url",
+    "subscriptions_url",
+    "url",
+]
+
+REPOSITORY_URL_KEYS = [
+    "archive_url",
+    "assignees_url",
+    "blobs_url",
+    "branches_url",
+    "clone_url",
+    "collaborators_url",
+    "comments_url",
+    "commits_url",
+    "compare_url",
+    "contents_url",
+    "contributors_url",
+    "deployments_url",
+    "downloads_url",
+    "events_url",
+    "forks_url",
+    "git_commits_url",
+    "git_refs_url",
+    "git_tags_url",
+    "git_url",
+    "hooks_url",
+    "html_url",
+    "issue_comment_url",
+    "issue_events_url",
+    "issues_url",
+    "keys_url",
+    "labels_url",
+    "languages_url",
+    "merges_url",
+    "milestones_url",
+    "notifications_url",
+    "pulls_url",
+    "releases_url",
+    "ssh_url",
+    "stargazers_url",
+    "statuses_url",
+    "subscribers_url",
+    "subscription_url",
+    "svn_url",
+    "tags_url",
+    "teams_url",
+    "trees_url",
+    "url",
+]
+
+PULL_REQUEST_URL_KEYS = [
+    "comments_url",
+    "commits_url",
+    "diff_url",
+    "html_url",
+    "issue_url",
+    "patch_url",
+    "review_comment_url",
+    "review_comments_url",
+    "statuses_url",
+    "url",
+]
+
+
+def fake_sha(*parts) -> str:
+    """Return a deterministic 40 character SHA for the given parts."""
+    return hashlib.sha1(
+        json.dumps(parts, sort_keys=True).encode("utf-8"), usedforsecurity=False
+    ).hexdigest()
+
+
+class FakeRequest:
+    """
+    The parts of an HTTP request that the fake routes look at.
+
+    Attributes:
+        body (dict): The decoded JSON body, or an empty dict
+        headers (Mapping[str, str]): The request headers
+        query (dict[str, str]): The query string parameters
+    """
+
+    def __init__(self, body: dict | None, headers, query: dict | None = None):
+        self.body = body or {}
+        self.headers = headers
+        self.query = query or {}
+
+
+class FakeRepository:
+    # pylint: disable=too-many-instance-attributes
+    """
+    The git objects, refs and pull requests of one fake repository.
+
+    Attributes:
+        owner (str): The repository owner
+        name (str): The repository name
+        default_branch (str): The default branch name
+        branches (dict[str, str]): Branch name to commit SHA
+        commits (dict[str, dict]): Commit SHA to {"tree": sha, "parents": [...], "message": str}
+        trees (dict[str, dict[str, str]]): Tree SHA to {path: file contents}
+        pulls (list[dict]): The pull requests opened against the repository
+        git_dir (str | None): A bare repository whose branches are also visible, for
+            branches pushed with git rather than the API
+        pushed_at (str | None): When the repository was last pushed to
+        updated_at (str | None): When the repository was last updated
+        archived (bool): Whether the repository is archived
+        fork (bool): Whether the repository is a fork
+        disk_usage (int): The size of the repository in KB
+    """
+
+    def __init__(
+        self,
+        owner: str,
+        name: str,
+        files: dict,
+        default_branch: str,
+        git_dir: str | None = None,
+    ):
+        self.owner = owner
+        self.name = name
+        self.default_branch = default_branch
+        tree_sha = fake_sha(files)
+        commit_sha = fake_sha(owner, name, tree_sha)
+        self.trees: dict[str, dict[str, str]] = {tree_sha: dict(files)}
+        self.commits: dict[str, dict] = {
+            commit_sha: {"tree": tree_sha, "parents": [], "message": "initial"}
+        }
+        self.branches: dict[str, str] = {default_branch: commit_sha}
+        self.pulls: list[dict] = []
+        self.git_dir = git_dir
+        self.pushed_at: str | None = TIMESTAMP
+        self.updated_at: str | None = TIMESTAMP
+        self.archived = False
+        self.fork = False
+        self.disk_usage = 0
+
+    @property
+    def full_name(self) -> str:
+        """Return owner/name."""
+        return f"{self.owner}/{self.name}"
+
+    def files(self, branch: str) -> dict[str, str]:
+        """Return the files at the tip of a branch."""
+        return self.trees[self.commits[self.branches[branch]]["tree"]]
+
+    def branch_sha(self, branch: str) -> str | None:
+        """Return the commit a branch points to, looking in git_dir too, or None."""
+        if branch in self.branches or not self.git_dir:
+            return self.branches.get(branch)
+        result = subprocess.run(
+            [
+                "git",
+                "--git-dir",
+                self.git_dir,
+                "rev-parse",
+                "--verify",
+                "--quiet",
+                f"refs/heads/{branch}",
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        return result.stdout.strip() or None
+
+
+class FakeGitHub:
+    # pylint: disable=too-many-instance-attributes
+    """
+    A threaded HTTP server that fakes the GitHub REST API.
+
+    Attributes:
+        repositories (dict[str, FakeRepository]): Repositories by full name
+        requests (list[tuple[str, str]]): Every (method, path) served, in order
+        authorizations (list[str | None]): The Authorization header of every request, in order
+        installation_tokens (list[str]): The installation tokens minted, in order
+        token_lifetime (float): Seconds until a minted installation token expires
+        clock (Callable[[], float]): The time source for installation token expiry
+        failures (list[int]): Status codes to answer the next requests with, in order
+        lost_responses (dict[str, list[int]]): Status codes to answer the next
+            requests to a path with after handling them, as when a change is made
+            but its response is lost
+        latency (float): Seconds to wait before answering each request
+        rate_limit (int | None): Requests allowed per rate_limit_window, or None for no limit
+        rate_limit_window (float): Seconds until an exhausted rate limit resets
+        url (str): The base URL to pass as the GitHub Enterprise URL
+    """
+
+    def __init__(self, latency: float = 0.0, rate_limit: int | None = None):
+        self.repositories: dict[str, FakeRepository] = {}
+        self.requests: list[tuple[str, str]] = []
+        self.authorizations: list[str | None] = []
+        self.installation_tokens: list[str] = []
+        self.token_lifetime = 3600.0
+        self.clock = time.time
+        self.failures: list[int] = []
+        self.lost_responses: dict[str, list[int]] = {}
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_window = 3600.0
+        self._rate_limit_used = 0
+        self._rate_limit_reset = 0.0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.01,), daemon=True
+        )
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_exc):
+        self.stop()
+
+    def start(self) -> None:
+        """Start serving in a background thread."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the server and close its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_repository(
+        self,
+        full_name: str,
+        files: dict | None = None,
+        default_branch: str = "main",
+        git_dir: str | None = None,
+    ) -> FakeRepository:
+        """Create a repository whose default branch contains the given files."""
+        owner, name = full_name.split("/", 1)
+        repository = FakeRepository(
+            owner,
+            name,
+            files or {"README.md": f"# {name}\n"},
+            default_branch,
+            git_dir,
+        )
+        self.repositories[full_name] = repository
+        return repository
+
+    # Payload builders -------------------------------------------------------
+
+    def _api(self, path: str) -> str:
+        return f"{self.url}/api/v3/{path}"
+
+    def user_payload(self, login: str) -> dict:
+        """Return a user payload that github3 can parse."""
+        payload: dict = {key: self._api(f"users/{login}") for key in USER_URL_KEYS}
+        payload.update({"id": 1, "login": login, "type": "User", "gravatar_id": ""})
+        return payload
+
+    def repository_payload(self, repository: FakeRepository) -> dict:
+        """Return a repository payload that github3 can parse."""
+        payload: dict = {
+            key: self._api(f"repos/{repository.full_name}")
+            for key in REPOSITORY_URL_KEYS
+        }
+        payload.update(
+            {
+                "id": 1,
+                "name": repository.name,
+                "full_name": repository.full_name,
+                "owner": self.user_payload(repository.owner),
+                "default_branch": repository.default_branch,
+                "description": None,
+                "homepage": None,
+                "language": None,
+                "mirror_url": None,
+                "private": False,
+                "fork": False,
+                "archived": False,
+                "has_downloads": True,
+                "has_issues": True,
+                "has_pages": False,
+                "has_projects": True,
+                "has_wiki": True,
+                "forks_count": 0,
+                "network_count": 0,
+                "open_issues_count": 0,
+                "size": repository.disk_usage,
+                "stargazers_count": 0,
+                "subscribers_count": 0,
+                "watchers_count": 0,
+                "created_at": TIMESTAMP,
+                "pushed_at": TIMESTAMP,
+                "updated_at": TIMESTAMP,
+            }
+        )
+        return payload
+
+    def pull_request_payload(self, repository: FakeRepository, pull: dict) -> dict:
+        """Return a pull request payload that github3 can parse."""
+        path = f"repos/{repository.full_name}/pulls/{pull['number']}"
+        payload: dict = {key: self._api(path) for key in PULL_REQUEST_URL_KEYS}
+        repo = self.repository_payload(repository)
+        user = self.user_payload(repository.owner)
+        payload.update(
+            {
+                "id": pull["number"],
+                "number": pull["number"],
+                "title": pull["title"],
+                "body": pull["body"],
+                "body_html": pull["body"],
+                "body_text": pull["body"],
+                "state": "open",
+                "locked": False,
+                "active_lock_reason": None,
+                "assignee": None,
+                "assignees": [],
+                "requested_reviewers": [],
+                "requested_teams": [],
+                "labels": [],
+                "milestone": None,
+                "merged_at": None,
+                "closed_at": None,
+                "created_at": TIMESTAMP,
+                "updated_at": TIMESTAMP,
+                "merge_commit_sha": None,
+                "user": user,
+                "head": {
+                    "label": f"{repository.owner}:{pull['head']}",
+                    "ref": pull["head"],
+                    "sha": pull["head_sha"],
+                    "user": user,
+                    "repo": repo,
+                },
+                "base": {
+                    "label": f"{repository.owner}:{pull['base']}",
+                    "ref": pull["base"],
+                    "sha": repository.branch_sha(pull["base"]),
+                    "user": user,
+                    "repo": repo,
+                },
+                "html_url": f"{self.url}/{repository.full_name}/pull/{pull['number']}",
+                "_links": {},
+                "author_association": "MEMBER",
+                "draft": False,
+                "merged": False,
+                "mergeable": None,
+                "mergeable_state": "unknown",
+                "merged_by": None,
+                "comments": 0,
+                "review_comments": 0,
+                "commits": 1,
+                "additions": 0,
+                "deletions": 0,
+            }
+        )
+        return payload
+
+    # Request handling -------------------------------------------------------
+
+    def handle(self, method: str, path: str, request: "FakeRequest") -> tuple:
+        """
+        Route a request.
+
+        Returns:
+            tuple: (status code, payload, headers), where a dict payload is
+            sent as JSON and bytes are sent as is
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests.append((method, path))
+            self.authorizations.append(request.headers.get("Authorization"))
+            exceeded, headers = self._count_rate_limit()
+            if exceeded:
+                return 403, {"message": "API rate limit exceeded"}, headers
+            if self.failures:
+                return self.failures.pop(0), {"message": "Server Error"}, headers
+            for route_method, pattern, handler in ROUTES:
+                match = re.fullmatch(pattern, path)
+                if match and route_method == method:
+                    status, payload, *extra = handler(self, request, *match.groups())
+                    if self.lost_responses.get(path):
+                        status = self.lost_responses[path].pop(0)
+                        payload = {"message": "Server Error"}
+                    return status, payload, {**(extra[0] if extra else {}), **headers}
+        return 404, {"message": "Not Found"}, headers
+
+    def _count_rate_limit(self) -> tuple[bool, dict[str, str]]:
+        """Count a request against the rate limit and return whether it is exceeded and the headers."""
+        if self.rate_limit is None:
+            return False, {}
+        now = self.clock()
+        if now >= self._rate_limit_reset:
+            self._rate_limit_used = 0
+            self._rate_limit_reset = now + self.rate_limit_window
+        self._rate_limit_used += 1
+        remaining = self.rate_limit - self._rate_limit_used
+        return remaining < 0, {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(int(self._rate_limit_reset)),
+        }
+
+    def _repository(self, owner: str, name: str) -> FakeRepository | None:
+        return self.repositories.get(f"{owner}/{name}")
+
+    def get_repository(self, _request, owner, name):
+        """GET /repos/{owner}/{repo}"""
+        repository = self._repository(owner, name)
+        if not repository:
+            return 404, {"message": "Not Found"}
+        return 200, self.repository_payload(repository)
+
+    def get_branch(self, _request, owner, name, branch):
+        """GET /repos/{owner}/{repo}/branches/{branch}"""
+        repository = self._repository(owner, name)
+        if not repository or branch not in repository.branches:
+            return 404, {"message": "Branch not found"}
+        sha = repository.branches[branch]
+        commit = repository.commits[sha]
+        return 200, {
+            "name": branch,
+            "commit": {"sha": sha, "commit": {"tree": {"sha": commit["tree"]}}},
+        }
+
+    def get_ref(self, _request, owner, name, branch):
+        """GET /repos/{owner}/{repo}/git/ref/heads/{branch}"""
+        repository = self._repository(owner, name)
+        if not repository or branch not in repository.branches:
+            return 404, {"message": "Not Found"}
+        ref = f"refs/heads/{branch}"
+        return 200, {"ref": ref, "object": {"sha": repository.branches[branch]}}
+
+    def get_contents(self, request, owner, name, path):
+        """GET /repos/{owner}/{repo}/contents/{path}, raw media type with ETag support"""
+        repository = self._repository(owner, name)
+        files = repository.files(repository.default_branch) if repository else {}
+        if path not in files:
+            return 404, {"message": "Not Found"}
+        etag = f'"{fake_sha(files[path])}"'
+        if request.headers.get("If-None-Match") == etag:
+            return 304, b"", {"ETag": etag}
+        return 200, files[path].encode("utf-8"), {"ETag": etag}
+
+    def create_tree(self, request, owner, name):
+        """POST /repos/{owner}/{repo}/git/trees"""
+        body = request.body
+        repository = self._repository(owner, name)
+        if not repository:
+            return 404, {"message": "Not Found"}
+        if "base_tree" in body and body["base_tree"] not in repository.trees:
+            return 422, {"message": "Invalid tree info"}
+        files = dict(repository.trees.get(body.get("base_tree", ""), {}))
+        for entry in body["tree"]:
+            files[entry["path"]] = entry["content"]
+        sha = fake_sha(files)
+        repository.trees[sha] = files
+        return 201, {"sha": sha}
+
+    def create_commit(self, request, owner, name):
+        """POST /repos/{owner}/{repo}/git/commits"""
+        body = request.body
+        repository = self._repository(owner, name)
+        if not repository or body["tree"] not in repository.trees:
+            return 404, {"message": "Not Found"}
+        sha = fake_sha(body["tree"], body["parents"], body["message"])
+        repository.commits[sha] = {
+            "tree": body["tree"],
+            "parents": body["parents"],
+            "message": body["message"],
+        }
+        return 201, {"sha": sha}
+
+    def create_ref(self, request, owner, name):
+        """POST /repos/{owner}/{repo}/git/refs"""
+        body = request.body
+        repository = self._repository(owner, name)
+        if not repository:
+            return 404, {"message": "Not Found"}
+        branch = body["ref"].removeprefix("refs/heads/")
+        if branch in repository.branches:
+            return 422, {"message": "Reference already exists"}
+        repository.branches[branch] = body["sha"]
+        return 201, {"ref": body["ref"], "object": {"sha": body["sha"]}}
+
+    def list_pulls(self, request, owner, name):
+        """GET /repos/{owner}/{repo}/pulls, filtered by head (owner:branch) and base"""
+        repository = self._repository(owner, name)
+        if not repository:
+            return 404, {"message": "Not Found"}
+        head = request.query.get("head", "").split(":")[-1]
+        return 200, [
+            self.pull_request_payload(repository, pull)
+            for pull in repository.pulls
+            if pull.get("state", "OPEN") == "OPEN"
+            and (not head or pull["head"] == head)
+            and request.query.get("base", pull.get("base")) == pull.get("base")
+        ]
+
+    def create_pull(self, request, owner, name):
+        """POST /repos/{owner}/{repo}/pulls"""
+        body = request.body
+        repository = self._repository(owner, name)
+        if not repository:
+            return 404, {"message": "Not Found"}
+        head_sha = repository.branch_sha(body["head"])
+        if not head_sha:
+            return 422, {"message": "Validation Failed"}
+        if any(
+            pull["head"] == body["head"] and pull["base"] == body["base"]
+            for pull in repository.pulls
+        ):
+            return 422, {"message": "A pull request already exists"}
+        pull = {
+            "number": len(repository.pulls) + 1,
+            "title": body["title"],
+            "body": body.get("body"),
+            "head": body["head"],
+            "head_sha": head_sha,
+            "base": body["base"],
+            "state": "OPEN",
+            "created_at": TIMESTAMP,
+            "merged_at": None,
+            "closed_at": None,
+            "merge_state": "CLEAN",
+        }
+        repository.pulls.append(pull)
+        return 201, self.pull_request_payload(repository, pull)
+
+    def create_installation_token(self, request, installation_id):
+        """POST /app/installations/{installation_id}/access_tokens"""
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return 401, {"message": "A JSON web token could not be decoded"}
+        token = f"ghs_{installation_id}_{len(self.installation_tokens) + 1}"
+        self.installation_tokens.append(token)
+        expires_at = datetime.fromtimestamp(
+            self.clock() + self.token_lifetime, timezone.utc
+        )
+        return 201, {
+            "token": token,
+            "expires_at": expires_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+    def graphql(self, request):
+        """
+        POST /graphql, for the queries built by preflight, discovery and tracker.
+
+        Only the shape of those queries is understood: aliased repository
+        fields that ask for files on the default branch, a branch, the
+        number of open pull requests from that branch or the latest of them,
+        a page of an organization's repositories, a page of a search for
+        the pull requests from a branch, or aliased updatePullRequestBranch
+        mutations.
+        """
+        query = request.body.get("query", "")
+        variables = request.body.get("variables") or {}
+        if query.startswith("mutation"):
+            return 200, self._update_pull_request_branches(query, variables)
+        paths = dict(re.findall(r'(f\d+): object\(expression: "HEAD:([^"]+)"\)', query))
+        if "search(type: ISSUE" in query:
+            return 200, self._search_pull_requests(query, variables)
+        if "organization(login: $organization)" in query:
+            return 200, self._organization_repositories(query, variables, paths)
+        branch = re.search(r'qualifiedName: "refs/heads/([^"]+)"', query)
+        tracked = re.search(r'pullRequests\(headRefName: "([^"]+)", first: 1', query)
+        data: dict = {}
+        errors = []
+        for alias, owner, name in re.findall(
+            r"(r\d+): repository\(owner: \$(\w+), name: \$(\w+)\)", query
+        ):
+            repository = self._repository(variables[owner], variables[name])
+            if not repository:
+                data[alias] = None
+                errors.append({"type": "NOT_FOUND", "path": [alias]})
+                continue
+            files = repository.files(repository.default_branch)
+            result: dict = {
+                file_alias: {"id": fake_sha(path)} if path in files else None
+                for file_alias, path in paths.items()
+            }
+            if branch:
+                head = branch.group(1)
+                sha = repository.branch_sha(head)
+                result["ref"] = {"id": sha} if sha else None
+                result["pullRequests"] = {
+                    "totalCount": sum(pull["head"] == head for pull in repository.pulls)
+                }
+            if tracked:
+                pulls = [
+                    pull
+                    for pull in repository.pulls
+                    if pull["head"] == tracked.group(1)
+                ]
+                result["pullRequests"] = {
+                    "nodes": [
+                        self.pull_request_node(repository, pull) for pull in pulls[-1:]
+                    ]
+                }
+            data[alias] = result
+        return 200, {"data": data, "errors": errors} if errors else {"data": data}
+
+    def pull_request_node(self, repository: FakeRepository, pull: dict) -> dict:
+        """Return the GraphQL node of a pull request, with the fields tracker asks for."""
+        return {
+            "id": f"PR_{repository.full_name}#{pull['number']}",
+            "number": pull["number"],
+            "url": f"{self.url}/{repository.full_name}/pull/{pull['number']}",
+            "state": pull["state"],
+            "createdAt": pull["created_at"],
+            "mergedAt": pull["merged_at"],
+            "closedAt": pull["closed_at"],
+            "headRefOid": pull["head_sha"],
+            "mergeStateStatus": pull["merge_state"],
+        }
+
+    def _update_pull_request_branches(self, query, variables):
+        """Answer a tracker.build_mutation, moving the head of each pull request to a new commit."""
+        pulls = {
+            f"PR_{repository.full_name}#{pull['number']}": pull
+            for repository in self.repositories.values()
+            for pull in repository.pulls
+        }
+        data: dict = {}
+        errors = []
+        for alias, name in re.findall(
+            r"(u\d+): updatePullRequestBranch\(input: \$(\w+)\)", query
+        ):
+            update = variables[name]
+            pull = pulls.get(update["pullRequestId"])
+            if not pull or pull["head_sha"] != update.get("expectedHeadOid"):
+                data[alias] = None
+                errors.append({"path": [alias], "message": "Head branch was modified"})
+                continue
+            pull["head_sha"] = fake_sha(pull["head_sha"], update["updateMethod"])
+            pull["merge_state"] = "CLEAN"
+            data[alias] = {"pullRequest": {"id": update["pullRequestId"]}}
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+    def _search_pull_requests(self, query, variables):
+        """Answer a tracker.build_search_query page for "org:<owner> is:pr head:<branch>", newest first."""
+        terms = dict(
+            term.split(":", 1) for term in variables["query"].split() if ":" in term
+        )
+        owner = terms["org"].lower()
+        found = [
+            (repository, pull)
+            for repository in self.repositories.values()
+            if repository.owner.lower() == owner
+            for pull in repository.pulls
+            if pull["head"] == terms["head"]
+        ]
+        found.sort(key=lambda item: (item[1]["created_at"], item[1]["number"]))
+        found.reverse()
+        first = int(re.search(r"first: (\d+)", query).group(1))
+        start = int(variables.get("cursor") or 0)
+        end = min(start + first, len(found), 1000)
+        nodes = [
+            dict(
+                self.pull_request_node(repository, pull),
+                repository={"nameWithOwner": repository.full_name},
+            )
+            for repository, pull in found[start:end]
+        ]
+        return {
+            "data": {
+                "search": {
+                    "issueCount": len(found),
+                    "pageInfo": {
+                        "hasNextPage": end < min(len(found), 1000),
+                        "endCursor": str(end),
+                    },
+                    "nodes": nodes,
+                }
+            }
+        }
+
+    def _organization_repositories(self, query, variables, paths):
+        """Answer a discovery.build_query page, most recently updated first."""
+        owner = variables["organization"].lower()
+        repositories = [
+            repository
+            for repository in self.repositories.values()
+            if repository.owner.lower() == owner
+        ]
+        if not repositories:
+            return {"data": {"organization": None}, "errors": [{"type": "NOT_FOUND"}]}
+        repositories.sort(key=lambda repository: repository.name)
+        repositories.sort(
+            key=lambda repository: repository.updated_at or "", reverse=True
+        )
+        page_size = int(re.search(r"repositories\(first: (\d+)", query).group(1))
+        start = int(variables.get("cursor") or 0)
+        nodes = []
+        end = min(start + page_size, len(repositories))
+        for repository in repositories[start:end]:
+            files = repository.files(repository.default_branch)
+            node: dict = {
+                "name": repository.name,
+                "nameWithOwner": repository.full_name,
+                "isArchived": repository.archived,
+                "isFork": repository.fork,
+                "isEmpty": not files,
+                "pushedAt": repository.pushed_at,
+                "updatedAt": repository.updated_at,
+                "diskUsage": repository.disk_usage,
+                "defaultBranchRef": {"name": repository.default_branch},
+            }
+            for file_alias, path in paths.items():
+                node[file_alias] = {"id": fake_sha(path)} if path in files else None
+            nodes.append(node)
+        return {
+            "data": {
+                "organization": {
+                    "repositories": {
+                        "totalCount": len(repositories),
+                        "pageInfo": {
+                            "hasNextPage": end < len(repositories),
+                            "endCursor": str(end),
+                        },
+                        "nodes": nodes,
+                    }
+                }
+            }
+        }
+
+
+_REPO = r"/api/v3/repos/([^/]+)/([^/]+)"
+
+ROUTES: list[tuple[str, str, Callable[..., tuple]]] = [
+    ("GET", _REPO, FakeGitHub.get_repository),
+    ("GET", _REPO + r"/branches/(.+)", FakeGitHub.get_branch),
+    ("GET", _REPO + r"/git/ref/heads/(.+)", FakeGitHub.get_ref),
+    ("GET", _REPO + r"/contents/(.+)", FakeGitHub.get_contents),
+    ("GET", _REPO + r"/pulls", FakeGitHub.list_pulls),
+    ("POST", _REPO + r"/git/trees", FakeGitHub.create_tree),
+    ("POST", _REPO + r"/git/commits", FakeGitHub.create_commit),
+    ("POST", _REPO + r"/git/refs", FakeGitHub.create_ref),
+    ("POST", _REPO + r"/pulls", FakeGitHub.create_pull),
+    (
+        "POST",
+        r"/api/v3/app/installations/(\d+)/access_tokens",
+        FakeGitHub.create_installation_token,
+    ),
+    ("POST", r"/api/graphql", FakeGitHub.graphql),
+]
+
+
+def _make_handler(fake: FakeGitHub):
+    class Handler(BaseHTTPRequestHandler):
+        """Translate HTTP requests into FakeGitHub.handle calls."""
+
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            url = urlsplit(self.path)
+            request = FakeRequest(
+                json.loads(raw) if raw else None,
+                self.headers,
+                dict(parse_qsl(url.query)),
+            )
+            status, payload, *extra = fake.handle(self.command, url.path, request)
+            headers = dict(extra[0]) if extra else {}
+            if isinstance(payload, bytes):
+                data = payload
+                headers.setdefault("Content-Type", "application/octet-stream")
+            else:
+                data = json.dumps(payload).encode("utf-8")
+                headers.setdefault("Content-Type", "application/json")
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = _dispatch
+        do_POST = _dispatch
+        do_PATCH = _dispatch
+        do_PUT = _dispatch
+
+        def log_message(self, *_args):  # pylint: disable=arguments-differ
+            """Keep test output quiet."""
+
+    return Handler
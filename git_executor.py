@@ -0,0 +1,136 @@
+"""Run git without a shell, recording exit codes and timings and keeping tokens out of argv."""
+
+import base64
+import os
+import subprocess
+import time
+
+
+class GitCommandError(Exception):
+    """
+    A git stage exited with a non-zero status.
+
+    Attributes:
+        stage (str): The name of the stage that failed
+        returncode (int): The exit code of git
+        output (str): The combined stdout and stderr of git
+    """
+
+    def __init__(self, stage: str, returncode: int, output: str):
+        super().__init__(f"{stage} failed with exit code {returncode}")
+        self.stage = stage
+        self.returncode = returncode
+        self.output = output
+
+
+def auth_env(gh_actor: str, token: str | None) -> dict[str, str]:
+    """
+    Return environment variables that make git send the token as an HTTP header.
+
+    The token is passed through GIT_CONFIG_* rather than embedded in the URL,
+    so it does not show up in the process list, in .git/config or in error
+    messages that echo the URL.
+
+    Args:
+        gh_actor (str): the user name to authenticate as
+        token (str | None): the token to authenticate with
+
+    Returns:
+        dict[str, str]: the environment variables to add
+    """
+    credentials = base64.b64encode(f"{gh_actor}:{token}".encode("utf-8")).decode()
+    return {
+        "GIT_CONFIG_COUNT": "1",
+        "GIT_CONFIG_KEY_0": "http.extraHeader",
+        "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+    }
+
+
+def identity_env(name: str, email: str) -> dict[str, str]:
+    """
+    Return environment variables that set the commit author and committer.
+
+    This replaces running git config --global, which changed the user's own
+    configuration when the action was run locally.
+    """
+    return {
+        "GIT_AUTHOR_NAME": name,
+        "GIT_AUTHOR_EMAIL": email,
+        "GIT_COMMITTER_NAME": name,
+        "GIT_COMMITTER_EMAIL": email,
+    }
+
+
+class GitExecutor:
+    """
+    Run the git stages of one repository, stopping at the first failure.
+
+    Each stage is a single git process started from an argument list, so no
+    shell is involved and arguments never need quoting.
+
+    Attributes:
+        env (dict[str, str]): The environment every git process runs with
+        timings (list[tuple[str, float]]): The name and duration in seconds of each stage run
+    """
+
+    def __init__(
+        self,
+        env: dict[str, str] | None = None,
+        timings: list[tuple[str, float]] | None = None,
+    ):
+        self.env = {**os.environ, "GIT_TERMINAL_PROMPT": "0", **(env or {})}
+        self.timings: list[tuple[str, float]] = timings if timings is not None else []
+
+    def run(self, stage: str, *args: str, env: dict[str, str] | None = None) -> str:
+        """
+        Run git with args and return its output.
+
+        Args:
+            stage (str): the name to report the stage under
+            *args (str): the git arguments
+            env (dict[str, str] | None): extra environment variables for this stage only
+
+        Returns:
+            str: the combined stdout and stderr
+
+        Raises:
+            GitCommandError: if git exits with a non-zero status
+        """
+        start = time.monotonic()
+        completed = subprocess.run(
+            ["git", *args],
+            env={**self.env, **(env or {})},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            check=False,
+        )
+        return self._finish(stage, start, completed.returncode, completed.stdout)
+
+    async def run_async(
+        self, stage: str, *args: str, env: dict[str, str] | None = None
+    ) -> str:
+        """The same as run, as an asyncio subprocess for EXECUTION_MODE=async."""
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        start = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            *args,
+            env={**self.env, **(env or {})},
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        output, _ = await process.communicate()
+        returncode = process.returncode if process.returncode is not None else -1
+        return self._finish(stage, start, returncode, output)
+
+    def _finish(self, stage: str, start: float, returncode: int, output: bytes) -> str:
+        self.timings.append((stage, time.monotonic() - start))
+        text = output.decode("utf-8", errors="replace")
+        if returncode != 0:
+            raise GitCommandError(stage, returncode, text)
+        return text
+
+    def summary(self) -> str:
+        """Return the stage timings, e.g. "clone 1.20s, add 0.01s"."""
+        return ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings)
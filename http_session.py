@@ -0,0 +1,69 @@
+"""One keep-alive connection pool, with bounded retries, shared by every HTTP client in a run."""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+BACKOFF_FACTOR = 0.5
+BACKOFF_JITTER = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+def build_adapter(pool_size: int, retries: int) -> HTTPAdapter:
+    """
+    Build a transport adapter that keeps connections alive and retries transient failures.
+
+    Connection errors and 5xx responses are retried up to retries times with
+    exponential backoff plus random jitter, so parallel workers do not retry
+    in lockstep. Only urllib3's idempotent methods are retried after a 5xx: a
+    POST answered with one may still have been applied, so api_commit.api_post
+    retries it and checks for what the earlier attempt created. Rate limit
+    responses are left to rate_limit.RateLimiter.
+
+    Args:
+        pool_size (int): the number of connections to keep open per host
+        retries (int): the maximum number of retries per request
+
+    Returns:
+        requests.adapters.HTTPAdapter: the adapter to mount on every session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=BACKOFF_FACTOR,
+        backoff_jitter=BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+
+def share_adapter(session, adapter: HTTPAdapter):
+    """
+    Route all of a session's requests through adapter and apply the default timeouts.
+
+    Sessions that share an adapter share its connection pool.
+
+    Args:
+        session (requests.Session): a plain or github3 session
+        adapter (requests.adapters.HTTPAdapter): the adapter from build_adapter
+
+    Returns:
+        requests.Session: the same session
+    """
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if hasattr(session, "default_connect_timeout"):
+        # github3 sessions pass these as the timeout of every request
+        session.default_connect_timeout = CONNECT_TIMEOUT
+        session.default_read_timeout = READ_TIMEOUT
+    return session
+
+
+def new_session(adapter: HTTPAdapter) -> requests.Session:
+    """Return a plain session that uses adapter's connection pool."""
+    return share_adapter(requests.Session(), adapter)
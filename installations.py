@@ -0,0 +1,197 @@
+"""Connect to every organization of a run and share the repositories out between them."""
+
+import auth
+import http_session
+import rate_limit
+
+
+class Installation:
+    """
+    An organization, with the GitHub client, token and rate limit budget used for it.
+
+    Organizations that share a GitHub App installation, or a personal access
+    token, share the same client, token provider and limiter, as GitHub
+    counts their requests against the same budget.
+
+    Attributes:
+        organization (str): The organization the pull requests are opened in
+        github_connection (github3.GitHub): The authenticated client
+        token_provider (auth.StaticToken | auth.InstallationTokenProvider): The token for git
+        limiter (rate_limit.RateLimiter): The rate limit budget of the client
+    """
+
+    def __init__(self, organization, github_connection, token_provider, limiter):
+        self.organization = organization
+        self.github_connection = github_connection
+        self.token_provider = token_provider
+        self.limiter = limiter
+
+
+def connect(env_vars, adapter, run_metrics, shard_count: int = 1) -> list:
+    """
+    Authenticate once per installation and return an Installation per organization.
+
+    Args:
+        env_vars (env.EnvVars): the configuration of the run
+        adapter (requests.adapters.HTTPAdapter): the connection pool every client shares
+        run_metrics (metrics.RunMetrics): the metrics that count every API call
+        shard_count (int): the number of shards, which split each budget between them
+
+    Returns:
+        list[Installation]: one per organization, in the configured order
+    """
+    clients: dict = {}
+    installations = []
+    for organization in env_vars.organizations:
+        installation_id = env_vars.gh_app_installations.get(
+            organization.lower(), env_vars.gh_app_installation_id
+        )
+        if installation_id not in clients:
+            clients[installation_id] = connect_client(
+                env_vars, installation_id, adapter, run_metrics, shard_count
+            )
+        installations.append(Installation(organization, *clients[installation_id]))
+    return installations
+
+
+def connect_client(env_vars, installation_id, adapter, run_metrics, shard_count):
+    """
+    Authenticate to GitHub as one installation, or with the personal access token.
+
+    Returns:
+        tuple: the github3 client, its token provider and its rate limiter
+    """
+    github_connection = auth.auth_to_github(
+        env_vars.gh_token,
+        env_vars.gh_app_id,
+        installation_id,
+        env_vars.gh_app_private_key_bytes,
+        env_vars.gh_enterprise_url,
+        env_vars.gh_app_enterprise_only,
+    )
+
+    # Every request of the run, including minting installation tokens, goes
+    # through one keep-alive pool that retries connection errors and 5xx responses
+    http_session.share_adapter(github_connection.session, adapter)
+
+    # Pace the work and back off whenever GitHub reports we are being rate limited.
+    # The limiter is shared by every worker so they draw from one budget, and
+    # each shard takes an equal share of it so that parallel shards stay within it.
+    limiter = rate_limit.RateLimiter(
+        env_vars.rate_limit_per_hour / shard_count,
+        max(env_vars.rate_limit_burst // shard_count, 1),
+    )
+    limiter.attach(github_connection.session)
+    run_metrics.attach(github_connection.session)
+
+    if (
+        not env_vars.gh_token
+        and env_vars.gh_app_id
+        and installation_id
+        and env_vars.gh_app_private_key_bytes
+    ):
+        # Installation tokens expire after an hour, so git and the API session
+        # both ask the provider for the current one instead of keeping a copy
+        token_session = http_session.new_session(adapter)
+        run_metrics.attach(token_session)
+        token_provider = auth.InstallationTokenProvider(
+            env_vars.gh_enterprise_url,
+            env_vars.gh_app_id,
+            env_vars.gh_app_private_key_bytes,
+            installation_id,
+            session=token_session,
+        )
+        github_connection.session.auth = auth.TokenAuth(token_provider)
+    else:
+        token_provider = auth.StaticToken(env_vars.gh_token)
+    return github_connection, token_provider, limiter
+
+
+def owner(repo) -> str:
+    """Return the lower-cased organization of a repository."""
+    return repo.full_name.split("/", 1)[0].lower()
+
+
+def owned_by(repos, organization: str):
+    """
+    Yield only the repositories of an organization.
+
+    Args:
+        repos (Iterable[inventory.RepoRecord]): the repositories of the inventory
+        organization (str): the organization to keep
+
+    Yields:
+        inventory.RepoRecord: the repositories owned by organization
+    """
+    organization = organization.lower()
+    for repo in repos:
+        if owner(repo) == organization:
+            yield repo
+
+
+def budget(installations) -> tuple[float, int]:
+    """
+    Return the combined rate and burst of the distinct limiters of installations.
+
+    Returns:
+        tuple[float, int]: repositories per hour and burst across every installation
+    """
+    limiters = {
+        id(installation.limiter): installation.limiter for installation in installations
+    }
+    return (
+        sum(limiter.rate_per_hour for limiter in limiters.values()),
+        sum(limiter.burst for limiter in limiters.values()),
+    )
+
+
+def dispatch(workers: dict):
+    """
+    Return a worker that hands each repository to the worker of its organization.
+
+    With a single organization every repository goes to its worker, whatever
+    the owner in the inventory, as it did before several were supported.
+
+    Args:
+        workers (dict[str, Callable]): the worker of each lower-cased organization
+
+    Returns:
+        Callable: a worker taking a repository and the keyword arguments of the workers
+    """
+    if len(workers) == 1:
+        return next(iter(workers.values()))
+
+    def worker(repo, **kwargs):
+        return workers[owner(repo)](repo, **kwargs)
+
+    return worker
+
+
+def interleave(streams):
+    """
+    Yield the repositories of several installations, taking turns between them.
+
+    On each turn the repository comes from the installation that can start
+    one soonest, so a worker is never handed a repository that would wait on
+    a used up budget while another installation has budget left. Ties go
+    round robin.
+
+    Args:
+        streams (Iterable[tuple[Installation, Iterable[inventory.RepoRecord]]]):
+            each installation with its repositories
+
+    Yields:
+        inventory.RepoRecord: the repositories of every installation
+    """
+    active = [(installation, iter(repos)) for installation, repos in streams]
+    turn = 0
+    while active:
+        order = [(turn + offset) % len(active) for offset in range(len(active))]
+        index = min(order, key=lambda i: active[i][0].limiter.wait_time())
+        repo = next(active[index][1], None)
+        if repo is None:
+            del active[index]
+            turn = index % len(active) if active else 0
+            continue
+        turn = (index + 1) % len(active)
+        yield repo
@@ -0,0 +1,265 @@
+"""Stream repository records out of a repos.json (JSON array) or JSON Lines inventory."""
+
+import hashlib
+import json
+import os
+from typing import IO, Iterator
+
+CHUNK_SIZE = 64 * 1024
+RAW_MEDIA_TYPE = "application/vnd.github.raw+json"
+DEFAULT_INVENTORY_PATH = "repos.json"
+
+
+class RepoRecord:
+    # pylint: disable=too-many-instance-attributes
+    """
+    The fields of an inventory entry that the action uses.
+
+    Attributes:
+        name (str): The repository name
+        full_name (str): The repository owner and name, e.g. "github/automatic-contrib-prs"
+        default_branch (str): The default branch of the repository
+        guidelines (str | None): The guidelines file recorded by the InnerSource crawler, if any
+        owners (tuple[str, ...]): The maintainers recorded by the InnerSource crawler
+        topics (tuple[str, ...]): The repository topics
+        size (int): The size of the repository in KB, as reported by GitHub, or 0 if unknown
+        missing (tuple[str, ...] | None): The bundle paths the pre-flight check found
+            missing, or None if it did not check the repository
+    """
+
+    __slots__ = (
+        "name",
+        "full_name",
+        "default_branch",
+        "guidelines",
+        "owners",
+        "topics",
+        "size",
+        "missing",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        full_name: str,
+        default_branch: str,
+        guidelines: str | None = None,
+        owners: tuple[str, ...] = (),
+        topics: tuple[str, ...] = (),
+        size: int = 0,
+        missing: tuple[str, ...] | None = None,
+    ):
+        self.name = name
+        self.full_name = full_name
+        self.default_branch = default_branch
+        self.guidelines = guidelines
+        self.owners = owners
+        self.topics = topics
+        self.size = size
+        self.missing = missing
+
+    @classmethod
+    def from_dict(cls, repo: dict) -> "RepoRecord":
+        """
+        Build a record from an inventory entry, dropping every unused field.
+
+        Args:
+            repo (dict): the inventory entry
+
+        Returns:
+            RepoRecord: the compact record
+        """
+        metadata = repo.get("_InnerSourceMetadata") or {}
+        return cls(
+            repo["name"],
+            repo["full_name"],
+            repo["default_branch"],
+            metadata.get("guidelines"),
+            tuple(metadata.get("maintainers") or ()),
+            tuple(repo.get("topics") or metadata.get("topics") or ()),
+            repo.get("size") or 0,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, RepoRecord):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    def __repr__(self):
+        return (
+            f"RepoRecord("
+            f"{self.name},"
+            f"{self.full_name},"
+            f"{self.default_branch},"
+            f"{self.guidelines},"
+            f"{self.owners},"
+            f"{self.topics})"
+        )
+
+
+def iter_json_values(stream: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array, or the values of a JSON Lines stream.
+
+    Only one chunk plus the value being decoded is held in memory, so values
+    are produced while the rest of the stream is still being read.
+
+    Args:
+        stream (IO[str]): the text stream to read from
+        chunk_size (int): the number of characters to read at a time
+
+    Yields:
+        Any: each decoded value
+
+    Raises:
+        json.JSONDecodeError: if the stream is not valid JSON or JSON Lines
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    in_array = None
+
+    while True:
+        # Skip whitespace (and the commas between array elements)
+        while position < len(buffer) and (
+            buffer[position].isspace() or (in_array and buffer[position] == ",")
+        ):
+            position += 1
+        if position == len(buffer):
+            if eof:
+                break
+            buffer = stream.read(chunk_size)
+            position = 0
+            eof = not buffer
+            continue
+
+        if in_array is None:
+            in_array = buffer[position] == "["
+            if in_array:
+                position += 1
+            continue
+        if in_array and buffer[position] == "]":
+            break
+
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = len(buffer)
+        if end == len(buffer) and not eof:
+            # The value may continue in the next chunk
+            chunk = stream.read(chunk_size)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+            continue
+        yield value
+        position = end
+
+
+def read_repos(path: str) -> Iterator[RepoRecord]:
+    """
+    Stream the repositories in an inventory file.
+
+    Args:
+        path (str): the path of a JSON array or JSON Lines file of repositories
+
+    Yields:
+        RepoRecord: one record per repository
+    """
+    with open(path, "r", encoding="utf-8") as repos_file:
+        for repo in iter_json_values(repos_file):
+            yield RepoRecord.from_dict(repo)
+
+
+def split_repos_json_location(repos_json_location: str) -> tuple[str, str, str]:
+    """
+    Split an "owner/repo[/path/to/repos.json]" location into its parts.
+
+    Args:
+        repos_json_location (str): the location of the inventory in a repository
+
+    Returns:
+        tuple[str, str, str]: the owner, repository and file path
+
+    Raises:
+        ValueError: if the location does not name a repository
+    """
+    parts = repos_json_location.strip("/").split("/", 2)
+    if len(parts) < 2 or not all(parts):
+        raise ValueError(
+            "REPOS_JSON_LOCATION must be owner/repo[/path] when REPOS_JSON_SOURCE is api"
+        )
+    path = parts[2] if len(parts) == 3 else DEFAULT_INVENTORY_PATH
+    return parts[0], parts[1], path
+
+
+def fetch_repos_json(
+    github_connection,
+    repos_json_location: str,
+    cache_dir: str,
+    download_dir: str | None = None,
+) -> str:
+    """
+    Download the inventory file through the contents API into the local cache.
+
+    The request carries the ETag of the cached copy, so an unchanged inventory
+    costs one 304 response and no download. The token stays in the session's
+    headers rather than in a git URL on a command line. With download_dir the
+    cache is only read: a changed inventory is downloaded there instead.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        repos_json_location (str): the "owner/repo[/path]" location of the inventory
+        cache_dir (str): the directory to keep the cached copy in
+        download_dir (str | None): the directory to download to without updating the cache
+
+    Returns:
+        str: the path of the up to date local copy
+
+    Raises:
+        requests.exceptions.HTTPError: if the file cannot be fetched
+    """
+    owner, repo, path = split_repos_json_location(repos_json_location)
+    key = hashlib.sha256(repos_json_location.encode("utf-8")).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"inventory-{key}.json")
+    etag_path = f"{cache_path}.etag"
+    if download_dir is None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    headers = {"Accept": RAW_MEDIA_TYPE}
+    if os.path.exists(cache_path) and os.path.exists(etag_path):
+        with open(etag_path, "r", encoding="utf-8") as etag_file:
+            headers["If-None-Match"] = etag_file.read().strip()
+
+    session = github_connection.session
+    url = f"{session.base_url}/repos/{owner}/{repo}/contents/{path}"
+    with session.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304:
+            print(f"{repos_json_location} is unchanged, using the cached copy")
+            return cache_path
+        response.raise_for_status()
+        # With download_dir the cached copy and its ETag are left as they are
+        partial_path = (
+            os.path.join(download_dir, os.path.basename(cache_path))
+            if download_dir is not None
+            else f"{cache_path}.partial"
+        )
+        with open(partial_path, "wb") as partial_file:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                partial_file.write(chunk)
+        if download_dir is not None:
+            return partial_path
+        os.replace(partial_path, cache_path)
+        etag = response.headers.get("ETag")
+
+    if etag:
+        with open(etag_path, "w", encoding="utf-8") as etag_file:
+            etag_file.write(etag)
+    elif os.path.exists(etag_path):
+        os.remove(etag_path)
+    return cache_path
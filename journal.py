@@ -0,0 +1,138 @@
+"""Append-only record of how far each repository got, so interrupted runs can resume."""
+
+import json
+import os
+import threading
+import time
+
+CLONED = "cloned"
+PUSHED = "pushed"
+PR_OPENED = "pr_opened"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class RunJournal:
+    """
+    A JSON Lines journal of the stage each repository has reached.
+
+    Every stage change is appended and flushed immediately, so a cancelled run
+    loses at most the line being written. Loading keeps only the latest entry
+    per repository, and a journal that has grown to more than twice that many
+    lines is compacted. A read-only journal is loaded but never written to.
+
+    With a bundle fingerprint every entry records it, and a repository only
+    counts as complete if it was completed with the same bundle.
+
+    Attributes:
+        path (str | None): The journal file, or None to keep the journal in memory only
+        entries (dict[str, dict]): The latest entry for each repository full name
+        fingerprint (str | None): The bundle.fingerprint of the run, or None to ignore the bundle
+    """
+
+    def __init__(
+        self, path: str | None, read_only: bool = False, fingerprint: str | None = None
+    ):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._file = None
+        if path is None:
+            return
+
+        lines = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line cut short by a cancelled run
+                        continue
+                    self.entries[entry["repo"]] = entry
+                    lines += 1
+        if read_only:
+            return
+        if lines > 2 * len(self.entries):
+            self._compact()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The journal stays open for appends until close()
+        self._file = open(  # pylint: disable=consider-using-with
+            path, "a", encoding="utf-8"
+        )
+
+    def _compact(self) -> None:
+        compact_path = f"{self.path}.compact"
+        with open(compact_path, "w", encoding="utf-8") as compact_file:
+            for entry in self.entries.values():
+                compact_file.write(json.dumps(entry) + "\n")
+        os.replace(compact_path, str(self.path))
+
+    def record(self, full_name: str, stage: str, **details) -> None:
+        """
+        Record that a repository reached a stage.
+
+        Args:
+            full_name (str): the repository full name
+            stage (str): one of CLONED, PUSHED, PR_OPENED, SKIPPED or FAILED
+            **details: extra fields to store, e.g. url or reason
+        """
+        entry = {"repo": full_name, "stage": stage, "time": time.time(), **details}
+        if self.fingerprint:
+            entry["bundle"] = self.fingerprint
+        with self._lock:
+            self.entries[full_name] = entry
+            if self._file:
+                self._file.write(json.dumps(entry) + "\n")
+                self._file.flush()
+
+    def is_complete(self, full_name: str) -> bool:
+        """Return whether a pull request was opened, or none was needed, for the repository with this bundle."""
+        entry = self.entries.get(full_name)
+        return (
+            entry is not None
+            and entry["stage"] in (PR_OPENED, SKIPPED)
+            and not self.bundle_changed(entry)
+        )
+
+    def bundle_changed(self, entry: dict) -> bool:
+        """Return whether an entry was recorded with a different bundle than this run's."""
+        return bool(self.fingerprint) and entry.get("bundle") != self.fingerprint
+
+    def pending(self, repos):
+        """
+        Yield the repositories that did not reach PR_OPENED or SKIPPED with this bundle in an earlier run.
+
+        Args:
+            repos (Iterable[inventory.RepoRecord]): the candidate repositories
+
+        Yields:
+            inventory.RepoRecord: the repositories that still need work
+        """
+        for repo in repos:
+            entry = self.entries.get(repo.full_name)
+            if entry and entry["stage"] in (PR_OPENED, SKIPPED):
+                if self.bundle_changed(entry):
+                    print(
+                        f"Retrying {repo.full_name}: the bundle changed since an earlier run"
+                    )
+                else:
+                    reason = (
+                        "already up to date in an earlier run"
+                        if entry["stage"] == SKIPPED
+                        else "pull request opened in an earlier run"
+                    )
+                    print(f"Skipping {repo.full_name}: {reason}")
+                    continue
+            yield repo
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
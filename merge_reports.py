@@ -0,0 +1,51 @@
+"""Merge the metrics reports of sharded runs into the report of a single run.
+
+Usage: python merge_reports.py <output_dir> <reports_dir>
+
+Every directory under reports_dir that holds a metrics.json and metrics.csv,
+such as the downloaded artifacts of each matrix job, is merged. The merged
+metrics.json and metrics.csv are written to output_dir and the job summary
+is appended to GITHUB_STEP_SUMMARY when it is set.
+"""
+
+import os
+import sys
+
+import metrics
+
+
+def find_reports(reports_dir: str) -> list[str]:
+    """
+    Return the directories under reports_dir that hold a complete report.
+
+    Args:
+        reports_dir (str): the directory to search
+
+    Returns:
+        list[str]: the report directories, sorted
+    """
+    return sorted(
+        directory
+        for directory, _, files in os.walk(reports_dir)
+        if "metrics.json" in files and "metrics.csv" in files
+    )
+
+
+def main(argv: list[str]) -> int:
+    """Merge the reports and return the exit status."""
+    if len(argv) != 2:
+        print("Usage: python merge_reports.py <output_dir> <reports_dir>")
+        return 2
+    output_dir, reports_dir = argv
+    report_dirs = find_reports(reports_dir)
+    if not report_dirs:
+        print(f"No metrics reports found in {reports_dir}")
+        return 1
+    merged = metrics.merge_reports(report_dirs)
+    merged.write_reports(output_dir, os.getenv("GITHUB_STEP_SUMMARY"))
+    print(f"Merged {len(report_dirs)} reports into {output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
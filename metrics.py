@@ -0,0 +1,382 @@
+"""Record where the time of a run goes and report it as JSON, CSV and a job summary."""
+
+import contextlib
+import csv
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+SERVICE_NAME = "automatic-contrib-prs"
+PERCENTILES = (50, 95)
+
+
+class RepositoryTimings:
+    """
+    The stages of one repository, filled in while it is processed.
+
+    Attributes:
+        full_name (str): The owner/name of the repository
+        stages (list[tuple[str, float]]): The name and duration in seconds of each stage
+        fetched_bytes (int): The size of the git objects fetched for the repository
+        outcome (str): The journal stage the repository ended in, or "error"
+        seconds (float): The wall time spent on the repository
+    """
+
+    def __init__(self, full_name: str):
+        self.full_name = full_name
+        self.stages: list[tuple[str, float]] = []
+        self.fetched_bytes = 0
+        self.outcome = "error"
+        self.seconds = 0.0
+
+    @contextlib.contextmanager
+    def time(self, stage: str):
+        """Add the time spent in the with block as a stage."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.stages.append((stage, time.monotonic() - start))
+
+
+class RunMetrics:
+    # pylint: disable=too-many-instance-attributes
+    """
+    Per-repository and per-stage timings, API calls and rate limit headroom for a run.
+
+    Workers add a RepositoryTimings through repository() and the API calls are
+    counted by a session response hook, so recording is safe from any thread.
+
+    Attributes:
+        repositories (list[RepositoryTimings]): The repositories processed so far
+        api_calls (int): The number of API responses received
+        api_bytes (int): The total size of the API response bodies
+        rate_limit_remaining (int | None): The lowest X-RateLimit-Remaining value seen
+        elapsed (float | None): The wall time of the run, if it is not measured by clock
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.repositories: list[RepositoryTimings] = []
+        self.api_calls = 0
+        self.api_bytes = 0
+        self.rate_limit_remaining: int | None = None
+        self.elapsed: float | None = None
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def repository(self, full_name: str):
+        """
+        Time the processing of one repository.
+
+        Args:
+            full_name (str): the owner/name of the repository
+
+        Yields:
+            RepositoryTimings: the record to add stages to
+        """
+        record = RepositoryTimings(full_name)
+        start = time.monotonic()
+        try:
+            yield record
+        finally:
+            record.seconds = time.monotonic() - start
+            with self._lock:
+                self.repositories.append(record)
+
+    def instrument(self, worker):
+        """
+        Wrap a repository worker so that each call is timed.
+
+        Args:
+            worker (Callable): a function taking a repository and a timings keyword argument
+
+        Returns:
+            Callable[[inventory.RepoRecord], None]: the timed worker
+        """
+
+        @functools.wraps(worker)
+        def wrapper(repo):
+            with self.repository(repo.full_name) as timings:
+                return worker(repo, timings=timings)
+
+        return wrapper
+
+    def instrument_async(self, worker):
+        """The same as instrument, for a coroutine function."""
+
+        @functools.wraps(worker)
+        async def wrapper(repo):
+            with self.repository(repo.full_name) as timings:
+                return await worker(repo, timings=timings)
+
+        return wrapper
+
+    def response_hook(self, response, *_args, **kwargs):
+        """
+        requests response hook that counts API calls and tracks the rate limit.
+
+        The body of a streamed response is read by the caller after this hook
+        runs, so it is counted from its Content-Length instead of .content,
+        which would buffer all of it.
+        """
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if kwargs.get("stream"):
+            length = response.headers.get("Content-Length", "")
+            size = int(length) if length.isdigit() else 0
+        else:
+            size = len(response.content or b"")
+        with self._lock:
+            self.api_calls += 1
+            self.api_bytes += size
+            if remaining is not None and remaining.isdigit():
+                if self.rate_limit_remaining is None:
+                    self.rate_limit_remaining = int(remaining)
+                else:
+                    self.rate_limit_remaining = min(
+                        self.rate_limit_remaining, int(remaining)
+                    )
+        return response
+
+    def attach(self, session) -> None:
+        """Count every response made through a requests (or github3) session."""
+        session.hooks["response"].append(self.response_hook)
+
+    def summary(self) -> dict:
+        """
+        Summarize the run.
+
+        Returns:
+            dict: the totals, repositories per hour and the count, total, p50
+            and p95 of every stage
+        """
+        with self._lock:
+            repositories = list(self.repositories)
+            elapsed = (
+                self.elapsed
+                if self.elapsed is not None
+                else self._clock() - self._started
+            )
+            api = {
+                "calls": self.api_calls,
+                "bytes": self.api_bytes,
+                "rate_limit_remaining_min": self.rate_limit_remaining,
+            }
+        samples: dict[str, list[float]] = {}
+        outcomes: dict[str, int] = {}
+        for record in repositories:
+            outcomes[record.outcome] = outcomes.get(record.outcome, 0) + 1
+            samples.setdefault("repository", []).append(record.seconds)
+            for stage, seconds in record.stages:
+                samples.setdefault(stage, []).append(seconds)
+        return {
+            "repositories": len(repositories),
+            "outcomes": outcomes,
+            "elapsed_seconds": round(elapsed, 3),
+            "repositories_per_hour": (
+                round(len(repositories) * 3600 / elapsed, 1) if elapsed > 0 else 0.0
+            ),
+            "fetched_bytes": sum(record.fetched_bytes for record in repositories),
+            "api": api,
+            "stages": {
+                stage: {
+                    "count": len(values),
+                    "total": round(sum(values), 3),
+                    **{f"p{p}": round(percentile(values, p), 3) for p in PERCENTILES},
+                }
+                for stage, values in samples.items()
+            },
+        }
+
+    def write_json(self, path: str) -> None:
+        """Write the summary to path as JSON."""
+        with open(path, "w", encoding="utf-8") as report:
+            json.dump(self.summary(), report, indent=2)
+
+    def write_csv(self, path: str) -> None:
+        """Write one row per repository and stage to path as CSV."""
+        with self._lock:
+            repositories = list(self.repositories)
+        with open(path, "w", encoding="utf-8", newline="") as report:
+            writer = csv.writer(report)
+            writer.writerow(["repository", "outcome", "stage", "seconds", "bytes"])
+            for record in repositories:
+                for stage, seconds in record.stages:
+                    writer.writerow(
+                        [record.full_name, record.outcome, stage, f"{seconds:.3f}", ""]
+                    )
+                writer.writerow(
+                    [
+                        record.full_name,
+                        record.outcome,
+                        "repository",
+                        f"{record.seconds:.3f}",
+                        record.fetched_bytes,
+                    ]
+                )
+
+    def job_summary(self) -> str:
+        """Return the summary as a Markdown table for the GitHub Actions job summary."""
+        summary = self.summary()
+        api = summary["api"]
+        lines = [
+            "## automatic-contrib-prs run",
+            "",
+            f"{summary['repositories']} repositories in "
+            f"{summary['elapsed_seconds']:.0f}s "
+            f"({summary['repositories_per_hour']} per hour), "
+            f"{api['calls']} API calls, "
+            f"lowest rate limit remaining: {api['rate_limit_remaining_min']}",
+            "",
+            "| Stage | Count | Total (s) | p50 (s) | p95 (s) |",
+            "| --- | --- | --- | --- | --- |",
+        ]
+        for stage, values in sorted(summary["stages"].items()):
+            lines.append(
+                f"| {stage} | {values['count']} | {values['total']:.2f} "
+                f"| {values['p50']:.2f} | {values['p95']:.2f} |"
+            )
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, metrics_dir: str, step_summary: str | None) -> None:
+        """
+        Write the JSON and CSV reports and append the job summary.
+
+        Args:
+            metrics_dir (str): the directory for metrics.json and metrics.csv, or "" for none
+            step_summary (str | None): the GITHUB_STEP_SUMMARY file, if running in Actions
+        """
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+            self.write_json(os.path.join(metrics_dir, "metrics.json"))
+            self.write_csv(os.path.join(metrics_dir, "metrics.csv"))
+        if step_summary:
+            with open(step_summary, "a", encoding="utf-8") as summary_file:
+                summary_file.write(self.job_summary())
+
+
+def read_csv(path: str) -> list[RepositoryTimings]:
+    """
+    Read the repositories back from a report written by RunMetrics.write_csv.
+
+    Args:
+        path (str): the metrics.csv file
+
+    Returns:
+        list[RepositoryTimings]: the repositories, with their stages
+    """
+    repositories = []
+    stages: list[tuple[str, float]] = []
+    with open(path, "r", encoding="utf-8", newline="") as report:
+        for row in csv.DictReader(report):
+            if row["stage"] != "repository":
+                stages.append((row["stage"], float(row["seconds"])))
+                continue
+            record = RepositoryTimings(row["repository"])
+            record.stages = stages
+            record.outcome = row["outcome"]
+            record.seconds = float(row["seconds"])
+            record.fetched_bytes = int(row["bytes"] or 0)
+            repositories.append(record)
+            stages = []
+    return repositories
+
+
+def merge_reports(report_dirs) -> RunMetrics:
+    """
+    Combine the reports of shards that ran in parallel into the metrics of one run.
+
+    Stage percentiles are recomputed from every shard's metrics.csv. API
+    totals are added up, the lowest rate limit headroom is kept and the
+    elapsed time is that of the slowest shard.
+
+    Args:
+        report_dirs (Iterable[str]): directories that each hold a metrics.json and metrics.csv
+
+    Returns:
+        RunMetrics: the merged metrics
+    """
+    merged = RunMetrics()
+    merged.elapsed = 0.0
+    for report_dir in report_dirs:
+        with open(
+            os.path.join(report_dir, "metrics.json"), "r", encoding="utf-8"
+        ) as report:
+            summary = json.load(report)
+        merged.repositories.extend(read_csv(os.path.join(report_dir, "metrics.csv")))
+        merged.elapsed = max(merged.elapsed, summary["elapsed_seconds"])
+        merged.api_calls += summary["api"]["calls"]
+        merged.api_bytes += summary["api"]["bytes"]
+        remaining = summary["api"]["rate_limit_remaining_min"]
+        if remaining is not None and (
+            merged.rate_limit_remaining is None
+            or remaining < merged.rate_limit_remaining
+        ):
+            merged.rate_limit_remaining = remaining
+    return merged
+
+
+def percentile(values: list[float], p: int) -> float:
+    """Return the nearest-rank p-th percentile of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def export_opentelemetry(run_metrics: RunMetrics) -> bool:
+    """
+    Send the stage durations and API call count to an OpenTelemetry collector.
+
+    The exporter reads OTEL_EXPORTER_OTLP_ENDPOINT and the other standard
+    OTEL_* variables itself. The OpenTelemetry packages are optional and only
+    imported here.
+
+    Args:
+        run_metrics (RunMetrics): the metrics of the run
+
+    Returns:
+        bool: whether the metrics were exported
+    """
+    try:
+        # pylint: disable=import-outside-toplevel
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
+            OTLPMetricExporter,
+        )
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+        from opentelemetry.sdk.resources import Resource
+    except ImportError:
+        print(
+            "OpenTelemetry export needs the opentelemetry-sdk and "
+            "opentelemetry-exporter-otlp-proto-http packages"
+        )
+        return False
+
+    provider = MeterProvider(
+        metric_readers=[PeriodicExportingMetricReader(OTLPMetricExporter())],
+        resource=Resource.create({"service.name": SERVICE_NAME}),
+    )
+    meter = provider.get_meter(SERVICE_NAME)
+    durations = meter.create_histogram(
+        "contrib_prs.stage.duration", unit="s", description="Duration of each stage"
+    )
+    repositories = meter.create_counter(
+        "contrib_prs.repositories", description="Repositories processed"
+    )
+    api_calls = meter.create_counter(
+        "contrib_prs.api.calls", description="GitHub API responses received"
+    )
+    for record in run_metrics.repositories:
+        repositories.add(1, {"outcome": record.outcome})
+        durations.record(record.seconds, {"stage": "repository"})
+        for stage, seconds in record.stages:
+            durations.record(seconds, {"stage": stage})
+    api_calls.add(run_metrics.api_calls)
+    # Shutting down flushes the reader, so everything is sent before exit
+    provider.shutdown()
+    return True
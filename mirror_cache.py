@@ -0,0 +1,181 @@
+"""Keep bare mirrors of the target repositories between runs, evicting the least recently used."""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+INDEX_FILE = "index.json"
+
+
+class MirrorCache:
+    """
+    A directory of bare mirrors, one per repository, capped at max_bytes.
+
+    The first run clones each repository into a bare mirror. Later runs only
+    fetch what changed and check the default branch out into a worktree of
+    the mirror, so no full clone is made. When the mirrors grow past
+    max_bytes, the least recently used ones are removed. Mirrors that are
+    checked out are never removed.
+
+    Attributes:
+        root (str): The directory the mirrors are kept in
+        max_bytes (int): The total size the mirrors are trimmed to
+    """
+
+    def __init__(self, root: str, max_bytes: int, clock=time.time):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._in_use: set[str] = set()
+        os.makedirs(root, exist_ok=True)
+        self.entries = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        """Read the index, adding mirrors it does not know about and dropping deleted ones."""
+        try:
+            with open(
+                os.path.join(self.root, INDEX_FILE), "r", encoding="utf-8"
+            ) as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            index = {}
+        entries = {}
+        for owner in sorted(os.listdir(self.root)):
+            owner_dir = os.path.join(self.root, owner)
+            if not os.path.isdir(owner_dir):
+                continue
+            for mirror in sorted(os.listdir(owner_dir)):
+                if not mirror.endswith(".git"):
+                    continue
+                full_name = f"{owner}/{mirror.removesuffix('.git')}"
+                path = os.path.join(owner_dir, mirror)
+                entries[full_name] = index.get(full_name) or {
+                    "size": directory_size(path),
+                    "used": os.path.getmtime(path),
+                }
+        return entries
+
+    def path(self, repo) -> str:
+        """Return the directory of the mirror of a repository."""
+        return os.path.join(self.root, f"{repo.full_name}.git")
+
+    def checkout_steps(self, endpoint: str, repo, repo_dir: str):
+        """
+        Return the (stage, git arguments) that check a repository out into repo_dir.
+
+        The mirror is cloned if it does not exist yet and fetched otherwise.
+        The default branch is then added as a detached worktree, which shares
+        the mirror's objects and its origin remote. The mirror is marked as in
+        use until release is called.
+
+        Args:
+            endpoint (str): the GitHub host
+            repo (inventory.RepoRecord): the repository to check out
+            repo_dir (str): the directory to check the repository out into
+
+        Returns:
+            list[tuple[str, list[str]]]: the git stages to run, all with credentials
+        """
+        mirror = self.path(repo)
+        with self._lock:
+            self._in_use.add(repo.full_name)
+        if os.path.isdir(mirror):
+            update = (
+                "fetch",
+                [
+                    "-C",
+                    mirror,
+                    "fetch",
+                    "--prune",
+                    "origin",
+                    "+refs/heads/*:refs/heads/*",
+                ],
+            )
+        else:
+            update = (
+                "clone",
+                ["clone", "--bare", f"https://{endpoint}/{repo.full_name}", mirror],
+            )
+        return [
+            update,
+            ("prune", ["-C", mirror, "worktree", "prune"]),
+            (
+                "worktree",
+                [
+                    "-C",
+                    mirror,
+                    "worktree",
+                    "add",
+                    "--force",
+                    "--detach",
+                    os.path.abspath(repo_dir),
+                    repo.default_branch,
+                ],
+            ),
+        ]
+
+    def release(self, repo):
+        """
+        Record that a repository's checkout is finished and trim the cache to max_bytes.
+
+        The worktree directory itself is removed by the caller; its
+        registration in the mirror is pruned the next time it is checked out.
+
+        Args:
+            repo (inventory.RepoRecord): the repository that was checked out
+        """
+        mirror = self.path(repo)
+        size = directory_size(mirror) if os.path.isdir(mirror) else None
+        with self._lock:
+            self._in_use.discard(repo.full_name)
+            if size is None:
+                self.entries.pop(repo.full_name, None)
+            else:
+                self.entries[repo.full_name] = {"size": size, "used": self._clock()}
+            evicted = self._select_evictions()
+        for full_name in evicted:
+            print(f"Evicting the mirror of {full_name}")
+            try:
+                shutil.rmtree(os.path.join(self.root, f"{full_name}.git"))
+            except OSError as e:
+                # Called from the worker's finally, so it must not raise
+                print(f"Failed to evict the mirror of {full_name}: {e}")
+
+    def _select_evictions(self) -> list[str]:
+        """Remove the least recently used idle mirrors from the index until they fit."""
+        total = sum(entry["size"] for entry in self.entries.values())
+        evicted = []
+        for full_name, entry in sorted(
+            self.entries.items(), key=lambda item: item[1]["used"]
+        ):
+            if total <= self.max_bytes:
+                break
+            if full_name in self._in_use:
+                continue
+            total -= entry["size"]
+            evicted.append(full_name)
+        for full_name in evicted:
+            del self.entries[full_name]
+        return evicted
+
+    def close(self):
+        """Write the index so the next run does not have to measure every mirror."""
+        with self._lock:
+            with open(
+                os.path.join(self.root, INDEX_FILE), "w", encoding="utf-8"
+            ) as index_file:
+                json.dump(self.entries, index_file)
+
+
+def directory_size(path):
+    """Return the total size in bytes of the files under path."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
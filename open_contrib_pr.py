@@ -1,13 +1,46 @@
 #!/usr/bin/env python
 """Automatically open a pull request for repositories that have no CONTRIBUTING.md file"""
 
-import json
+import functools
 import os
-from time import sleep
+import shutil
+import tempfile
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 
-import auth
+import api_commit
+import bundle
 import env
+import git_executor
 import github3
+import http_session
+import installations
+import inventory
+import journal
+import metrics
+import mirror_cache
+import plan
+import preflight
+import rate_limit
+import requests
+import sharding
+import workspaces
+
+# async_engine (and with it asyncio), discovery, scheduler and tracker are only
+# imported by the runs that use them, to keep start-up short
+
+TEMPLATE_PATH = "/action/workspace/CONTRIBUTING-template.md"
+# How many times a pull request refused by a rate limit is retried
+RATE_LIMIT_RETRIES = 3
+BRANCH_NAME = "contributing-doc"
+# The worker options that process_repository_via_api takes
+API_OPTIONS = ("pr_body", "pr_title", "run_journal", "files")
+COMMIT_AUTHOR = "GitHub Actions"
 
 
 def get_repos_json(gh_actor, repos_json_location, token, endpoint):
@@ -21,12 +54,42 @@ def get_repos_json(gh_actor, repos_json_location, token, endpoint):
         endpoint (str): The GitHub endpoint.
 
     Returns:
-        dict: A dictionary containing the list of repositories.
+        Iterator[inventory.RepoRecord]: The repositories, read lazily from the
+        JSON array or JSON Lines file.
+    """
+    return inventory.read_repos(
+        clone_repos_json(gh_actor, repos_json_location, token, endpoint)
+    )
+
+
+def clone_repos_json(gh_actor, repos_json_location, token, endpoint, directory=None):
     """
-    os.system(f"git clone https://{gh_actor}:{token}@{endpoint}/{repos_json_location}")
-    with open(str(repos_json_location), "r", encoding="utf-8") as repos_file:
-        innersource_repos = json.loads(repos_file.read())
-    return innersource_repos
+    Clone the JSON file containing the repositories and return its local path.
+
+    Only the latest commit is cloned, as the history of the inventory is never
+    read. If the location cannot be cloned it is used as a local file. With
+    directory, the clone is made there rather than in the working directory.
+    """
+    git = git_executor.GitExecutor()
+    url = f"https://{endpoint}/{repos_json_location}"
+    destination = (
+        [os.path.join(directory, os.path.basename(repos_json_location))]
+        if directory
+        else []
+    )
+    try:
+        git.run(
+            "clone",
+            "clone",
+            "--depth",
+            "1",
+            url,
+            *destination,
+            env=git_executor.auth_env(gh_actor, token),
+        )
+    except git_executor.GitCommandError:
+        print(f"Could not clone {repos_json_location}, reading it as a local file")
+    return str(repos_json_location)
 
 
 def main():  # pragma: no cover
@@ -36,86 +99,673 @@ def main():  # pragma: no cover
     """
     env_vars = env.get_env_vars()
     gh_actor = env_vars.gh_actor
-    organization = env_vars.organization
     pr_body = env_vars.pr_body
     pr_title = env_vars.pr_title
     repos_json_location = env_vars.repos_json_location
-    token = env_vars.gh_token
-    gh_app_id = env_vars.gh_app_id
-    gh_app_installation_id = env_vars.gh_app_installation_id
-    gh_app_private_key_bytes = env_vars.gh_app_private_key_bytes
     ghe = env_vars.gh_enterprise_url
-    gh_app_enterprise_only = env_vars.gh_app_enterprise_only
-
-    # Auth to GitHub.com
-    github_connection = auth.auth_to_github(
-        token,
-        gh_app_id,
-        gh_app_installation_id,
-        gh_app_private_key_bytes,
-        ghe,
-        gh_app_enterprise_only,
+    max_workers = env_vars.max_workers
+    commit_mode = env_vars.commit_mode
+    run_preflight = env_vars.preflight
+    cache_dir = env_vars.cache_dir
+    execution_mode = env_vars.execution_mode
+    metrics_dir = env_vars.metrics_dir
+    dry_run = env_vars.dry_run
+    shard_count = env_vars.shard_count
+    shard_index = env_vars.shard_index
+    api_size_kb = env_vars.api_mode_above_mb * 1024 if commit_mode == "git" else 0
+
+    # Compile the templates once; an unknown variable fails before any work is done
+    files = (
+        bundle.load_bundle(env_vars.bundle_path)
+        if env_vars.bundle_path
+        else bundle.default_bundle(TEMPLATE_PATH)
+    )
+
+    # Auth to GitHub once per installation, each with its own rate limit budget.
+    # Every client shares one keep-alive pool that retries connection errors and 5xx responses
+    adapter = http_session.build_adapter(env_vars.http_pool_size, env_vars.http_retries)
+    run_metrics = metrics.RunMetrics()
+    run_installations = installations.connect(
+        env_vars, adapter, run_metrics, shard_count
     )
+    first = run_installations[0]
 
-    if not token and gh_app_id and gh_app_installation_id and gh_app_private_key_bytes:
-        token = auth.get_github_app_installation_token(
-            ghe, gh_app_id, gh_app_private_key_bytes, gh_app_installation_id
+    if env_vars.track_pull_requests:
+        # Follow up on the pull requests of earlier runs instead of opening new
+        # ones. The journal covers those a search of the organization misses.
+        # With DRY_RUN the branches that are behind are only reported.
+        import tracker  # pylint: disable=import-outside-toplevel
+
+        tracker.track(
+            run_installations,
+            journal.RunJournal(
+                os.path.join(cache_dir, "journal.jsonl") if env_vars.resume else None,
+                read_only=True,
+            ),
+            BRANCH_NAME,
+            not dry_run,
+            metrics_dir,
+            os.getenv("GITHUB_STEP_SUMMARY"),
         )
+        return
 
     endpoint = ghe.removeprefix("https://") if ghe else "github.com"
 
-    os.system("git config --global user.name 'GitHub Actions'")
-    os.system(f"git config --global user.email 'no-reply@{endpoint}'")
+    # Get innersource repos from organization. The inventory is fetched once
+    # and read again for each organization, so it is never held in memory.
+    inventory_path = ""
+    download_dir = (
+        tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        if dry_run
+        else None
+    )
+    if env_vars.repos_json_source == "discover":
+        print("Listing the repositories of each organization instead of a repos.json")
+    elif env_vars.repos_json_source == "api":
+        inventory_path = inventory.fetch_repos_json(
+            first.github_connection,
+            repos_json_location,
+            cache_dir,
+            # A dry run reads the cache but downloads a changed inventory elsewhere
+            download_dir.name if download_dir else None,
+        )
+    else:
+        inventory_path = clone_repos_json(
+            gh_actor,
+            repos_json_location,
+            first.token_provider.token(),
+            endpoint,
+            # A dry run leaves the working directory as it is
+            download_dir.name if download_dir else None,
+        )
+
+    # Remember how far each repository got so a re-run only retries what is
+    # left, or everything once the bundle changes
+    run_journal = journal.RunJournal(
+        os.path.join(cache_dir, "journal.jsonl") if env_vars.resume else None,
+        read_only=dry_run,
+        fingerprint=bundle.fingerprint(files),
+    )
+
+    order = None
+    if env_vars.schedule == "longest-first":
+        # Estimate each repository from its time in the last run, or its size
+        import scheduler  # pylint: disable=import-outside-toplevel
+
+        order = functools.partial(
+            scheduler.longest_first,
+            history=scheduler.load_history(metrics_dir),
+            base_seconds=plan.previous_repository_seconds(metrics_dir)
+            or plan.DEFAULT_REPOSITORY_SECONDS[commit_mode],
+            api_size_kb=api_size_kb,
+        )
+
+    def candidates(installation):
+        if not inventory_path:
+            import discovery  # pylint: disable=import-outside-toplevel
+
+            repos = discovery.discover_repos(
+                installation.github_connection,
+                installation.organization,
+                cache_dir,
+                save=not dry_run,
+            )
+        elif len(run_installations) > 1:
+            repos = installations.owned_by(
+                inventory.read_repos(inventory_path), installation.organization
+            )
+        else:
+            repos = inventory.read_repos(inventory_path)
+        if bundle.contributing_only(files):
+            # The inventory only records contributing guidelines, so it cannot
+            # rule out repositories for a bundle with other files
+            repos = repos_missing_contributing(repos)
+        repos = run_journal.pending(sharding.in_shard(repos, shard_index, shard_count))
+        return order(repos) if order else repos
+
+    if dry_run:
+        # Only batched reads: no clone, push or pull request, and the journal and
+        # the caches in CACHE_DIR are left as they are
+        checked = 0
+        targets = []
+        for installation in run_installations:
+            repos = list(candidates(installation))
+            checked += len(repos)
+            targets.extend(
+                preflight.filter_repositories(
+                    installation.github_connection, repos, BRANCH_NAME, files=files
+                )
+            )
+        rate_per_hour, burst = installations.budget(run_installations)
+        plan.print_plan(
+            targets,
+            checked,
+            commit_mode,
+            rate_per_hour,
+            burst,
+            max_workers,
+            metrics_dir,
+        )
+        if download_dir:
+            download_dir.cleanup()
+        return
+
+    mirrors = None
+    run_workspace = None
+    try:
+        # Keep bare mirrors between runs so most clones become incremental fetches
+        if env_vars.mirror_cache and commit_mode == "git":
+            mirrors = mirror_cache.MirrorCache(
+                os.path.join(cache_dir, "mirrors"),
+                env_vars.mirror_cache_max_mb * 1024 * 1024,
+            )
+
+        # Check every repository out into a directory of its own, deleted in the background
+        if commit_mode == "git":
+            run_workspace = workspaces.Workspace(
+                env_vars.workspace_dir or workspaces.default_root(),
+                env_vars.workspace_max_mb * 1024 * 1024,
+                workspaces.default_tmpfs_root() if env_vars.workspace_tmpfs_mb else "",
+                env_vars.workspace_tmpfs_mb * 1024 * 1024,
+            )
+
+        options = {
+            "pr_body": pr_body,
+            "pr_title": pr_title,
+            "run_journal": run_journal,
+            "files": files,
+        }
+        if commit_mode == "git":
+            options.update(
+                gh_actor=gh_actor,
+                endpoint=endpoint,
+                clone_strategy=env_vars.clone_strategy,
+                mirrors=mirrors,
+                workspace=run_workspace,
+            )
+        worker = installations.dispatch(
+            {
+                installation.organization.lower(): build_worker(
+                    installation, commit_mode, execution_mode, options, api_size_kb
+                )
+                for installation in run_installations
+            }
+        )
+        if commit_mode == "api":
+            worker = run_metrics.instrument(worker)
+            if execution_mode == "async":
+                # Only HTTP calls are left, which run in the event loop's thread pool
+                import async_engine  # pylint: disable=import-outside-toplevel
+
+                worker = async_engine.in_thread(worker)
+        elif execution_mode == "async":
+            worker = run_metrics.instrument_async(worker)
+        else:
+            worker = run_metrics.instrument(worker)
+
+        streams = []
+        for installation in run_installations:
+            repos = candidates(installation)
+            if run_preflight:
+                # Drop repositories that already have a file or pull request before any clone
+                repos = preflight.filter_repositories(
+                    installation.github_connection, repos, BRANCH_NAME, files=files
+                )
+            streams.append((installation, repos))
+        # Take turns between the installations, favouring those with budget left
+        repos = installations.interleave(streams)
+        if execution_mode == "async":
+            import async_engine  # pylint: disable=import-outside-toplevel
+
+            async_engine.run(worker, repos, max_workers)
+        else:
+            run_workers(worker, repos, max_workers)
+    finally:
+        run_journal.close()
+        if mirrors:
+            mirrors.close()
+        if run_workspace:
+            run_workspace.close()
+        # Report where the time went, even when the run was cut short
+        run_metrics.write_reports(metrics_dir, os.getenv("GITHUB_STEP_SUMMARY"))
+        if env_vars.otel_exporter_otlp_endpoint:
+            metrics.export_opentelemetry(run_metrics)
+
+
+def build_worker(installation, commit_mode, execution_mode, options, api_size_kb=0):
+    """
+    Return the function that processes one repository of an installation.
+
+    Args:
+        installation (installations.Installation): the organization, client, token and limiter to use
+        commit_mode (str): "git" or "api"
+        execution_mode (str): "threads" or "async"
+        options (dict): the keyword arguments that are the same for every installation
+        api_size_kb (int): in git mode, the size above which a repository is committed
+            through the API instead of cloned, or 0
+
+    Returns:
+        Callable: the worker, still taking the repository and its timings
+    """
+    if commit_mode == "api":
+        return functools.partial(
+            process_repository_via_api,
+            organization=installation.organization,
+            github_connection=installation.github_connection,
+            limiter=installation.limiter,
+            **{key: options[key] for key in API_OPTIONS},
+        )
+    git_worker = functools.partial(
+        process_repository_async if execution_mode == "async" else process_repository,
+        token_provider=installation.token_provider,
+        organization=installation.organization,
+        github_connection=installation.github_connection,
+        limiter=installation.limiter,
+        **options,
+    )
+    if not api_size_kb:
+        return git_worker
+    # pylint: disable=import-outside-toplevel
+    import scheduler
+
+    api_worker = build_worker(installation, "api", execution_mode, options)
+    if execution_mode == "async":
+        import async_engine
+
+        api_worker = async_engine.in_thread(api_worker)
+    return scheduler.route_by_size(git_worker, api_worker, api_size_kb)
+
+
+def repos_missing_contributing(innersource_repos):
+    """
+    Yield the repositories whose inventory entry has no contributing guidelines.
 
-    # Get innersource repos from organization
-    innersource_repos = get_repos_json(gh_actor, repos_json_location, token, endpoint)
+    Args:
+        innersource_repos (Iterable[inventory.RepoRecord]): The repositories from the JSON file.
 
+    Yields:
+        inventory.RepoRecord: The repositories that need a CONTRIBUTING.md pull request.
+    """
     for repo in innersource_repos:
-        print(repo["name"])
+        print(repo.name)
         # check if the repo has a contributing.md file
+        if repo.guidelines is None:
+            yield repo
+
+
+def run_workers(worker, repos, max_workers):
+    """
+    Call worker for every repository with at most max_workers running at once.
+
+    Repositories are pulled from the iterable only when a worker is free, so
+    the whole list is never queued up front.
+
+    Args:
+        worker (Callable[[inventory.RepoRecord], None]): The function that processes one repository.
+        repos (Iterable[inventory.RepoRecord]): The repositories to process.
+        max_workers (int): The number of repositories to process concurrently.
+    """
+    if max_workers <= 1:
+        for repo in repos:
+            worker(repo)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: dict[Future, inventory.RepoRecord] = {}
+        for repo in repos:
+            if len(in_flight) >= max_workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    report_worker_failure(future, in_flight.pop(future))
+            in_flight[executor.submit(worker, repo)] = repo
+        for future in as_completed(in_flight):
+            report_worker_failure(future, in_flight[future])
+
+
+def report_worker_failure(future, repo):
+    """Print the exception raised by a finished worker, if any."""
+    exception = future.exception()
+    if exception:
+        print(f"Failed to process {repo.full_name}: {exception}")
+
+
+def process_repository(
+    repo,
+    gh_actor,
+    token_provider,
+    endpoint,
+    organization,
+    pr_body,
+    pr_title,
+    github_connection,
+    limiter,
+    run_journal,
+    files,
+    clone_strategy="full",
+    mirrors=None,
+    timings=None,
+    workspace=None,
+):
+    """
+    Clone a repository, push a branch with the files it is missing and open a pull request.
+
+    Every file of the bundle that the repository is missing is added in one
+    commit on one branch, so a repository costs the same however many files
+    the bundle has. Unless the pre-flight check already found which files are
+    missing, they are looked up in the clone, and a repository that has them
+    all is recorded as skipped. Every git command runs against the clone's
+    own directory so that several repositories can be processed at the same
+    time from one working directory. The remaining stages are skipped as
+    soon as one fails, except a push rejected because the branch already
+    exists: an earlier attempt that could not open the pull request leaves
+    it behind, and the pull request is opened from it. The token is fetched
+    again before the push, as an installation token may have been refreshed
+    since the clone. With a mirror cache, the repository is checked out from
+    its mirror instead of being cloned. With a workspace, it is checked out
+    into a new directory of the workspace, which is deleted in the background
+    once the push is done. The time of every stage is added to timings.
+    """
+    timings = timings or metrics.RepositoryTimings(repo.full_name)
+    with timings.time("rate_limit_wait"):
+        limiter.acquire()
+    git = git_executor.GitExecutor(
+        git_executor.identity_env(COMMIT_AUTHOR, f"no-reply@{endpoint}"),
+        timings.stages,
+    )
+    if workspace:
+        with timings.time("workspace_wait"):
+            repo_dir = workspace.acquire(repo)
+    else:
+        repo_dir = repo.name
+    try:
+        if mirrors is None:
+            clone_repository(
+                git,
+                gh_actor,
+                token_provider.token(),
+                endpoint,
+                repo,
+                clone_strategy,
+                repo_dir,
+            )
+        else:
+            credentials = git_executor.auth_env(gh_actor, token_provider.token())
+            for stage, args in mirrors.checkout_steps(endpoint, repo, repo_dir):
+                git.run(stage, *args, env=credentials)
+        run_journal.record(repo.full_name, journal.CLONED)
+        to_add = bundle.for_repository(files, repo)
+        if repo.missing is None:
+            existing = git.run("check", *ls_tree_args(repo_dir, files))
+            to_add = bundle.missing(files, existing.splitlines())
+        if not to_add:
+            record_up_to_date(run_journal, repo, timings)
+            return
+        write_bundle(to_add, repo, repo_dir)
+        for stage, args in commit_steps(repo_dir, to_add):
+            git.run(stage, *args)
         try:
-            if repo["_InnerSourceMetadata"]["guidelines"] == "CONTRIBUTING.md":
-                continue
-        except KeyError:
-            # clone the repo
-            repo_name = clone_repository(gh_actor, token, endpoint, repo)
-            if not repo_name:
-                continue
-
-            # checkout a branch called contributing-doc
-            branch_name = "contributing-doc"
-            os.chdir(f"{repo_name}")
-            os.system(f"git checkout -b {branch_name}")
-
-            # copy, customize, and git add the template file
-            os.system("cp /action/workspace/CONTRIBUTING-template.md CONTRIBUTING.md")
-            os.system(f"sed -i 's/Project-Name/{repo_name}/g' CONTRIBUTING.md")
-            os.system("git add CONTRIBUTING.md")
-            # git commit that file
-            os.system(
-                "git commit -m'Request to add a document outlining how to contribute'"
+            git.run(
+                "push",
+                *push_args(repo_dir),
+                env=git_executor.auth_env(gh_actor, token_provider.token()),
             )
-            # git push the branch
-            os.system(f"git push -u origin {branch_name}")
-            # open a PR from that branch to the default branch
-            default_branch = repo["default_branch"]
-            # create the pull request
-            create_pull_request(
-                organization,
-                pr_body,
-                pr_title,
+        except git_executor.GitCommandError as e:
+            if not branch_exists(e):
+                raise
+            print_existing_branch(repo)
+    except git_executor.GitCommandError as e:
+        record_git_failure(run_journal, repo, e, timings)
+        return
+    finally:
+        print(f"{repo.full_name}: {git.summary()}")
+        remove_checkout(repo, repo_dir, mirrors, timings, workspace)
+    run_journal.record(repo.full_name, journal.PUSHED)
+
+    # open a PR from that branch to the default branch
+    with timings.time("pull_request"):
+        result = create_pull_request(
+            organization,
+            pr_body,
+            pr_title,
+            github_connection,
+            repo.name,
+            BRANCH_NAME,
+            repo.default_branch,
+            limiter,
+        )
+    record_pull_request(run_journal, repo, result, timings)
+
+
+async def process_repository_async(
+    repo,
+    gh_actor,
+    token_provider,
+    endpoint,
+    organization,
+    pr_body,
+    pr_title,
+    github_connection,
+    limiter,
+    run_journal,
+    files,
+    clone_strategy="full",
+    mirrors=None,
+    timings=None,
+    workspace=None,
+):
+    """
+    The process_repository workflow as a coroutine, for EXECUTION_MODE=async.
+
+    git runs as asyncio subprocesses and the blocking token and pull request
+    calls run in the default thread pool, so a repository waiting on the
+    network does not hold a thread of its own.
+    """
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    timings = timings or metrics.RepositoryTimings(repo.full_name)
+    with timings.time("rate_limit_wait"):
+        await limiter.acquire_async()
+    git = git_executor.GitExecutor(
+        git_executor.identity_env(COMMIT_AUTHOR, f"no-reply@{endpoint}"),
+        timings.stages,
+    )
+    if workspace:
+        with timings.time("workspace_wait"):
+            repo_dir = await workspace.acquire_async(repo)
+    else:
+        repo_dir = repo.name
+    try:
+        token = await asyncio.to_thread(token_provider.token)
+        if mirrors is None:
+            steps = [("clone", clone_args(endpoint, repo, clone_strategy, repo_dir))]
+        else:
+            steps = mirrors.checkout_steps(endpoint, repo, repo_dir)
+        for stage, args in steps:
+            await git.run_async(
+                stage, *args, env=git_executor.auth_env(gh_actor, token)
+            )
+        run_journal.record(repo.full_name, journal.CLONED)
+        to_add = bundle.for_repository(files, repo)
+        if repo.missing is None:
+            existing = await git.run_async("check", *ls_tree_args(repo_dir, files))
+            to_add = bundle.missing(files, existing.splitlines())
+        if not to_add:
+            record_up_to_date(run_journal, repo, timings)
+            return
+        write_bundle(to_add, repo, repo_dir)
+        for stage, args in commit_steps(repo_dir, to_add):
+            await git.run_async(stage, *args)
+        token = await asyncio.to_thread(token_provider.token)
+        try:
+            await git.run_async(
+                "push", *push_args(repo_dir), env=git_executor.auth_env(gh_actor, token)
+            )
+        except git_executor.GitCommandError as e:
+            if not branch_exists(e):
+                raise
+            print_existing_branch(repo)
+    except git_executor.GitCommandError as e:
+        record_git_failure(run_journal, repo, e, timings)
+        return
+    finally:
+        print(f"{repo.full_name}: {git.summary()}")
+        await asyncio.to_thread(
+            remove_checkout, repo, repo_dir, mirrors, timings, workspace
+        )
+    run_journal.record(repo.full_name, journal.PUSHED)
+
+    with timings.time("pull_request"):
+        result = await asyncio.to_thread(
+            create_pull_request,
+            organization,
+            pr_body,
+            pr_title,
+            github_connection,
+            repo.name,
+            BRANCH_NAME,
+            repo.default_branch,
+            limiter,
+        )
+    record_pull_request(run_journal, repo, result, timings)
+
+
+def process_repository_via_api(
+    repo,
+    organization,
+    pr_body,
+    pr_title,
+    github_connection,
+    limiter,
+    run_journal,
+    files,
+    timings=None,
+):
+    """
+    Commit the missing files and open a pull request without cloning the repository.
+
+    The branch, tree and commit are created with the Git Data API, so no
+    working tree or git process is needed. For a bundle with more than the
+    contributing guide, a repository the pre-flight check did not see is
+    checked first with one query, so that no existing file is overwritten.
+    """
+    timings = timings or metrics.RepositoryTimings(repo.full_name)
+    with timings.time("rate_limit_wait"):
+        limiter.acquire()
+    repo_name = repo.name
+    default_branch = repo.default_branch
+    if repo.missing is None and not bundle.contributing_only(files):
+        with timings.time("check"):
+            reason = preflight.check_repository(
+                github_connection, repo, BRANCH_NAME, files
+            )
+        if reason:
+            print(f"Skipping {repo.full_name}: {reason}")
+            record_up_to_date(run_journal, repo, timings)
+            return
+    to_add = bundle.for_repository(files, repo)
+    try:
+        with timings.time("commit"):
+            api_commit.commit_files(
                 github_connection,
+                organization,
                 repo_name,
-                branch_name,
                 default_branch,
+                BRANCH_NAME,
+                bundle.render(to_add, repo),
+                bundle.commit_message(to_add),
             )
-            # Clean up repository dir
-            os.chdir("../")
-            os.system(f"rm -rf {repo_name}")
+    except api_commit.BranchExistsError:
+        print("Branch already exists")
+    except github3.exceptions.GitHubError as e:
+        paths = ", ".join(bundle_file.path for bundle_file in to_add)
+        print(f"Failed to commit {paths}: {e}")
+        run_journal.record(repo.full_name, journal.FAILED, reason=str(e))
+        timings.outcome = journal.FAILED
+        return
+    else:
+        run_journal.record(repo.full_name, journal.PUSHED)
+    with timings.time("pull_request"):
+        result = create_pull_request(
+            organization,
+            pr_body,
+            pr_title,
+            github_connection,
+            repo_name,
+            BRANCH_NAME,
+            default_branch,
+            limiter,
+        )
+    record_pull_request(run_journal, repo, result, timings)
+
+
+def write_rendered(template, repo, path):
+    """Render a template for a repository and write it to path."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as rendered_file:
+        rendered_file.write(template.render(repo))
+
+
+def write_bundle(files, repo, repo_dir):
+    """Render every file of the bundle for a repository into its clone."""
+    for bundle_file in files:
+        write_rendered(
+            bundle_file.template, repo, os.path.join(repo_dir, bundle_file.path)
+        )
+
+
+def record_up_to_date(run_journal, repo, timings):
+    """Record a repository that already has every file of the bundle."""
+    print(f"{repo.full_name} already has every file of the bundle")
+    run_journal.record(repo.full_name, journal.SKIPPED)
+    timings.outcome = journal.SKIPPED
+
+
+def remove_checkout(repo, repo_dir, mirrors, timings, workspace=None):
+    """
+    Measure what was fetched, then delete the clone or worktree and release its mirror.
+
+    With a workspace, the directory is deleted in the background instead.
+    """
+    timings.fetched_bytes = mirror_cache.directory_size(os.path.join(repo_dir, ".git"))
+    if workspace:
+        workspace.release(repo_dir, timings.fetched_bytes)
+    else:
+        shutil.rmtree(repo_dir, ignore_errors=True)
+    if mirrors:
+        mirrors.release(repo)
+
+
+def branch_exists(error):
+    """Return whether a push was rejected because BRANCH_NAME already has other commits."""
+    return error.stage == "push" and "[rejected]" in error.output
+
 
-            # rate limit to 20 repos per hour
-            print("Waiting 3 minutes so as not to exceed API limits")
-            sleep(180)
+def print_existing_branch(repo):
+    """Print that the pull request is opened from the branch an earlier attempt pushed."""
+    print(
+        f"{repo.full_name} already has a {BRANCH_NAME} branch, "
+        "opening the pull request from it"
+    )
+
+
+def record_git_failure(run_journal, repo, error, timings):
+    """Print a failed git stage with its output and record it in the run journal."""
+    print(f"Failed to process {repo.full_name}: {error}")
+    if error.output.strip():
+        print(error.output.strip())
+    run_journal.record(repo.full_name, journal.FAILED, reason=str(error))
+    timings.outcome = journal.FAILED
+
+
+def record_pull_request(run_journal, repo, result, timings):
+    """Record the outcome of create_pull_request in the run journal and timings."""
+    opened, detail = result
+    if opened:
+        run_journal.record(repo.full_name, journal.PR_OPENED, url=detail)
+        timings.outcome = journal.PR_OPENED
+    else:
+        run_journal.record(repo.full_name, journal.FAILED, reason=detail)
+        timings.outcome = journal.FAILED
 
 
 def create_pull_request(
@@ -126,38 +776,198 @@ def create_pull_request(
     repo_name,
     branch_name,
     default_branch,
+    limiter=None,
 ):
-    """Create a pull request."""
-    repository_object = github_connection.repository(organization, repo_name)
+    """
+    Create a pull request.
+
+    The pull request is created with a single POST to the pulls endpoint, as
+    the owner, name and default branch are already known from the inventory.
+    With a limiter, a POST refused by a rate limit waits for it to reset and
+    is tried again, up to RATE_LIMIT_RETRIES times.
+
+    Returns:
+        tuple[bool, str]: whether the pull request is open (newly created or
+        already existing) and its URL, or the reason it failed
+    """
+    session = github_connection.session
+    url = f"{session.base_url}/repos/{organization}/{repo_name}/pulls"
     try:
-        repository_object.create_pull(
-            title=pr_title,
-            body=pr_body,
-            head=branch_name,
-            base=default_branch,
+        pull_request = post_pull_request(
+            session,
+            url,
+            {
+                "title": pr_title,
+                "body": pr_body,
+                "head": branch_name,
+                "base": default_branch,
+            },
+            limiter,
+            lambda: find_pull_request(session, url, organization, branch_name),
         )
     except github3.exceptions.UnprocessableEntity:
+        # Refused because one is already open from the branch, or as invalid
+        try:
+            pull_request = find_pull_request(session, url, organization, branch_name)
+        except (github3.exceptions.GitHubError, requests.exceptions.RequestException):
+            pull_request = None
+        if pull_request is None:
+            print("Pull request failed")
+            return False, "Pull request failed"
         print("Pull request already exists")
     except github3.exceptions.ForbiddenError:
         print("Pull request failed")
+        return False, "Pull request failed"
     except github3.exceptions.NotFoundError:
         print("Pull request failed")
-    except github3.exceptions.ConnectionError:
+        return False, "Pull request failed"
+    except requests.exceptions.ConnectionError:
         print("Pull request failed")
+        return False, "Pull request failed"
     except Exception as e:  # pylint: disable=broad-exception-caught
         print(e)
+        return False, str(e)
+    return True, pull_request.get("html_url", "")
 
 
-def clone_repository(gh_actor, token, endpoint, repo):
-    """Clone the repository and return the name of the repository."""
-    repo_full_name = repo["full_name"]
-    repo_name = repo["name"]
-    try:
-        os.system(f"git clone https://{gh_actor}:{token}@{endpoint}/{repo_full_name}")
-    except OSError as e:
-        print(f"Failed to clone repository: {e}")
-        return None
-    return repo_name
+def find_pull_request(session, url, organization, branch_name):
+    """Return the open pull request from branch_name at the pulls url, or None."""
+    pulls = api_commit.api_request(
+        session,
+        "GET",
+        url,
+        200,
+        params={"head": f"{organization}:{branch_name}", "state": "open"},
+    )
+    return pulls[0] if pulls else None
+
+
+def post_pull_request(session, url, payload, limiter=None, find_existing=None):
+    """
+    POST a pull request, retrying while a rate limit refuses it.
+
+    The limiter has already seen the refused response through its session
+    hook, so acquire() waits until the limit resets. A 5xx is retried by
+    api_commit.api_post, with find_existing looking up the pull request an
+    answered attempt may have opened.
+
+    Raises:
+        github3.exceptions.GitHubError: if the pull request is refused for
+            another reason, or still rate limited after RATE_LIMIT_RETRIES
+    """
+    attempt = 0
+    while True:
+        try:
+            return api_commit.api_post(session, url, 201, find_existing, json=payload)
+        except github3.exceptions.GitHubError as e:
+            response = e.response
+            if (
+                limiter is None
+                or attempt == RATE_LIMIT_RETRIES
+                or not rate_limit.is_rate_limited(
+                    response.status_code, response.headers, response.text
+                )
+            ):
+                raise
+            attempt += 1
+            print("Pull request rate limited, retrying once the limit resets")
+            limiter.acquire()
+
+
+def clone_repository(
+    git, gh_actor, token, endpoint, repo, strategy="full", repo_dir=None
+):
+    """
+    Clone the repository into repo_dir, or a directory named after it, and return that directory.
+
+    The "shallow" strategy fetches only the tip commit of the default branch,
+    defers every blob and checks out just the files in the repository root,
+    so the transfer does not grow with the history or size of the repository.
+
+    Raises:
+        git_executor.GitCommandError: if the clone fails
+    """
+    git.run(
+        "clone",
+        *clone_args(endpoint, repo, strategy, repo_dir),
+        env=git_executor.auth_env(gh_actor, token),
+    )
+    repo_dir = repo_dir or repo.name
+    fetched = mirror_cache.directory_size(os.path.join(repo_dir, ".git"))
+    print(f"Cloned {repo.full_name} ({fetched} bytes fetched)")
+    return repo_dir
+
+
+def clone_args(endpoint, repo, strategy, repo_dir=None):
+    """Return the git arguments that clone a repository with a clone strategy into repo_dir."""
+    return [
+        "clone",
+        *clone_options(repo, strategy),
+        f"https://{endpoint}/{repo.full_name}",
+        *([repo_dir] if repo_dir else []),
+    ]
+
+
+def ls_tree_args(repo_dir, files):
+    """Return the git arguments that list which paths of the bundle the clone has."""
+    return [
+        "-C",
+        repo_dir,
+        "ls-tree",
+        "-r",
+        "--name-only",
+        "HEAD",
+        "--",
+        *bundle.check_paths(files),
+    ]
+
+
+def commit_steps(repo_dir, files):
+    """
+    Return the (stage, git arguments) that commit the files in a clone.
+
+    The files are added with --sparse, as those outside the root, such as
+    .github/SECURITY.md, are outside the cone of a shallow sparse clone.
+    """
+    return [
+        (
+            "add",
+            [
+                "-C",
+                repo_dir,
+                "add",
+                "--sparse",
+                "--",
+                *(bundle_file.path for bundle_file in files),
+            ],
+        ),
+        ("commit", ["-C", repo_dir, "commit", "-m", bundle.commit_message(files)]),
+    ]
+
+
+def push_args(repo_dir):
+    """
+    Return the git arguments that push the commit to BRANCH_NAME.
+
+    The commit is pushed from HEAD straight to the remote branch, so no local
+    branch has to be created first.
+    """
+    return ["-C", repo_dir, "push", "origin", f"HEAD:refs/heads/{BRANCH_NAME}"]
+
+
+def clone_options(repo, strategy):
+    """Return the extra git clone arguments for a clone strategy."""
+    if strategy == "shallow":
+        return [
+            "--depth",
+            "1",
+            "--filter=blob:none",
+            "--single-branch",
+            "--branch",
+            repo.default_branch,
+            "--sparse",
+        ]
+    return []
 
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""Work out which repositories a run would open pull requests in, and what it would cost."""
+
+import json
+import math
+import os
+
+import preflight
+
+# REST calls per repository: the pull request, plus the branch, tree, commit
+# and ref of the Git Data API in api mode
+API_CALLS_PER_REPOSITORY = {"git": 1, "api": 5}
+# Used when no earlier run has left a metrics.json to estimate from
+DEFAULT_REPOSITORY_SECONDS = {"git": 5.0, "api": 1.0}
+
+
+def previous_repository_seconds(metrics_dir: str) -> float | None:
+    """
+    Return the median time per repository of the last run, if it wrote a report.
+
+    Args:
+        metrics_dir (str): the METRICS_DIR of earlier runs, or ""
+
+    Returns:
+        float | None: the p50 of the repository stage in metrics.json
+    """
+    if not metrics_dir:
+        return None
+    try:
+        with open(
+            os.path.join(metrics_dir, "metrics.json"), "r", encoding="utf-8"
+        ) as report:
+            return float(json.load(report)["stages"]["repository"]["p50"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def estimate_seconds(
+    targets: int,
+    rate_limit_per_hour: float,
+    rate_limit_burst: int,
+    max_workers: int,
+    repository_seconds: float,
+) -> float:
+    """
+    Estimate how long a run over targets repositories takes.
+
+    The run is bound either by the rate limiter, which lets rate_limit_burst
+    repositories start at once and then paces the rest, or by the workers.
+
+    Returns:
+        float: the estimated runtime in seconds
+    """
+    paced = max(targets - rate_limit_burst, 0) * 3600 / rate_limit_per_hour
+    worked = math.ceil(targets / max_workers) * repository_seconds
+    return max(paced, worked)
+
+
+def print_plan(
+    targets,
+    candidates: int,
+    commit_mode: str,
+    rate_limit_per_hour: float,
+    rate_limit_burst: int,
+    max_workers: int,
+    metrics_dir: str,
+) -> None:
+    """
+    Print the repositories a run would open pull requests in, with its estimated cost.
+
+    Args:
+        targets (list[inventory.RepoRecord]): the repositories left after every check
+        candidates (int): the number of repositories that reached the pre-flight check
+        commit_mode (str): "git" or "api"
+        rate_limit_per_hour (float): RATE_LIMIT_PER_HOUR
+        rate_limit_burst (int): RATE_LIMIT_BURST
+        max_workers (int): MAX_WORKERS
+        metrics_dir (str): METRICS_DIR, to estimate from the last run
+    """
+    for repo in targets:
+        print(f"Would open a pull request in {repo.full_name}")
+    repository_seconds = previous_repository_seconds(metrics_dir)
+    source = "the last run"
+    if repository_seconds is None:
+        repository_seconds = DEFAULT_REPOSITORY_SECONDS[commit_mode]
+        source = "a default"
+    api_calls = len(targets) * API_CALLS_PER_REPOSITORY[commit_mode] + math.ceil(
+        candidates / preflight.BATCH_SIZE
+    )
+    seconds = estimate_seconds(
+        len(targets),
+        rate_limit_per_hour,
+        rate_limit_burst,
+        max_workers,
+        repository_seconds,
+    )
+    print(
+        f"Plan: {len(targets)} of {candidates} repositories need a pull request, "
+        f"about {api_calls} API calls and {seconds / 60:.0f} minutes "
+        f"({repository_seconds:.1f}s per repository from {source})"
+    )
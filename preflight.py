@@ -0,0 +1,270 @@
+"""Check many repositories at once with GraphQL before doing any per-repository work."""
+
+import itertools
+
+import requests
+
+CONTRIBUTING_PATHS = (
+    "CONTRIBUTING.md",
+    ".github/CONTRIBUTING.md",
+    "docs/CONTRIBUTING.md",
+)
+BATCH_SIZE = 100
+# The result of a repository the query did not answer for, which is processed
+# as if there were no pre-flight check
+UNCHECKED = object()
+
+
+def graphql_url(github_connection):
+    """
+    Return the GraphQL endpoint that matches the REST endpoint of the connection.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+
+    Returns:
+        str: the GraphQL endpoint URL
+    """
+    base_url = github_connection.session.base_url
+    if base_url.endswith("/api/v3"):
+        return base_url.removesuffix("/v3") + "/graphql"
+    return f"{base_url}/graphql"
+
+
+def build_query(count, paths, branch_name):
+    """
+    Build a query that checks count repositories passed as $o<i>/$n<i> variables.
+
+    Args:
+        count (int): the number of repositories in the batch
+        paths (Iterable[str]): the file paths to look for on the default branch
+        branch_name (str): the branch the action pushes to
+
+    Returns:
+        str: the GraphQL query
+    """
+    variables = ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(count))
+    files = " ".join(
+        f'f{index}: object(expression: "HEAD:{path}") {{ id }}'
+        for index, path in enumerate(paths)
+    )
+    fields = (
+        f"{files} "
+        f'ref(qualifiedName: "refs/heads/{branch_name}") {{ id }} '
+        f'pullRequests(headRefName: "{branch_name}", states: OPEN) {{ totalCount }}'
+    )
+    repositories = " ".join(
+        f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ {fields} }}"
+        for i in range(count)
+    )
+    return f"query({variables}) {{ {repositories} }}"
+
+
+def file_groups(files):
+    """
+    Return the paths that count as each file of a bundle.
+
+    Args:
+        files (list[bundle.BundleFile] | None): the bundle, or None for CONTRIBUTING.md alone
+
+    Returns:
+        list[tuple[str, ...]]: the paths of each file
+    """
+    if not files:
+        return [CONTRIBUTING_PATHS]
+    return [bundle_file.exists for bundle_file in files]
+
+
+def query_paths(groups):
+    """Return the distinct paths of groups, in the order they are queried."""
+    return list(dict.fromkeys(path for group in groups for path in group))
+
+
+def found_files(result, groups):
+    """
+    Return the first path of each group that the repository has, or None.
+
+    Args:
+        result (dict): the GraphQL result for one repository
+        groups (list[tuple[str, ...]]): the paths of each file
+
+    Returns:
+        list[str | None]: the path found for each group
+    """
+    existing = {
+        path
+        for index, path in enumerate(query_paths(groups))
+        if result.get(f"f{index}")
+    }
+    return [
+        next((path for path in group if path in existing), None) for group in groups
+    ]
+
+
+def skip_reason(result, groups=(CONTRIBUTING_PATHS,)):
+    """
+    Return why a repository does not need a pull request, or None if it does.
+
+    Args:
+        result (dict | None): the GraphQL result for one repository
+        groups (Sequence[tuple[str, ...]]): the paths of each file the pull request adds
+
+    Returns:
+        str | None: the reason to skip the repository
+    """
+    if result is None:
+        return "repository not found or not accessible"
+    found = found_files(result, groups)
+    if all(found):
+        return f"{', '.join(found)} already exist{'s' if len(found) == 1 else ''}"
+    if result["pullRequests"]["totalCount"]:
+        return "pull request already open"
+    return None
+
+
+def check_batch(github_connection, url, batch, branch_name, paths=CONTRIBUTING_PATHS):
+    """
+    Run one query for a batch of repositories.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        url (str): the GraphQL endpoint
+        batch (list[inventory.RepoRecord]): the repositories to check
+        branch_name (str): the branch the action pushes to
+        paths (Iterable[str]): the file paths to look for on the default branch
+
+    A repository whose result is null is only taken as missing when the
+    response says it was not found. Any other error leaves it UNCHECKED, and a
+    response without data fails the whole batch.
+
+    Returns:
+        list[dict | None | object] | None: the result for each repository, or None if the query failed
+    """
+    variables = {}
+    for i, repo in enumerate(batch):
+        variables[f"o{i}"], variables[f"n{i}"] = repo.full_name.split("/", 1)
+    query = build_query(len(batch), paths, branch_name)
+    try:
+        response = github_connection.session.post(
+            url, json={"query": query, "variables": variables}
+        )
+        response.raise_for_status()
+        body = response.json()
+        data = body.get("data")
+        errors = body.get("errors") or []
+        if not data:
+            raise ValueError(f"no data in the response: {errors}")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Pre-flight check failed, processing batch without it: {e}")
+        return None
+    not_found = {
+        error["path"][0]
+        for error in errors
+        if error.get("type") == "NOT_FOUND" and error.get("path")
+    }
+    results = []
+    for i, repo in enumerate(batch):
+        result = data.get(f"r{i}")
+        if result is None and errors and f"r{i}" not in not_found:
+            print(f"Pre-flight check failed for {repo.full_name}: {errors}")
+            result = UNCHECKED
+        results.append(result)
+    return results
+
+
+def evaluate(repo, result, branch_name, files=None):
+    """
+    Return why a repository can be skipped, or record which files it is missing.
+
+    Args:
+        repo (inventory.RepoRecord): the repository, whose missing field is set
+        result (dict | None): the GraphQL result for the repository
+        branch_name (str): the branch the action pushes to
+        files (list[bundle.BundleFile] | None): the bundle, or None for CONTRIBUTING.md alone
+
+    Returns:
+        str | None: the reason to skip the repository
+    """
+    groups = file_groups(files)
+    reason = skip_reason(result, groups)
+    if reason:
+        return reason
+    if files:
+        repo.missing = tuple(
+            bundle_file.path
+            for bundle_file, found in zip(files, found_files(result, groups))
+            if found is None
+        )
+    if result.get("ref"):
+        print(
+            f"{repo.full_name} already has a {branch_name} branch "
+            "without an open pull request"
+        )
+    return None
+
+
+def filter_repositories(
+    github_connection, repos, branch_name, batch_size=BATCH_SIZE, files=None
+):
+    """
+    Yield only the repositories that still need a pull request.
+
+    Repositories are checked batch_size at a time with a single GraphQL query
+    for every path of the bundle, the action's branch and open pull requests
+    from it. Repositories that have every file are skipped and the others are
+    given the paths they are missing. If a query fails, or does not answer
+    for a repository, those repositories are passed through unchanged.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        repos (Iterable[inventory.RepoRecord]): the candidate repositories
+        branch_name (str): the branch the action pushes to
+        batch_size (int): the number of repositories per query
+        files (list[bundle.BundleFile] | None): the bundle, or None for CONTRIBUTING.md alone
+
+    Yields:
+        inventory.RepoRecord: the repositories that need a pull request
+    """
+    url = graphql_url(github_connection)
+    paths = query_paths(file_groups(files))
+    repos = iter(repos)
+    while batch := list(itertools.islice(repos, batch_size)):
+        results = check_batch(github_connection, url, batch, branch_name, paths)
+        if results is None:
+            yield from batch
+            continue
+        for repo, result in zip(batch, results):
+            if result is UNCHECKED:
+                yield repo
+                continue
+            reason = evaluate(repo, result, branch_name, files)
+            if reason:
+                print(f"Skipping {repo.full_name}: {reason}")
+                continue
+            yield repo
+
+
+def check_repository(github_connection, repo, branch_name, files):
+    """
+    Check one repository that did not go through filter_repositories.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        repo (inventory.RepoRecord): the repository, whose missing field is set
+        branch_name (str): the branch the action pushes to
+        files (list[bundle.BundleFile]): the bundle
+
+    Returns:
+        str | None: the reason to skip the repository, or None if it could not be checked
+    """
+    results = check_batch(
+        github_connection,
+        graphql_url(github_connection),
+        [repo],
+        branch_name,
+        query_paths(file_groups(files)),
+    )
+    if results is None or results[0] is None or results[0] is UNCHECKED:
+        # Left to the commit, which reports the repository as failed
+        return None
+    return evaluate(repo, results[0], branch_name, files)
@@ -0,0 +1,187 @@
+"""Rate-limit aware pacing for the GitHub API calls made by the action."""
+
+import threading
+import time
+from typing import Callable
+
+# GitHub asks clients that hit a secondary rate limit without a Retry-After
+# header to wait at least one minute before retrying.
+SECONDARY_RATE_LIMIT_BACKOFF = 60
+
+# The REST API budget. GraphQL, search and other resources are counted
+# separately and name themselves in X-RateLimit-Resource.
+CORE_RESOURCE = "core"
+
+
+def is_rate_limited(status_code: int, headers, body: str = "") -> bool:
+    """
+    Return whether a response was refused because a primary or secondary rate limit was hit.
+
+    Args:
+        status_code (int): the HTTP status code of the response
+        headers (Mapping[str, str]): the response headers
+        body (str): the response body, which names secondary rate limits
+
+    Returns:
+        bool: whether the request can be retried once the limit resets
+    """
+    if status_code == 429:
+        return True
+    return status_code == 403 and (
+        headers.get("X-RateLimit-Remaining") == "0" or "rate limit" in body.lower()
+    )
+
+
+class RateLimiter:
+    # pylint: disable=too-many-instance-attributes
+    """
+    Token bucket that paces work and backs off when GitHub asks it to.
+
+    Tokens refill continuously at rate_per_hour and the bucket holds at most
+    burst tokens. Responses observed through the session hook can block the
+    bucket until the primary rate limit resets or a Retry-After expires.
+
+    Attributes:
+        rate_per_hour (float): The number of tokens added to the bucket per hour
+        burst (int): The maximum number of tokens the bucket can hold
+        remaining (int | None): The last X-RateLimit-Remaining value seen for the core resource
+        reset_at (float | None): The last X-RateLimit-Reset value seen for the core resource (epoch seconds)
+        blocked_until (float): Epoch time before which no tokens are handed out
+    """
+
+    def __init__(
+        self,
+        rate_per_hour: float,
+        burst: int,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate_per_hour <= 0 or burst <= 0:
+            raise ValueError("rate_per_hour and burst must be greater than 0")
+        self.rate_per_hour = rate_per_hour
+        self.burst = burst
+        self.remaining: int | None = None
+        self.reset_at: float | None = None
+        self.blocked_until = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(now - self._last_refill, 0.0)
+        self._tokens = min(
+            float(self.burst), self._tokens + elapsed * self.rate_per_hour / 3600
+        )
+        self._last_refill = now
+
+    def _try_acquire(self) -> float:
+        """Take a token and return 0, or return how long to wait before trying again."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            wait = self.blocked_until - now
+            if wait <= 0:
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return 0.0
+                wait = (1 - self._tokens) * 3600 / self.rate_per_hour
+            return wait
+
+    def wait_time(self) -> float:
+        """
+        Return how long acquire() would wait right now, without taking a token.
+
+        Returns:
+            float: the number of seconds until a token is available
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            wait = self.blocked_until - now
+            if wait <= 0:
+                wait = max(1 - self._tokens, 0.0) * 3600 / self.rate_per_hour
+            return wait
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available and take it.
+
+        Returns:
+            float: the number of seconds spent waiting
+        """
+        waited = 0.0
+        while wait := self._try_acquire():
+            self._sleep(wait)
+            waited += wait
+        return waited
+
+    async def acquire_async(self) -> float:
+        """
+        Wait on the event loop until a token is available and take it.
+
+        Returns:
+            float: the number of seconds spent waiting
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        waited = 0.0
+        while wait := self._try_acquire():
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+    def observe(self, status_code: int, headers, body: str = "") -> None:
+        """
+        Update the limiter from the status code and headers of an API response.
+
+        Only the core (REST) resource updates remaining and reset_at, so a
+        GraphQL response does not overwrite the REST budget. Any response
+        can still block the bucket with a Retry-After or a rate limit refusal.
+
+        Args:
+            status_code (int): the HTTP status code of the response
+            headers (Mapping[str, str]): the response headers
+            body (str): the response body, used to recognise secondary rate limits
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        retry_after = headers.get("Retry-After")
+        core = headers.get("X-RateLimit-Resource", CORE_RESOURCE) == CORE_RESOURCE
+
+        with self._lock:
+            now = self._clock()
+            if core and remaining is not None and remaining.isdigit():
+                self.remaining = int(remaining)
+            if core and reset is not None and reset.isdigit():
+                self.reset_at = float(reset)
+
+            if retry_after is not None and retry_after.isdigit():
+                self._block(now + int(retry_after))
+            elif self.remaining == 0 and self.reset_at is not None:
+                self._block(self.reset_at)
+            elif is_rate_limited(status_code, headers, body):
+                self._block(now + SECONDARY_RATE_LIMIT_BACKOFF)
+
+    def _block(self, until: float) -> None:
+        if until > self.blocked_until:
+            print(
+                f"Rate limited by GitHub, pausing for {until - self._clock():.0f} seconds"
+            )
+            self.blocked_until = until
+
+    def response_hook(self, response, *_args, **_kwargs):
+        """requests response hook that feeds every response into observe()."""
+        body = response.text if response.status_code in (403, 429) else ""
+        self.observe(response.status_code, response.headers, body)
+        return response
+
+    def attach(self, session) -> None:
+        """
+        Observe every response made through a requests (or github3) session.
+
+        Args:
+            session (requests.Session): the session to hook into
+        """
+        session.hooks["response"].append(self.response_hook)
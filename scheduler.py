@@ -0,0 +1,108 @@
+"""Order the repositories of a run by their expected cost, and route large ones away from git."""
+
+import os
+
+import metrics
+
+# Clone, checkout and push time per MB of repository, when no earlier run has timed it
+SECONDS_PER_MB = 0.2
+
+
+def load_history(metrics_dir: str) -> dict[str, float]:
+    """
+    Return how long each repository took in the last run that wrote a report.
+
+    Args:
+        metrics_dir (str): the METRICS_DIR of earlier runs, or ""
+
+    Returns:
+        dict[str, float]: the seconds of each repository by full name
+    """
+    if not metrics_dir:
+        return {}
+    try:
+        records = metrics.read_csv(os.path.join(metrics_dir, "metrics.csv"))
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {
+        record.full_name: record.seconds
+        for record in records
+        if record.outcome != "error"
+    }
+
+
+def expected_seconds(repo, history, base_seconds, api_size_kb=0) -> float:
+    """
+    Estimate how long a repository will take.
+
+    A repository timed by the last run is expected to take as long again.
+    Otherwise it takes base_seconds, plus the time to clone its size unless
+    it is routed to the API.
+
+    Args:
+        repo (inventory.RepoRecord): the repository
+        history (dict[str, float]): the seconds of each repository in the last run
+        base_seconds (float): the time of a repository of no size
+        api_size_kb (int): the size above which repositories are routed to the API, or 0
+
+    Returns:
+        float: the expected seconds
+    """
+    if repo.full_name in history:
+        return history[repo.full_name]
+    if routed_to_api(repo, api_size_kb):
+        return base_seconds
+    return base_seconds + repo.size / 1024 * SECONDS_PER_MB
+
+
+def longest_first(repos, history, base_seconds, api_size_kb=0):
+    """
+    Return the repositories with the longest expected first.
+
+    Handing the longest repository to the next free worker (LPT scheduling)
+    keeps a few large repositories from running on their own at the end of
+    the run, so the run finishes sooner with more than one worker. The
+    repositories are read into memory to be sorted; ties keep the inventory
+    order.
+
+    Args:
+        repos (Iterable[inventory.RepoRecord]): the repositories to order
+        history (dict[str, float]): the seconds of each repository in the last run
+        base_seconds (float): the time of a repository of no size
+        api_size_kb (int): the size above which repositories are routed to the API, or 0
+
+    Returns:
+        list[inventory.RepoRecord]: the repositories, longest first
+    """
+    return sorted(
+        repos,
+        key=lambda repo: expected_seconds(repo, history, base_seconds, api_size_kb),
+        reverse=True,
+    )
+
+
+def routed_to_api(repo, api_size_kb: int) -> bool:
+    """Return whether a repository is larger than api_size_kb, when it is set."""
+    return bool(api_size_kb) and repo.size > api_size_kb
+
+
+def route_by_size(git_worker, api_worker, api_size_kb: int):
+    """
+    Return a worker that commits large repositories through the API instead of a clone.
+
+    Args:
+        git_worker (Callable): the worker that clones and pushes
+        api_worker (Callable): the worker that commits with the Git Data API,
+            awaitable if git_worker is
+        api_size_kb (int): the size in KB above which a repository goes to api_worker
+
+    Returns:
+        Callable: a worker taking a repository and the keyword arguments of the workers
+    """
+
+    def worker(repo, **kwargs):
+        if routed_to_api(repo, api_size_kb):
+            return api_worker(repo, **kwargs)
+        return git_worker(repo, **kwargs)
+
+    return worker
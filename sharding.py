@@ -0,0 +1,42 @@
+"""Split the repositories of a run across several jobs, such as an Actions matrix."""
+
+import hashlib
+
+
+def shard_of(full_name: str, shard_count: int) -> int:
+    """
+    Return the shard a repository belongs to.
+
+    The shard is derived from a hash of the lower-cased full name, so a
+    repository always lands in the same shard, whichever runner computes it
+    and whatever order the inventory is in.
+
+    Args:
+        full_name (str): the owner/name of the repository
+        shard_count (int): the number of shards
+
+    Returns:
+        int: the shard index, from 0 to shard_count - 1
+    """
+    digest = hashlib.sha256(full_name.lower().encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def in_shard(repos, shard_index: int, shard_count: int):
+    """
+    Yield only the repositories assigned to shard_index.
+
+    Args:
+        repos (Iterable[inventory.RepoRecord]): the repositories of the whole run
+        shard_index (int): the shard this job processes
+        shard_count (int): the number of shards
+
+    Yields:
+        inventory.RepoRecord: the repositories of this shard
+    """
+    if shard_count == 1:
+        yield from repos
+        return
+    for repo in repos:
+        if shard_of(repo.full_name, shard_count) == shard_index:
+            yield repo
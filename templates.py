@@ -0,0 +1,97 @@
+"""Compile file templates once and render them for each repository in memory."""
+
+import re
+
+# The original placeholder, kept so existing templates render unchanged
+PROJECT_NAME = "Project-Name"
+VARIABLES = ("name", "full_name", "owner", "default_branch", "owners", "topics")
+# ${{ ... }} is a GitHub Actions expression, as in a workflow file the bundle
+# adds, and {{ a.b }} is not a variable of ours either: both are kept as is
+PLACEHOLDER = re.compile(r"(?<!\$)\{\{\s*(\w+)\s*\}\}|" + re.escape(PROJECT_NAME))
+
+
+class Template:
+    """
+    A template compiled once into a str.format string.
+
+    Templates may use {{ name }}, {{ full_name }}, {{ owner }},
+    {{ default_branch }}, {{ owners }} and {{ topics }}. Project-Name is
+    replaced with the repository name, as it always has been. GitHub
+    Actions expressions such as ${{ secrets.TOKEN }} and dotted names such
+    as {{ matrix.os }} are left for the workflow to expand.
+
+    Attributes:
+        source (str): The template text
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        parts = []
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            variable = match.group(1) or "name"
+            if variable not in VARIABLES:
+                raise ValueError(
+                    f"Unknown template variable {variable}, expected one of: "
+                    + ", ".join(VARIABLES)
+                )
+            start = match.start()
+            parts.append(escape_braces(source[position:start]))
+            parts.append(f"{{{variable}}}")
+            position = match.end()
+        parts.append(escape_braces(source[position:]))
+        self._format = "".join(parts).format_map
+
+    def render(self, repo) -> str:
+        """
+        Render the template for a repository.
+
+        Args:
+            repo (inventory.RepoRecord): the repository to render for
+
+        Returns:
+            str: the rendered text
+        """
+        return self._format(template_variables(repo))
+
+
+def escape_braces(text: str) -> str:
+    """Escape literal braces for str.format."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def template_variables(repo) -> dict[str, str]:
+    """
+    Return the values of the template variables for a repository.
+
+    Args:
+        repo (inventory.RepoRecord): the repository
+
+    Returns:
+        dict[str, str]: the text to substitute for each variable
+    """
+    return {
+        "name": repo.name,
+        "full_name": repo.full_name,
+        "owner": repo.full_name.split("/", 1)[0],
+        "default_branch": repo.default_branch,
+        "owners": ", ".join(f"@{owner}" for owner in repo.owners),
+        "topics": ", ".join(repo.topics),
+    }
+
+
+def load_template(path: str) -> Template:
+    """
+    Read and compile a template file.
+
+    Args:
+        path (str): the path of the template
+
+    Returns:
+        Template: the compiled template
+
+    Raises:
+        ValueError: if the template uses an unknown variable
+    """
+    with open(path, "r", encoding="utf-8") as template_file:
+        return Template(template_file.read())
@@ -0,0 +1,119 @@
+"""Test cases for the api_commit module, run against a local fake GitHub API."""
+
+import unittest
+from unittest.mock import patch
+
+import github3
+import http_session
+from api_commit import BranchExistsError, commit_files
+from fake_github import FakeGitHub
+
+
+class TestCommitFiles(unittest.TestCase):
+    """Test case for the commit_files function."""
+
+    def setUp(self):
+        self.server = FakeGitHub()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.repository = self.server.add_repository(
+            "test_org/test_repo", {"README.md": "hello\n"}
+        )
+        self.github_connection = github3.GitHubEnterprise(
+            url=self.server.url, token="test_token"
+        )
+
+    def test_commit_files_creates_branch(self):
+        """
+        Test that the new branch has one commit on top of the default branch
+        that adds the file and keeps the existing ones.
+        """
+        base_sha = self.repository.branches["main"]
+
+        sha = commit_files(
+            self.github_connection,
+            "test_org",
+            "test_repo",
+            "main",
+            "contributing-doc",
+            {"CONTRIBUTING.md": "# test_repo\n"},
+            "Add CONTRIBUTING.md",
+        )
+
+        self.assertEqual(self.repository.branches["contributing-doc"], sha)
+        self.assertEqual(self.repository.commits[sha]["parents"], [base_sha])
+        self.assertEqual(
+            self.repository.files("contributing-doc"),
+            {"README.md": "hello\n", "CONTRIBUTING.md": "# test_repo\n"},
+        )
+        self.assertEqual(self.repository.branches["main"], base_sha)
+        self.assertEqual(
+            [method for method, _ in self.server.requests],
+            ["GET", "POST", "POST", "POST"],
+        )
+
+    def test_commit_files_existing_branch(self):
+        """
+        Test that an existing branch raises BranchExistsError and is left untouched.
+        """
+        self.repository.branches["contributing-doc"] = "existing"
+
+        with self.assertRaises(BranchExistsError):
+            commit_files(
+                self.github_connection,
+                "test_org",
+                "test_repo",
+                "main",
+                "contributing-doc",
+                {"CONTRIBUTING.md": "# test_repo\n"},
+                "Add CONTRIBUTING.md",
+            )
+
+        self.assertEqual(self.repository.branches["contributing-doc"], "existing")
+
+    @patch("http_session.BACKOFF_FACTOR", 0)
+    def test_commit_files_retries_server_errors(self):
+        """
+        Test that a POST answered with a 5xx is retried, and a branch created by
+        the answered attempt is taken as created rather than as existing.
+        """
+        http_session.share_adapter(
+            self.github_connection.session, http_session.build_adapter(2, 3)
+        )
+        refs_path = "/api/v3/repos/test_org/test_repo/git/refs"
+        self.server.lost_responses[refs_path] = [502]
+
+        sha = commit_files(
+            self.github_connection,
+            "test_org",
+            "test_repo",
+            "main",
+            "contributing-doc",
+            {"CONTRIBUTING.md": "# test_repo\n"},
+            "Add CONTRIBUTING.md",
+        )
+
+        self.assertEqual(self.repository.branches["contributing-doc"], sha)
+        self.assertEqual(self.server.requests.count(("POST", refs_path)), 2)
+
+    def test_commit_files_missing_default_branch(self):
+        """
+        Test that a missing default branch raises NotFoundError before anything is written.
+        """
+        with self.assertRaises(github3.exceptions.NotFoundError):
+            commit_files(
+                self.github_connection,
+                "test_org",
+                "test_repo",
+                "does-not-exist",
+                "contributing-doc",
+                {"CONTRIBUTING.md": "# test_repo\n"},
+                "Add CONTRIBUTING.md",
+            )
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertNotIn("contributing-doc", self.repository.branches)
+
+
+if __name__ == "__main__":
+    unittest.main()
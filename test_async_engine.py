@@ -0,0 +1,103 @@
+"""Test cases for the async_engine module."""
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+from async_engine import in_thread, run, run_workers
+from inventory import RepoRecord
+
+
+class TestRunWorkers(unittest.TestCase):
+    """Test case for the run function."""
+
+    def test_bounded_concurrency(self):
+        """
+        Test that every repository is processed with at most max_workers in flight.
+        """
+        state = {"running": 0, "peak": 0, "done": []}
+        full = asyncio.Event()
+
+        async def worker(repo):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            if state["running"] == 8:
+                full.set()
+            # Every worker holds its slot until the pool has filled up once
+            await asyncio.wait_for(full.wait(), timeout=5)
+            state["running"] -= 1
+            state["done"].append(repo.name)
+
+        repos = [RepoRecord(f"repo{i}", f"org/repo{i}", "main") for i in range(50)]
+        run(worker, iter(repos), 8)
+
+        self.assertEqual(sorted(state["done"]), sorted(repo.name for repo in repos))
+        self.assertTrue(full.is_set())
+        self.assertLessEqual(state["peak"], 8)
+
+    def test_repositories_are_pulled_lazily(self):
+        """
+        Test that repositories are only read from the iterable when a worker is free.
+        """
+        pulled = []
+        release = asyncio.Event()
+
+        def repos():
+            for i in range(10):
+                pulled.append(i)
+                yield RepoRecord(f"repo{i}", f"org/repo{i}", "main")
+
+        async def worker(_repo):
+            if len(pulled) < 10:
+                await release.wait()
+
+        async def main():
+            task = asyncio.create_task(run_workers(worker, repos(), 2))
+            await asyncio.sleep(0.05)
+            self.assertEqual(len(pulled), 2)
+            release.set()
+            await task
+
+        asyncio.run(main())
+        self.assertEqual(len(pulled), 10)
+
+    def test_failures_are_reported(self):
+        """
+        Test that a failing repository is reported without stopping the others.
+        """
+        done = []
+
+        async def worker(repo):
+            if repo.name == "bad":
+                raise RuntimeError("boom")
+            done.append(repo.name)
+
+        repos = [
+            RepoRecord("bad", "org/bad", "main"),
+            RepoRecord("good", "org/good", "main"),
+        ]
+        with patch("builtins.print") as mock_print:
+            run(worker, repos, 2)
+
+        self.assertEqual(done, ["good"])
+        mock_print.assert_called_once_with("Failed to process org/bad: boom")
+
+    def test_in_thread(self):
+        """
+        Test that a blocking function wrapped by in_thread runs off the event loop thread.
+        """
+        threads = []
+
+        def blocking(value, scale=1):
+            threads.append(threading.get_ident())
+            return value * scale
+
+        result = asyncio.run(in_thread(blocking)(2, scale=3))
+
+        self.assertEqual(result, 6)
+        self.assertNotEqual(threads, [threading.get_ident()])
+
+
+if __name__ == "__main__":
+    unittest.main()
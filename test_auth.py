@@ -4,7 +4,9 @@ import unittest
 from unittest.mock import MagicMock, patch
 
 import auth
+import github3
 import requests
+from fake_github import FakeGitHub
 
 
 class TestAuth(unittest.TestCase):
@@ -129,5 +131,93 @@ class TestAuth(unittest.TestCase):
         )
 
 
+@patch(
+    "github3.apps.create_jwt_headers",
+    MagicMock(return_value={"Authorization": "Bearer jwt"}),
+)
+class TestInstallationTokenProvider(unittest.TestCase):
+    """
+    Test case for the InstallationTokenProvider class against a local access token endpoint.
+    """
+
+    def setUp(self):
+        self.now = 1_700_000_000.0
+        self.server = FakeGitHub()
+        self.server.clock = lambda: self.now
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.provider = auth.InstallationTokenProvider(
+            self.server.url, 1, b"private_key", 42, clock=lambda: self.now
+        )
+
+    def test_token_is_cached(self):
+        """
+        Test that repeated calls reuse the token until it nears expiry.
+        """
+        self.assertEqual(self.provider.token(), "ghs_42_1")
+        self.now += 3600 - auth.TOKEN_REFRESH_MARGIN - 1
+        self.assertEqual(self.provider.token(), "ghs_42_1")
+
+        self.assertEqual(self.server.installation_tokens, ["ghs_42_1"])
+        self.assertEqual(self.provider.expires_at, 1_700_003_600.0)
+
+    def test_token_is_refreshed_before_expiry(self):
+        """
+        Test that a new token is minted once less than the refresh margin remains.
+        """
+        self.provider.token()
+        self.now += 3600 - auth.TOKEN_REFRESH_MARGIN
+
+        self.assertEqual(self.provider.token(), "ghs_42_2")
+        self.assertEqual(self.provider.expires_at, self.now + 3600)
+
+    @patch("builtins.print")
+    def test_failed_refresh(self, mock_print):
+        """
+        Test that a failed refresh keeps the cached token while it is valid and
+        raises a ValueError once it has expired.
+        """
+        self.provider.token()
+        self.now += 3600 - 1
+        with patch("github3.apps.create_jwt_headers", MagicMock(return_value={})):
+            self.assertEqual(self.provider.token(), "ghs_42_1")
+            mock_print.assert_called_with(
+                "Unable to refresh the installation token, using the current one"
+            )
+
+            self.now += 1
+            with self.assertRaises(ValueError):
+                self.provider.token()
+
+    def test_token_auth(self):
+        """
+        Test that a github3 session using TokenAuth sends the current token.
+        """
+        self.server.add_repository("org/repo")
+        github_connection = github3.GitHubEnterprise(url=self.server.url)
+        github_connection.session.auth = auth.TokenAuth(self.provider)
+
+        github_connection.repository("org", "repo")
+        self.now += 3600
+        github_connection.repository("org", "repo")
+
+        self.assertEqual(
+            self.server.authorizations,
+            ["Bearer jwt", "token ghs_42_1", "Bearer jwt", "token ghs_42_2"],
+        )
+
+    def test_parse_timestamp(self):
+        """
+        Test converting a GitHub timestamp to a Unix timestamp.
+        """
+        self.assertEqual(auth.parse_timestamp("2024-01-01T00:00:00Z"), 1704067200.0)
+
+    def test_static_token(self):
+        """
+        Test that a static token is returned as is.
+        """
+        self.assertEqual(auth.StaticToken("token").token(), "token")
+
+
 if __name__ == "__main__":
     unittest.main()
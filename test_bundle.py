@@ -0,0 +1,198 @@
+"""Tests for the bundle module."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from bundle import (
+    CONTRIBUTING_COMMIT_MESSAGE,
+    BundleFile,
+    commit_message,
+    contributing_only,
+    default_bundle,
+    fingerprint,
+    for_repository,
+    load_bundle,
+    missing,
+    render,
+)
+from inventory import RepoRecord
+from preflight import CONTRIBUTING_PATHS
+from templates import Template
+
+REPO = RepoRecord("my-repo", "my-org/my-repo", "main")
+
+
+class TestBundle(unittest.TestCase):
+    """Test case for the bundle module."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def write(self, name, content):
+        """Write content to a file in the temporary directory and return its path."""
+        path = os.path.join(self.tmp, name)
+        with open(path, "w", encoding="utf-8") as output:
+            output.write(content)
+        return path
+
+    def test_default_bundle(self):
+        """
+        Test that without a bundle only CONTRIBUTING.md is added, under its usual message.
+        """
+        files = default_bundle(self.write("template.md", "# Project-Name\n"))
+
+        self.assertEqual(
+            [bundle_file.path for bundle_file in files], ["CONTRIBUTING.md"]
+        )
+        self.assertEqual(files[0].exists, CONTRIBUTING_PATHS)
+        self.assertTrue(contributing_only(files))
+        self.assertEqual(commit_message(files), CONTRIBUTING_COMMIT_MESSAGE)
+
+    def test_load_bundle(self):
+        """
+        Test that templates are read relative to the bundle and exists defaults to the path.
+        """
+        self.write("security.md", "Report issues in Project-Name privately\n")
+        path = self.write(
+            "bundle.json",
+            json.dumps(
+                {
+                    "files": [
+                        {
+                            "path": ".github/SECURITY.md",
+                            "template": "security.md",
+                            "exists": ["SECURITY.md", ".github/SECURITY.md"],
+                        },
+                        {"path": "CODEOWNERS", "template": "security.md"},
+                    ]
+                }
+            ),
+        )
+
+        files = load_bundle(path)
+
+        self.assertEqual(files[0].exists, ("SECURITY.md", ".github/SECURITY.md"))
+        self.assertEqual(files[1].exists, ("CODEOWNERS",))
+        self.assertFalse(contributing_only(files))
+        self.assertEqual(
+            render(files[:1], REPO),
+            {".github/SECURITY.md": "Report issues in my-repo privately\n"},
+        )
+        self.assertEqual(commit_message(files), "Add .github/SECURITY.md, CODEOWNERS")
+
+    def test_load_bundle_invalid(self):
+        """
+        Test that a bundle that is not a list of paths and templates is rejected.
+        """
+        for content in ("[]", '{"files": []}', '{"files": [{"path": "SECURITY.md"}]}'):
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    load_bundle(self.write("bundle.json", content))
+
+    def test_load_bundle_invalid_exists(self):
+        """
+        Test that exists must be a list of paths, not a single path or other values.
+        """
+        self.write("security.md", "Report issues privately\n")
+        for exists in (
+            "SECURITY.md",
+            ["SECURITY.md", 1],
+            [""],
+            {"path": "SECURITY.md"},
+        ):
+            with self.subTest(exists=exists):
+                path = self.write(
+                    "bundle.json",
+                    json.dumps(
+                        {
+                            "files": [
+                                {
+                                    "path": "SECURITY.md",
+                                    "template": "security.md",
+                                    "exists": exists,
+                                }
+                            ]
+                        }
+                    ),
+                )
+                with self.assertRaisesRegex(
+                    ValueError,
+                    "The exists of SECURITY.md in .* must be a list of paths",
+                ):
+                    load_bundle(path)
+
+    def test_fingerprint(self):
+        """
+        Test that the fingerprint changes with the paths and templates of the bundle only.
+        """
+        files = [BundleFile("SECURITY.md", Template("Report issues privately"))]
+
+        self.assertEqual(
+            fingerprint(files),
+            fingerprint(
+                [BundleFile("SECURITY.md", Template("Report issues privately"))]
+            ),
+        )
+        self.assertNotEqual(
+            fingerprint(files),
+            fingerprint(
+                [BundleFile("SECURITY.md", Template("Report issues by email"))]
+            ),
+        )
+        self.assertNotEqual(
+            fingerprint(files),
+            fingerprint(
+                [BundleFile(".github/SECURITY.md", Template("Report issues privately"))]
+            ),
+        )
+        self.assertNotEqual(
+            fingerprint(files),
+            fingerprint(files + [BundleFile("CODEOWNERS", Template(""))]),
+        )
+
+    def test_missing(self):
+        """
+        Test that a file is present if any of its paths, or a file under a directory, exists.
+        """
+        files = [
+            BundleFile(
+                "SECURITY.md", Template(""), ["SECURITY.md", ".github/SECURITY.md"]
+            ),
+            BundleFile(
+                ".github/ISSUE_TEMPLATE/bug.md",
+                Template(""),
+                [".github/ISSUE_TEMPLATE"],
+            ),
+            BundleFile("CODEOWNERS", Template("")),
+        ]
+
+        result = missing(
+            files, [".github/SECURITY.md", ".github/ISSUE_TEMPLATE/feature.md"]
+        )
+
+        self.assertEqual([bundle_file.path for bundle_file in result], ["CODEOWNERS"])
+
+    def test_for_repository(self):
+        """
+        Test that the files found missing by the pre-flight check are kept, or all of them.
+        """
+        files = [
+            BundleFile("SECURITY.md", Template("")),
+            BundleFile("CODEOWNERS", Template("")),
+        ]
+
+        self.assertEqual(for_repository(files, REPO), files)
+        self.assertEqual(
+            for_repository(
+                files, RepoRecord("a", "o/a", "main", missing=("CODEOWNERS",))
+            ),
+            files[1:],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
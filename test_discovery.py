@@ -0,0 +1,170 @@
+"""Tests for the discovery module."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import github3
+from discovery import PAGE_SIZE, build_query, cache_path, discover_repos, load_cache
+from fake_github import FakeGitHub
+from inventory import RepoRecord
+
+
+class TestDiscovery(unittest.TestCase):
+    """Test case for listing an organization against the local fake GraphQL endpoint."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        self.server = FakeGitHub()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.connection = github3.GitHubEnterprise(url=self.server.url, token="token")
+
+    def discover(self, organization="org", save=True):
+        """Discover the repositories of organization, without printing."""
+        with patch("builtins.print"):
+            return list(
+                discover_repos(self.connection, organization, self.cache_dir, save)
+            )
+
+    def test_build_query(self):
+        """
+        Test that a page asks for the flags, default branch and contributing files.
+        """
+        query = build_query(["CONTRIBUTING.md", "docs/CONTRIBUTING.md"])
+
+        self.assertIn(f"repositories(first: {PAGE_SIZE}, after: $cursor", query)
+        self.assertIn("isArchived isFork isEmpty pushedAt updatedAt diskUsage", query)
+        self.assertIn(
+            'f1: object(expression: "HEAD:docs/CONTRIBUTING.md") { id }', query
+        )
+
+    def test_discover_repos(self):
+        """
+        Test that every page is listed, flagged repositories are left out and guidelines found.
+        """
+        for i in range(PAGE_SIZE + 5):
+            self.server.add_repository(f"org/repo-{i:03}")
+        self.server.add_repository("org/done", files={"docs/CONTRIBUTING.md": "x"})
+        self.server.add_repository("org/old").archived = True
+        self.server.add_repository("org/copy").fork = True
+        self.server.add_repository("other/repo")
+
+        repos = self.discover()
+
+        self.assertEqual(self.server.requests, [("POST", "/api/graphql")] * 2)
+        self.assertEqual(len(repos), PAGE_SIZE + 6)
+        self.assertIn(
+            RepoRecord("done", "org/done", "main", "docs/CONTRIBUTING.md"), repos
+        )
+        self.assertIn(RepoRecord("repo-000", "org/repo-000", "main"), repos)
+        self.assertNotIn("org/old", [repo.full_name for repo in repos])
+        self.assertNotIn("org/copy", [repo.full_name for repo in repos])
+
+    def test_discover_repos_incremental(self):
+        """
+        Test that a later run only fetches the repositories updated since the last one.
+        """
+        for i in range(PAGE_SIZE * 2):
+            repository = self.server.add_repository(f"org/repo-{i:03}")
+            repository.updated_at = f"2023-01-01T00:{i // 60:02}:{i % 60:02}Z"
+        self.discover()
+        self.server.requests.clear()
+        pushed = self.server.repositories["org/repo-150"]
+        pushed.updated_at = "2024-02-01T00:00:00Z"
+        pushed.trees[pushed.commits[pushed.branches["main"]]["tree"]] = {
+            "CONTRIBUTING.md": "x"
+        }
+
+        repos = self.discover()
+
+        self.assertEqual(self.server.requests, [("POST", "/api/graphql")])
+        self.assertIn(
+            RepoRecord("repo-150", "org/repo-150", "main", "CONTRIBUTING.md"), repos
+        )
+        self.assertEqual(
+            load_cache(cache_path(self.cache_dir, "org"))["since"],
+            "2024-02-01T00:00:00Z",
+        )
+
+    def test_discover_repos_without_saving(self):
+        """
+        Test that a listing that is not saved still reads the cache but leaves it as it is.
+        """
+        self.server.add_repository("org/old").updated_at = "2023-01-01T00:00:00Z"
+        self.assertEqual(len(self.discover(save=False)), 1)
+        self.assertFalse(os.path.exists(cache_path(self.cache_dir, "org")))
+        self.discover()
+        with open(cache_path(self.cache_dir, "org"), "rb") as cache_file:
+            saved = cache_file.read()
+        self.server.add_repository("org/new").updated_at = "2024-01-01T00:00:00Z"
+        self.server.requests.clear()
+
+        repos = self.discover(save=False)
+
+        self.assertEqual(self.server.requests, [("POST", "/api/graphql")])
+        self.assertEqual(
+            sorted(repo.full_name for repo in repos), ["org/new", "org/old"]
+        )
+        with open(cache_path(self.cache_dir, "org"), "rb") as cache_file:
+            self.assertEqual(cache_file.read(), saved)
+
+    def test_discover_repos_archived_since(self):
+        """
+        Test that a repository archived since the last run, without a push, is left out.
+        """
+        self.server.add_repository("org/kept").updated_at = "2023-01-01T00:00:00Z"
+        self.server.add_repository("org/old").updated_at = "2023-01-01T00:00:00Z"
+        self.discover()
+        archived = self.server.repositories["org/old"]
+        archived.archived = True
+        archived.updated_at = "2024-01-01T00:00:00Z"
+
+        repos = self.discover()
+
+        self.assertEqual([repo.full_name for repo in repos], ["org/kept"])
+
+    def test_discover_repos_relists_after_rename(self):
+        """
+        Test that a repository renamed since the last run is only listed under its new name.
+        """
+        self.server.add_repository("org/kept").updated_at = "2023-01-01T00:00:00Z"
+        self.server.add_repository("org/old").updated_at = "2023-01-01T00:00:00Z"
+        self.discover()
+        renamed = self.server.repositories.pop("org/old")
+        renamed.name = "new"
+        renamed.updated_at = "2024-01-01T00:00:00Z"
+        self.server.repositories["org/new"] = renamed
+
+        repos = self.discover()
+
+        self.assertEqual(
+            sorted(repo.full_name for repo in repos), ["org/kept", "org/new"]
+        )
+
+    def test_discover_repos_relists_after_deletion(self):
+        """
+        Test that the whole organization is listed again when a repository disappeared.
+        """
+        self.server.add_repository("org/kept")
+        self.server.add_repository("org/deleted")
+        self.discover()
+        del self.server.repositories["org/deleted"]
+
+        repos = self.discover()
+
+        self.assertEqual([repo.full_name for repo in repos], ["org/kept"])
+
+    def test_discover_repos_unknown_organization(self):
+        """
+        Test that an organization that cannot be listed yields nothing and writes no cache.
+        """
+        self.assertEqual(self.discover("missing"), [])
+        self.assertFalse(os.path.exists(cache_path(self.cache_dir, "missing")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,19 @@ import string
 import unittest
 from unittest.mock import patch
 
-from env import MAX_BODY_LENGTH, MAX_TITLE_LENGTH, EnvVars, get_env_vars
+from env import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_HTTP_POOL_SIZE,
+    DEFAULT_HTTP_RETRIES,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_MIRROR_CACHE_MAX_MB,
+    DEFAULT_RATE_LIMIT_BURST,
+    DEFAULT_RATE_LIMIT_PER_HOUR,
+    MAX_BODY_LENGTH,
+    MAX_TITLE_LENGTH,
+    EnvVars,
+    get_env_vars,
+)
 
 BODY = "example CONTRIBUTING file contents"
 ORGANIZATION = "Organization01"
@@ -31,6 +43,33 @@ class TestEnv(unittest.TestCase):
             "PR_BODY",
             "PR_TITLE",
             "REPOS_JSON_LOCATION",
+            "RATE_LIMIT_PER_HOUR",
+            "RATE_LIMIT_BURST",
+            "MAX_WORKERS",
+            "COMMIT_MODE",
+            "CLONE_STRATEGY",
+            "PREFLIGHT",
+            "REPOS_JSON_SOURCE",
+            "CACHE_DIR",
+            "RESUME",
+            "HTTP_POOL_SIZE",
+            "HTTP_RETRIES",
+            "EXECUTION_MODE",
+            "MIRROR_CACHE",
+            "MIRROR_CACHE_MAX_MB",
+            "METRICS_DIR",
+            "OTEL_EXPORTER_OTLP_ENDPOINT",
+            "DRY_RUN",
+            "SHARD_COUNT",
+            "SHARD_INDEX",
+            "GH_APP_INSTALLATIONS",
+            "BUNDLE_PATH",
+            "TRACK_PULL_REQUESTS",
+            "SCHEDULE",
+            "API_MODE_ABOVE_MB",
+            "WORKSPACE_DIR",
+            "WORKSPACE_MAX_MB",
+            "WORKSPACE_TMPFS_MB",
         ]
         for key in env_keys:
             if key in os.environ:
@@ -65,6 +104,34 @@ class TestEnv(unittest.TestCase):
             BODY,
             TITLE,
             REPOS_JSON_LOCATION,
+            DEFAULT_RATE_LIMIT_PER_HOUR,
+            DEFAULT_RATE_LIMIT_BURST,
+            DEFAULT_MAX_WORKERS,
+            "git",
+            "full",
+            True,
+            "git",
+            DEFAULT_CACHE_DIR,
+            True,
+            DEFAULT_HTTP_POOL_SIZE,
+            DEFAULT_HTTP_RETRIES,
+            "threads",
+            False,
+            DEFAULT_MIRROR_CACHE_MAX_MB,
+            "",
+            "",
+            False,
+            1,
+            0,
+            [ORGANIZATION],
+            {},
+            "",
+            False,
+            "inventory",
+            0,
+            "",
+            0,
+            0,
         )
         result = get_env_vars(True)
         self.assertEqual(str(result), str(expected_result))
@@ -99,6 +166,34 @@ class TestEnv(unittest.TestCase):
             BODY,
             TITLE,
             REPOS_JSON_LOCATION,
+            DEFAULT_RATE_LIMIT_PER_HOUR,
+            DEFAULT_RATE_LIMIT_BURST,
+            DEFAULT_MAX_WORKERS,
+            "git",
+            "full",
+            True,
+            "git",
+            DEFAULT_CACHE_DIR,
+            True,
+            DEFAULT_HTTP_POOL_SIZE,
+            DEFAULT_HTTP_RETRIES,
+            "threads",
+            False,
+            DEFAULT_MIRROR_CACHE_MAX_MB,
+            "",
+            "",
+            False,
+            1,
+            0,
+            [ORGANIZATION],
+            {},
+            "",
+            False,
+            "inventory",
+            0,
+            "",
+            0,
+            0,
         )
         result = get_env_vars(True)
         self.assertEqual(str(result), str(expected_result))
@@ -117,6 +212,32 @@ class TestEnv(unittest.TestCase):
             "PR_BODY": BODY,
             "PR_TITLE": TITLE,
             "REPOS_JSON_LOCATION": "test/repos.json",
+            "RATE_LIMIT_PER_HOUR": "80",
+            "RATE_LIMIT_BURST": "5",
+            "MAX_WORKERS": "8",
+            "COMMIT_MODE": "API",
+            "CLONE_STRATEGY": "shallow",
+            "PREFLIGHT": "false",
+            "REPOS_JSON_SOURCE": "api",
+            "CACHE_DIR": "/tmp/cache",
+            "RESUME": "false",
+            "HTTP_POOL_SIZE": "32",
+            "HTTP_RETRIES": "0",
+            "EXECUTION_MODE": "Async",
+            "MIRROR_CACHE": "true",
+            "MIRROR_CACHE_MAX_MB": "512",
+            "METRICS_DIR": "/tmp/metrics",
+            "OTEL_EXPORTER_OTLP_ENDPOINT": "http://localhost:4318",
+            "DRY_RUN": "true",
+            "SHARD_COUNT": "4",
+            "SHARD_INDEX": "3",
+            "BUNDLE_PATH": "/action/workspace/bundle.json",
+            "TRACK_PULL_REQUESTS": "true",
+            "SCHEDULE": "Longest-First",
+            "API_MODE_ABOVE_MB": "500",
+            "WORKSPACE_DIR": "/mnt/work",
+            "WORKSPACE_MAX_MB": "2048",
+            "WORKSPACE_TMPFS_MB": "256",
         },
     )
     def test_get_env_vars_optional_values(self):
@@ -133,6 +254,34 @@ class TestEnv(unittest.TestCase):
             BODY,
             TITLE,
             "test/repos.json",
+            80,
+            5,
+            8,
+            "api",
+            "shallow",
+            False,
+            "api",
+            "/tmp/cache",
+            False,
+            32,
+            0,
+            "async",
+            True,
+            512,
+            "/tmp/metrics",
+            "http://localhost:4318",
+            True,
+            4,
+            3,
+            [ORGANIZATION],
+            {},
+            "/action/workspace/bundle.json",
+            True,
+            "longest-first",
+            500,
+            "/mnt/work",
+            2048,
+            256,
         )
         result = get_env_vars(True)
         self.assertEqual(str(result), str(expected_result))
@@ -245,6 +394,161 @@ class TestEnv(unittest.TestCase):
             f"BODY environment variable is too long. Max {MAX_BODY_LENGTH} characters",
         )
 
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "my_organization",
+            "GH_TOKEN": "test",
+            "RATE_LIMIT_PER_HOUR": "0",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_rate_limit_too_low(self):
+        """Test that an error is raised when RATE_LIMIT_PER_HOUR is less than 1"""
+        with self.assertRaises(ValueError) as context_manager:
+            get_env_vars(True)
+        the_exception = context_manager.exception
+        self.assertEqual(
+            str(the_exception),
+            "RATE_LIMIT_PER_HOUR environment variable must be at least 1",
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "my_organization",
+            "GH_TOKEN": "test",
+            "COMMIT_MODE": "svn",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_invalid_commit_mode(self):
+        """Test that an error is raised when COMMIT_MODE is not a known mode"""
+        with self.assertRaises(ValueError) as context_manager:
+            get_env_vars(True)
+        the_exception = context_manager.exception
+        self.assertEqual(
+            str(the_exception),
+            "COMMIT_MODE environment variable must be one of: git, api",
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "my_organization",
+            "GH_TOKEN": "test",
+            "SCHEDULE": "random",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_invalid_schedule(self):
+        """Test that an error is raised when SCHEDULE is not a known schedule"""
+        with self.assertRaises(ValueError) as context_manager:
+            get_env_vars(True)
+        the_exception = context_manager.exception
+        self.assertEqual(
+            str(the_exception),
+            "SCHEDULE environment variable must be one of: inventory, longest-first",
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "my_organization",
+            "GH_TOKEN": "test",
+            "WORKSPACE_MAX_MB": "-1",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_negative_workspace_max_mb(self):
+        """Test that an error is raised when WORKSPACE_MAX_MB is negative"""
+        with self.assertRaises(ValueError) as context_manager:
+            get_env_vars(True)
+        the_exception = context_manager.exception
+        self.assertEqual(
+            str(the_exception),
+            "WORKSPACE_MAX_MB environment variable must be at least 0",
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "my_organization",
+            "GH_TOKEN": "test",
+            "SHARD_COUNT": "4",
+            "SHARD_INDEX": "4",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_shard_index_out_of_range(self):
+        """Test that an error is raised when SHARD_INDEX is not below SHARD_COUNT"""
+        with self.assertRaises(ValueError) as context_manager:
+            get_env_vars(True)
+        the_exception = context_manager.exception
+        self.assertEqual(
+            str(the_exception),
+            "SHARD_INDEX environment variable must be between 0 and SHARD_COUNT - 1",
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "GH_APP_ID": "12345",
+            "GH_APP_PRIVATE_KEY": "private_key",
+            "GH_APP_INSTALLATIONS": "Org-A:111, org-b:222\norg-c:333",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_app_installations(self):
+        """Test that every organization of GH_APP_INSTALLATIONS is used"""
+        result = get_env_vars(True)
+
+        self.assertEqual(result.organizations, ["org-a", "org-b", "org-c"])
+        self.assertEqual(
+            result.gh_app_installations, {"org-a": 111, "org-b": 222, "org-c": 333}
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "org-a,org-b",
+            "GH_APP_ID": "12345",
+            "GH_APP_PRIVATE_KEY": "private_key",
+            "GH_APP_INSTALLATIONS": "org-a:111",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_organization_without_installation(self):
+        """Test that an error is raised when an organization has no installation"""
+        with self.assertRaises(ValueError) as context_manager:
+            get_env_vars(True)
+        the_exception = context_manager.exception
+        self.assertEqual(
+            str(the_exception),
+            "GH_APP_INSTALLATIONS has no installation for the org-b organization",
+        )
+
+    @patch.dict(
+        os.environ,
+        {
+            "ORGANIZATION": "org-a",
+            "GH_APP_ID": "12345",
+            "GH_APP_PRIVATE_KEY": "private_key",
+            "GH_APP_INSTALLATIONS": "org-a=111",
+        },
+        clear=True,
+    )
+    def test_get_env_vars_invalid_app_installations(self):
+        """Test that an error is raised when GH_APP_INSTALLATIONS cannot be parsed"""
+        with self.assertRaises(ValueError) as context_manager:
+            get_env_vars(True)
+        the_exception = context_manager.exception
+        self.assertEqual(
+            str(the_exception),
+            "GH_APP_INSTALLATIONS environment variable must be a list of "
+            "organization:installation_id pairs",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,133 @@
+"""Test cases for the git_executor module."""
+
+import asyncio
+import base64
+import unittest
+from unittest.mock import patch
+
+from git_executor import GitCommandError, GitExecutor, auth_env, identity_env
+
+
+class TestGitExecutor(unittest.TestCase):
+    """Test case for the GitExecutor class."""
+
+    def test_run(self):
+        """
+        Test that the output is returned and the stage timed.
+        """
+        git = GitExecutor()
+
+        output = git.run("version", "--version")
+
+        self.assertTrue(output.startswith("git version"))
+        self.assertEqual([stage for stage, _ in git.timings], ["version"])
+        self.assertRegex(git.summary(), r"^version \d+\.\d\ds$")
+
+    def test_run_failure(self):
+        """
+        Test that a non-zero exit code raises GitCommandError with the output.
+        """
+        git = GitExecutor()
+
+        with self.assertRaises(GitCommandError) as context_manager:
+            git.run("bogus", "not-a-git-command")
+
+        error = context_manager.exception
+        self.assertEqual(str(error), "bogus failed with exit code 1")
+        self.assertEqual(error.returncode, 1)
+        self.assertIn("not-a-git-command", error.output)
+        self.assertEqual(len(git.timings), 1)
+
+    def test_arguments_are_not_interpreted_by_a_shell(self):
+        """
+        Test that arguments reach git as they are.
+        """
+        git = GitExecutor()
+
+        output = git.run(
+            "check", "check-ref-format", "--normalize", "--allow-onelevel", "a$HOME;b"
+        )
+
+        self.assertEqual(output.strip(), "a$HOME;b")
+
+    def test_identity_env(self):
+        """
+        Test that the identity is passed to git without any git config.
+        """
+        git = GitExecutor(identity_env("GitHub Actions", "no-reply@github.com"))
+
+        output = git.run("ident", "var", "GIT_COMMITTER_IDENT")
+
+        self.assertTrue(output.startswith("GitHub Actions <no-reply@github.com>"))
+
+    def test_auth_env(self):
+        """
+        Test that the token reaches git as an HTTP header for a single stage.
+        """
+        git = GitExecutor()
+
+        header = git.run(
+            "config",
+            "config",
+            "--get",
+            "http.extraHeader",
+            env=auth_env("actor", "t0k"),
+        )
+
+        credentials = base64.b64encode(b"actor:t0k").decode()
+        self.assertEqual(header.strip(), f"Authorization: Basic {credentials}")
+        with self.assertRaises(GitCommandError):
+            git.run("config", "config", "--get", "http.extraHeader")
+
+    def test_terminal_prompt_is_disabled(self):
+        """
+        Test that git never waits for credentials on a terminal.
+        """
+        self.assertEqual(GitExecutor().env["GIT_TERMINAL_PROMPT"], "0")
+
+    def test_run_async(self):
+        """
+        Test that run_async behaves like run.
+        """
+        git = GitExecutor()
+
+        output = asyncio.run(git.run_async("version", "--version"))
+
+        self.assertTrue(output.startswith("git version"))
+        with self.assertRaises(GitCommandError):
+            asyncio.run(git.run_async("bogus", "not-a-git-command"))
+        self.assertEqual([stage for stage, _ in git.timings], ["version", "bogus"])
+
+    def test_shared_timings(self):
+        """
+        Test that stages are appended to a timings list owned by the caller.
+        """
+        timings = [("rate_limit_wait", 0.0)]
+        git = GitExecutor(timings=timings)
+
+        git.run("version", "--version")
+
+        self.assertEqual(
+            [stage for stage, _ in timings], ["rate_limit_wait", "version"]
+        )
+
+    @patch("subprocess.run")
+    def test_token_is_not_in_argv(self, mock_run):
+        """
+        Test that the command line carries no credentials.
+        """
+        mock_run.return_value.returncode = 0
+        mock_run.return_value.stdout = b""
+        git = GitExecutor()
+
+        git.run(
+            "clone", "clone", "https://github.com/org/repo", env=auth_env("a", "t0k")
+        )
+
+        argv = mock_run.call_args.args[0]
+        self.assertEqual(argv, ["git", "clone", "https://github.com/org/repo"])
+        self.assertNotIn("t0k", " ".join(argv))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Test cases for the http_session module."""
+
+import unittest
+from unittest.mock import patch
+
+import github3
+import http_session
+import requests
+from fake_github import FakeGitHub
+
+
+@patch("http_session.BACKOFF_FACTOR", 0)
+@patch("http_session.BACKOFF_JITTER", 0)
+class TestHttpSession(unittest.TestCase):
+    """Test case for the http_session module against a local server."""
+
+    def setUp(self):
+        self.server = FakeGitHub()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.server.add_repository("org/repo")
+        self.url = f"{self.server.url}/api/v3/repos/org/repo"
+
+    def test_retries_server_errors(self):
+        """
+        Test that 5xx responses are retried until the request succeeds.
+        """
+        session = http_session.new_session(http_session.build_adapter(2, 3))
+        self.server.failures = [502, 503]
+
+        response = session.get(self.url, timeout=http_session.TIMEOUT)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retries_are_bounded(self):
+        """
+        Test that the last error response is returned once the retries run out.
+        """
+        session = http_session.new_session(http_session.build_adapter(2, 1))
+        self.server.failures = [500, 500, 500]
+
+        response = session.get(self.url, timeout=http_session.TIMEOUT)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_posts_are_not_retried(self):
+        """
+        Test that a POST answered with a 5xx is returned without a retry, as it may have been applied.
+        """
+        session = http_session.new_session(http_session.build_adapter(2, 3))
+        self.server.failures = [502]
+
+        response = session.post(f"{self.url}/pulls", timeout=http_session.TIMEOUT)
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_client_errors_are_not_retried(self):
+        """
+        Test that a 4xx response is returned without a retry.
+        """
+        session = http_session.new_session(http_session.build_adapter(2, 3))
+        self.server.failures = [404]
+
+        response = session.get(self.url, timeout=http_session.TIMEOUT)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_share_adapter(self):
+        """
+        Test that a github3 session and a plain session share one pool and
+        that the github3 session gets the default timeouts.
+        """
+        adapter = http_session.build_adapter(4, 3)
+        github_connection = github3.GitHubEnterprise(url=self.server.url, token="t")
+
+        http_session.share_adapter(github_connection.session, adapter)
+        session = http_session.new_session(adapter)
+
+        self.assertIs(github_connection.session.get_adapter(self.url), adapter)
+        self.assertIs(session.get_adapter("https://api.github.com"), adapter)
+        self.assertEqual(github_connection.session.timeout, http_session.TIMEOUT)
+        self.assertIsNotNone(github_connection.repository("org", "repo"))
+
+    def test_retry_jitter(self):
+        """
+        Test that retries are spread out with random jitter.
+        """
+        with patch("http_session.BACKOFF_JITTER", 0.5):
+            adapter = http_session.build_adapter(2, 3)
+
+        self.assertEqual(adapter.max_retries.backoff_jitter, 0.5)
+        self.assertEqual(adapter.max_retries.total, 3)
+
+    def test_connection_errors_are_retried(self):
+        """
+        Test that a refused connection is retried and then raised.
+        """
+        session = http_session.new_session(http_session.build_adapter(2, 2))
+        self.server.stop()
+
+        with patch("urllib3.util.retry.Retry.sleep") as mock_sleep:
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                session.get(self.url, timeout=http_session.TIMEOUT)
+
+        self.assertEqual(mock_sleep.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""Tests for the installations module."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import installations
+from auth import InstallationTokenProvider, StaticToken
+from installations import Installation, budget, dispatch, interleave, owned_by
+from inventory import RepoRecord
+
+
+def record(full_name):
+    """Return a repository record for full_name."""
+    return RepoRecord(full_name.split("/")[1], full_name, "main")
+
+
+def installation(organization, wait=0.0, rate_per_hour=500, burst=10):
+    """Return an installation whose limiter reports a fixed wait."""
+    limiter = MagicMock()
+    limiter.wait_time.return_value = wait
+    limiter.rate_per_hour = rate_per_hour
+    limiter.burst = burst
+    return Installation(organization, MagicMock(), MagicMock(), limiter)
+
+
+def env_vars(organizations, gh_token=None, gh_app_installations=None):
+    """Return the configuration fields that connect() reads."""
+    config = MagicMock()
+    config.organizations = organizations
+    config.gh_token = gh_token
+    config.gh_app_id = None if gh_token else 12345
+    config.gh_app_installation_id = None
+    config.gh_app_installations = gh_app_installations or {}
+    config.gh_app_private_key_bytes = b"" if gh_token else b"private_key"
+    config.gh_enterprise_url = ""
+    config.gh_app_enterprise_only = False
+    config.rate_limit_per_hour = 500
+    config.rate_limit_burst = 10
+    return config
+
+
+class TestConnect(unittest.TestCase):
+    """Test case for the connect function."""
+
+    @patch("installations.auth.auth_to_github")
+    def test_connect_once_per_installation(self, mock_auth):
+        """
+        Test that organizations of one installation share its client, token and limiter.
+        """
+        mock_auth.side_effect = lambda *args: MagicMock(
+            session=MagicMock(hooks={"response": []})
+        )
+
+        result = installations.connect(
+            env_vars(
+                ["org-a", "Org-B", "org-c"],
+                gh_app_installations={"org-a": 1, "org-b": 2, "org-c": 1},
+            ),
+            MagicMock(),
+            MagicMock(),
+        )
+
+        self.assertEqual(mock_auth.call_count, 2)
+        self.assertEqual(
+            [item.organization for item in result], ["org-a", "Org-B", "org-c"]
+        )
+        self.assertIs(result[0].github_connection, result[2].github_connection)
+        self.assertIs(result[0].limiter, result[2].limiter)
+        self.assertIsNot(result[0].limiter, result[1].limiter)
+        self.assertIsInstance(result[1].token_provider, InstallationTokenProvider)
+        self.assertEqual(result[1].token_provider.gh_app_installation_id, 2)
+
+    @patch("installations.auth.auth_to_github")
+    def test_connect_with_token(self, mock_auth):
+        """
+        Test that every organization shares the client of a personal access token.
+        """
+        mock_auth.return_value = MagicMock(session=MagicMock(hooks={"response": []}))
+
+        result = installations.connect(
+            env_vars(["org-a", "org-b"], gh_token="token"),
+            MagicMock(),
+            MagicMock(),
+            shard_count=2,
+        )
+
+        mock_auth.assert_called_once()
+        self.assertIs(result[0].limiter, result[1].limiter)
+        self.assertEqual(result[0].limiter.rate_per_hour, 250)
+        self.assertIsInstance(result[0].token_provider, StaticToken)
+
+
+class TestInstallations(unittest.TestCase):
+    """Test case for routing and scheduling repositories between installations."""
+
+    def test_owned_by(self):
+        """
+        Test that only the repositories of the organization are kept, ignoring case.
+        """
+        repos = [record("Org-A/one"), record("org-b/two"), record("org-a/three")]
+
+        self.assertEqual(
+            [repo.name for repo in owned_by(repos, "org-a")], ["one", "three"]
+        )
+
+    def test_dispatch(self):
+        """
+        Test that each repository goes to the worker of its organization.
+        """
+        workers = {"org-a": MagicMock(), "org-b": MagicMock()}
+        repo = record("Org-B/repo")
+
+        dispatch(workers)(repo, timings="timings")
+
+        workers["org-b"].assert_called_once_with(repo, timings="timings")
+        workers["org-a"].assert_not_called()
+
+    def test_dispatch_single_organization(self):
+        """
+        Test that a single organization gets every repository, whatever its owner.
+        """
+        worker = MagicMock()
+
+        self.assertIs(dispatch({"org-a": worker}), worker)
+
+    def test_budget(self):
+        """
+        Test that installations sharing a limiter are counted once.
+        """
+        first = installation("org-a")
+        shared = Installation("org-b", None, None, first.limiter)
+
+        self.assertEqual(
+            budget([first, shared, installation("org-c", rate_per_hour=100)]),
+            (600, 20),
+        )
+
+    def test_interleave_round_robin(self):
+        """
+        Test that installations with budget take turns until each runs out.
+        """
+        streams = [
+            (installation("org-a"), [record("org-a/1"), record("org-a/2")]),
+            (installation("org-b"), [record("org-b/1")]),
+            (installation("org-c"), [record("org-c/1"), record("org-c/2")]),
+        ]
+
+        self.assertEqual(
+            [repo.full_name for repo in interleave(streams)],
+            ["org-a/1", "org-b/1", "org-c/1", "org-a/2", "org-c/2"],
+        )
+
+    def test_interleave_skips_waiting_installation(self):
+        """
+        Test that an installation that is rate limited is passed over while others have budget.
+        """
+        limited = installation("org-a", wait=60.0)
+        streams = [
+            (limited, [record("org-a/1")]),
+            (installation("org-b"), [record("org-b/1"), record("org-b/2")]),
+        ]
+
+        self.assertEqual(
+            [repo.full_name for repo in interleave(streams)],
+            ["org-b/1", "org-b/2", "org-a/1"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+"""Test cases for the inventory module."""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import github3
+import requests
+from fake_github import FakeGitHub
+from inventory import (
+    RepoRecord,
+    fetch_repos_json,
+    iter_json_values,
+    read_repos,
+    split_repos_json_location,
+)
+
+REPOS = [
+    {
+        "name": "repo1",
+        "full_name": "org/repo1",
+        "default_branch": "main",
+        "description": "a } tricky ] description, with [brackets]",
+        "topics": ["python", "innersource"],
+        "size": 2048,
+        "_InnerSourceMetadata": {
+            "guidelines": "CONTRIBUTING.md",
+            "maintainers": ["octocat"],
+            "logo": "x" * 500,
+        },
+    },
+    {
+        "name": "repo2",
+        "full_name": "org/repo2",
+        "default_branch": "trunk",
+        "_InnerSourceMetadata": {},
+    },
+    {"name": "repo3", "full_name": "org/repo3", "default_branch": "main"},
+]
+
+RECORDS = [
+    RepoRecord(
+        "repo1",
+        "org/repo1",
+        "main",
+        "CONTRIBUTING.md",
+        ("octocat",),
+        ("python", "innersource"),
+        2048,
+    ),
+    RepoRecord("repo2", "org/repo2", "trunk"),
+    RepoRecord("repo3", "org/repo3", "main"),
+]
+
+
+class ReadCounter(io.StringIO):
+    """A StringIO that records how many times it was read."""
+
+    reads = 0
+
+    def read(self, size=-1, /):
+        self.reads += 1
+        return super().read(size)
+
+
+class TestIterJsonValues(unittest.TestCase):
+    """Test case for the iter_json_values function."""
+
+    def test_array_across_small_chunks(self):
+        """
+        Test that values split across many chunks are decoded correctly.
+        """
+        text = json.dumps(REPOS, indent=2)
+        for chunk_size in (1, 7, 64, len(text) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                values = list(iter_json_values(io.StringIO(text), chunk_size))
+                self.assertEqual(values, REPOS)
+
+    def test_json_lines(self):
+        """
+        Test that JSON Lines input yields one value per line.
+        """
+        text = "\n".join(json.dumps(repo) for repo in REPOS) + "\n"
+        self.assertEqual(list(iter_json_values(io.StringIO(text), 16)), REPOS)
+
+    def test_empty_inputs(self):
+        """
+        Test that an empty file or an empty array yields nothing.
+        """
+        self.assertEqual(list(iter_json_values(io.StringIO(""))), [])
+        self.assertEqual(list(iter_json_values(io.StringIO(" [ ] "))), [])
+
+    def test_streams_before_end_of_input(self):
+        """
+        Test that the first value is produced before the whole input is read.
+        """
+        text = json.dumps([{"n": i} for i in range(1000)])
+        stream = ReadCounter(text)
+
+        values = iter_json_values(stream, 64)
+        self.assertEqual(next(values), {"n": 0})
+
+        self.assertLess(stream.reads, 3)
+
+    def test_invalid_json(self):
+        """
+        Test that a truncated file raises JSONDecodeError.
+        """
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_values(io.StringIO('[{"name": "repo1"'), 4))
+
+
+class TestReadRepos(unittest.TestCase):
+    """Test case for the read_repos function."""
+
+    def test_read_repos(self):
+        """
+        Test that records only keep the fields the action uses.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "repos.json")
+            with open(path, "w", encoding="utf-8") as repos_file:
+                json.dump(REPOS, repos_file)
+
+            records = list(read_repos(path))
+
+        self.assertEqual(records, RECORDS)
+        self.assertFalse(hasattr(records[0], "__dict__"))
+        self.assertEqual(
+            repr(records[0]),
+            "RepoRecord(repo1,org/repo1,main,CONTRIBUTING.md,"
+            "('octocat',),('python', 'innersource'))",
+        )
+
+
+class TestFetchReposJson(unittest.TestCase):
+    """Test case for fetching the inventory through the contents API."""
+
+    def setUp(self):
+        self.server = FakeGitHub()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.repository = self.server.add_repository(
+            "org/inventory", {"data/repos.json": json.dumps(REPOS)}
+        )
+        self.github_connection = github3.GitHubEnterprise(
+            url=self.server.url, token="test_token"
+        )
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def fetch(self, location="org/inventory/data/repos.json", download_dir=None):
+        """Fetch the inventory into the test cache directory."""
+        return fetch_repos_json(
+            self.github_connection, location, self.cache_dir, download_dir
+        )
+
+    def test_split_repos_json_location(self):
+        """
+        Test parsing owner/repo[/path] locations.
+        """
+        self.assertEqual(
+            split_repos_json_location("org/inventory/data/repos.json"),
+            ("org", "inventory", "data/repos.json"),
+        )
+        self.assertEqual(
+            split_repos_json_location("org/inventory"),
+            ("org", "inventory", "repos.json"),
+        )
+        with self.assertRaises(ValueError):
+            split_repos_json_location("repos.json")
+
+    def test_fetch_then_reuse_cache(self):
+        """
+        Test that the second fetch is a conditional request served from the cache.
+        """
+        path = self.fetch()
+        self.assertEqual(list(read_repos(path)), RECORDS)
+
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(self.fetch(), path)
+
+        mock_print.assert_called_once_with(
+            "org/inventory/data/repos.json is unchanged, using the cached copy"
+        )
+        self.assertEqual(list(read_repos(path)), RECORDS)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_fetch_after_change(self):
+        """
+        Test that a changed inventory replaces the cached copy.
+        """
+        self.fetch()
+        self.repository.files("main")["data/repos.json"] = json.dumps(REPOS[:1])
+
+        path = self.fetch()
+
+        self.assertEqual(list(read_repos(path)), RECORDS[:1])
+
+    def test_fetch_to_download_dir(self):
+        """
+        Test that with a download directory the cache is read but never written.
+        """
+        download_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, download_dir)
+
+        path = self.fetch(download_dir=download_dir)
+
+        self.assertEqual(os.path.dirname(path), download_dir)
+        self.assertEqual(list(read_repos(path)), RECORDS)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+        cached = self.fetch()
+        before = sorted(os.listdir(self.cache_dir))
+        with patch("builtins.print"):
+            self.assertEqual(self.fetch(download_dir=download_dir), cached)
+        self.repository.files("main")["data/repos.json"] = json.dumps(REPOS[:1])
+
+        path = self.fetch(download_dir=download_dir)
+
+        self.assertEqual(list(read_repos(path)), RECORDS[:1])
+        self.assertEqual(list(read_repos(cached)), RECORDS)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), before)
+
+    def test_fetch_missing_file(self):
+        """
+        Test that a missing inventory raises an HTTPError and caches nothing.
+        """
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self.fetch("org/inventory/missing.json")
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Test cases for the journal module."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from bundle import BundleFile, fingerprint
+from inventory import RepoRecord
+from journal import CLONED, FAILED, PR_OPENED, PUSHED, SKIPPED, RunJournal
+from templates import Template
+
+
+class TestRunJournal(unittest.TestCase):
+    """Test case for the RunJournal class."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "state", "journal.jsonl")
+
+    def read_lines(self):
+        """Return the decoded lines of the journal file."""
+        with open(self.path, "r", encoding="utf-8") as journal_file:
+            return [json.loads(line) for line in journal_file]
+
+    def test_record_is_persisted(self):
+        """
+        Test that every stage is appended to the file as it is recorded.
+        """
+        run_journal = RunJournal(self.path)
+        run_journal.record("org/repo1", CLONED)
+        run_journal.record("org/repo1", PUSHED)
+
+        self.assertEqual(
+            [line["stage"] for line in self.read_lines()], [CLONED, PUSHED]
+        )
+        run_journal.close()
+
+    def test_resume_skips_completed(self):
+        """
+        Test that a new journal skips repositories completed by an earlier run
+        and keeps failed and unfinished ones.
+        """
+        run_journal = RunJournal(self.path)
+        run_journal.record(
+            "org/done", PR_OPENED, url="https://github.com/org/done/pull/1"
+        )
+        run_journal.record("org/failed", FAILED, reason="Pull request failed")
+        run_journal.record("org/pushed", PUSHED)
+        run_journal.record("org/current", SKIPPED)
+        run_journal.close()
+
+        resumed = RunJournal(self.path)
+        repos = [
+            RepoRecord(name, f"org/{name}", "main")
+            for name in ("done", "failed", "pushed", "current", "new")
+        ]
+        with patch("builtins.print") as mock_print:
+            pending = [repo.name for repo in resumed.pending(repos)]
+
+        self.assertEqual(pending, ["failed", "pushed", "new"])
+        self.assertEqual(
+            [call.args[0] for call in mock_print.call_args_list],
+            [
+                "Skipping org/done: pull request opened in an earlier run",
+                "Skipping org/current: already up to date in an earlier run",
+            ],
+        )
+        self.assertEqual(
+            resumed.entries["org/done"]["url"], "https://github.com/org/done/pull/1"
+        )
+        resumed.close()
+
+    def test_bundle_changed_between_runs(self):
+        """
+        Test that repositories completed with another bundle are worked on again.
+        """
+        first = fingerprint([BundleFile("CONTRIBUTING.md", Template("# Project-Name"))])
+        second = fingerprint(
+            [
+                BundleFile("CONTRIBUTING.md", Template("# Project-Name")),
+                BundleFile("SECURITY.md", Template("Report issues privately")),
+            ]
+        )
+        run_journal = RunJournal(self.path, fingerprint=first)
+        run_journal.record("org/done", PR_OPENED)
+        run_journal.record("org/current", SKIPPED)
+        run_journal.close()
+        repos = [
+            RepoRecord(name, f"org/{name}", "main") for name in ("done", "current")
+        ]
+
+        same = RunJournal(self.path, fingerprint=first)
+        with patch("builtins.print"):
+            self.assertEqual(list(same.pending(repos)), [])
+        same.close()
+        changed = RunJournal(self.path, fingerprint=second)
+        with patch("builtins.print") as mock_print:
+            pending = [repo.name for repo in changed.pending(repos)]
+
+        self.assertEqual(pending, ["done", "current"])
+        self.assertFalse(changed.is_complete("org/done"))
+        mock_print.assert_any_call(
+            "Retrying org/done: the bundle changed since an earlier run"
+        )
+        changed.record("org/done", PR_OPENED)
+        self.assertTrue(changed.is_complete("org/done"))
+        self.assertEqual(self.read_lines()[-1]["bundle"], second)
+        changed.close()
+
+    def test_truncated_line_is_ignored(self):
+        """
+        Test that a line cut short by a cancelled run does not break loading.
+        """
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as journal_file:
+            journal_file.write(
+                json.dumps({"repo": "org/repo1", "stage": PR_OPENED}) + "\n"
+            )
+            journal_file.write('{"repo": "org/repo2", "sta')
+
+        run_journal = RunJournal(self.path)
+
+        self.assertTrue(run_journal.is_complete("org/repo1"))
+        self.assertFalse(run_journal.is_complete("org/repo2"))
+        run_journal.close()
+
+    def test_compaction(self):
+        """
+        Test that a journal with many superseded lines is rewritten with one line per repository.
+        """
+        run_journal = RunJournal(self.path)
+        for stage in (CLONED, PUSHED, PR_OPENED):
+            run_journal.record("org/repo1", stage)
+        run_journal.close()
+
+        RunJournal(self.path).close()
+
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["stage"], PR_OPENED)
+
+    def test_in_memory_journal(self):
+        """
+        Test that a journal without a path keeps entries but writes nothing.
+        """
+        run_journal = RunJournal(None)
+        run_journal.record("org/repo1", PR_OPENED)
+
+        self.assertTrue(run_journal.is_complete("org/repo1"))
+        self.assertFalse(os.path.exists(self.path))
+        run_journal.close()
+
+    def test_read_only_journal(self):
+        """
+        Test that a read-only journal loads earlier entries but neither compacts nor appends.
+        """
+        run_journal = RunJournal(self.path)
+        for stage in (CLONED, PUSHED, PR_OPENED):
+            run_journal.record("org/repo1", stage)
+        run_journal.close()
+
+        read_only = RunJournal(self.path, read_only=True)
+        read_only.record("org/repo2", FAILED)
+        read_only.close()
+
+        self.assertTrue(read_only.is_complete("org/repo1"))
+        self.assertEqual(
+            [line["stage"] for line in self.read_lines()], [CLONED, PUSHED, PR_OPENED]
+        )
+
+    def test_read_only_journal_missing(self):
+        """
+        Test that a read-only journal does not create its file or directory.
+        """
+        RunJournal(self.path, read_only=True).close()
+
+        self.assertFalse(os.path.exists(os.path.dirname(self.path)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Tests for the merge_reports script."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import merge_reports
+from metrics import RunMetrics
+
+
+class TestMergeReports(unittest.TestCase):
+    """Test case for the merge_reports script."""
+
+    def test_main(self):
+        """
+        Test that the reports of every artifact directory are merged into one.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            reports_dir = os.path.join(tmp, "artifacts")
+            for index in range(3):
+                shard = RunMetrics()
+                with shard.repository(f"org/repo-{index}") as timings:
+                    timings.outcome = "pr_opened"
+                shard.write_reports(os.path.join(reports_dir, f"metrics-{index}"), None)
+            output_dir = os.path.join(tmp, "merged")
+
+            with patch.dict(os.environ, {"GITHUB_STEP_SUMMARY": ""}), patch(
+                "builtins.print"
+            ):
+                status = merge_reports.main([output_dir, reports_dir])
+
+            with open(
+                os.path.join(output_dir, "metrics.json"), "r", encoding="utf-8"
+            ) as f:
+                summary = json.load(f)
+
+        self.assertEqual(status, 0)
+        self.assertEqual(summary["repositories"], 3)
+
+    def test_main_no_reports(self):
+        """
+        Test that an empty reports directory fails instead of writing an empty report.
+        """
+        with tempfile.TemporaryDirectory() as tmp, patch("builtins.print"):
+            self.assertEqual(merge_reports.main([tmp, tmp]), 1)
+
+    def test_main_usage(self):
+        """
+        Test that the wrong number of arguments prints the usage.
+        """
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(merge_reports.main([]), 2)
+
+        mock_print.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,274 @@
+"""Tests for the metrics module."""
+
+import asyncio
+import csv
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from inventory import RepoRecord
+from metrics import (
+    RepositoryTimings,
+    RunMetrics,
+    export_opentelemetry,
+    merge_reports,
+    percentile,
+)
+
+
+def response(remaining=None, content=b"{}", headers=None):
+    """Return a mock response with an X-RateLimit-Remaining header."""
+    mock_response = MagicMock()
+    mock_response.headers = dict(headers or {})
+    if remaining is not None:
+        mock_response.headers["X-RateLimit-Remaining"] = str(remaining)
+    mock_response.content = content
+    return mock_response
+
+
+class TestRunMetrics(unittest.TestCase):
+    """Test case for the RunMetrics class."""
+
+    def setUp(self):
+        self.now = 0.0
+        self.run_metrics = RunMetrics(clock=lambda: self.now)
+
+    def add(self, full_name, outcome, stages, seconds=1.0, fetched_bytes=0):
+        """Add a finished repository to the run."""
+        with self.run_metrics.repository(full_name) as timings:
+            timings.stages.extend(stages)
+            timings.outcome = outcome
+            timings.fetched_bytes = fetched_bytes
+        timings.seconds = seconds
+
+    def test_timings_time(self):
+        """
+        Test that a timed block is added as a stage, even when it raises.
+        """
+        timings = RepositoryTimings("org/repo")
+
+        with timings.time("push"):
+            pass
+        with self.assertRaises(RuntimeError):
+            with timings.time("pull_request"):
+                raise RuntimeError("boom")
+
+        self.assertEqual(
+            [stage for stage, _ in timings.stages], ["push", "pull_request"]
+        )
+
+    def test_instrument(self):
+        """
+        Test that an instrumented worker is given a timings record that is kept.
+        """
+
+        def worker(repo, timings):
+            timings.stages.append(("clone", 2.0))
+            timings.outcome = "pr_opened"
+            return repo.name
+
+        result = self.run_metrics.instrument(worker)(
+            RepoRecord("repo", "org/repo", "main")
+        )
+
+        self.assertEqual(result, "repo")
+        self.assertEqual(len(self.run_metrics.repositories), 1)
+        record = self.run_metrics.repositories[0]
+        self.assertEqual(record.full_name, "org/repo")
+        self.assertEqual(record.stages, [("clone", 2.0)])
+        self.assertEqual(record.outcome, "pr_opened")
+
+    def test_instrument_async(self):
+        """
+        Test that an instrumented coroutine is timed even when it raises.
+        """
+
+        async def worker(repo, timings):
+            timings.stages.append(("clone", 2.0))
+            raise RuntimeError(repo.name)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(
+                self.run_metrics.instrument_async(worker)(
+                    RepoRecord("r", "org/r", "main")
+                )
+            )
+
+        record = self.run_metrics.repositories[0]
+        self.assertEqual(record.outcome, "error")
+        self.assertEqual(record.stages, [("clone", 2.0)])
+
+    def test_response_hook(self):
+        """
+        Test that API calls and bytes are counted and the lowest headroom is kept.
+        """
+        session = MagicMock()
+        session.hooks = {"response": []}
+        self.run_metrics.attach(session)
+        hook = session.hooks["response"][0]
+
+        hook(response(4000, b"abc"))
+        hook(response(3990, b"de"))
+        hook(response(None, b""))
+
+        self.assertEqual(self.run_metrics.api_calls, 3)
+        self.assertEqual(self.run_metrics.api_bytes, 5)
+        self.assertEqual(self.run_metrics.rate_limit_remaining, 3990)
+
+    def test_response_hook_streamed(self):
+        """
+        Test that a streamed response is counted from its Content-Length without reading its body.
+        """
+        streamed = response(4000, headers={"Content-Length": "1024"})
+        type(streamed).content = PropertyMock(side_effect=AssertionError("buffered"))
+
+        self.run_metrics.response_hook(streamed, stream=True)
+        self.run_metrics.response_hook(response(3990, headers={}), stream=True)
+
+        self.assertEqual(self.run_metrics.api_calls, 2)
+        self.assertEqual(self.run_metrics.api_bytes, 1024)
+
+    def test_summary(self):
+        """
+        Test the totals, percentiles and throughput of the summary.
+        """
+        for i in range(1, 21):
+            self.add(f"org/r{i}", "pr_opened", [("clone", float(i))], fetched_bytes=10)
+        self.add("org/bad", "failed", [("clone", 100.0)])
+        self.now = 3600.0
+
+        summary = self.run_metrics.summary()
+
+        self.assertEqual(summary["repositories"], 21)
+        self.assertEqual(summary["outcomes"], {"pr_opened": 20, "failed": 1})
+        self.assertEqual(summary["repositories_per_hour"], 21.0)
+        self.assertEqual(summary["fetched_bytes"], 200)
+        self.assertEqual(
+            summary["stages"]["clone"],
+            {"count": 21, "total": 310.0, "p50": 11.0, "p95": 20.0},
+        )
+        self.assertEqual(summary["stages"]["repository"]["count"], 21)
+
+    def test_write_reports(self):
+        """
+        Test that the JSON and CSV reports are written and the job summary appended.
+        """
+        self.add("org/repo", "pr_opened", [("clone", 1.5), ("push", 0.5)], 2.5, 42)
+        self.now = 10.0
+        with tempfile.TemporaryDirectory() as tmp:
+            metrics_dir = os.path.join(tmp, "metrics")
+            step_summary = os.path.join(tmp, "step_summary.md")
+            with open(step_summary, "w", encoding="utf-8") as f:
+                f.write("earlier step\n")
+
+            self.run_metrics.write_reports(metrics_dir, step_summary)
+
+            with open(os.path.join(metrics_dir, "metrics.json"), encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["stages"]["push"]["p95"], 0.5)
+            with open(os.path.join(metrics_dir, "metrics.csv"), encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+            with open(step_summary, encoding="utf-8") as f:
+                job_summary = f.read()
+
+        self.assertEqual(
+            rows,
+            [
+                ["repository", "outcome", "stage", "seconds", "bytes"],
+                ["org/repo", "pr_opened", "clone", "1.500", ""],
+                ["org/repo", "pr_opened", "push", "0.500", ""],
+                ["org/repo", "pr_opened", "repository", "2.500", "42"],
+            ],
+        )
+        self.assertTrue(job_summary.startswith("earlier step\n## automatic-contrib"))
+        self.assertIn("| clone | 1 | 1.50 | 1.50 | 1.50 |", job_summary)
+        self.assertIn("1 repositories in 10s (360.0 per hour)", job_summary)
+
+    def test_write_reports_nothing_configured(self):
+        """
+        Test that no files are written without a metrics directory or step summary.
+        """
+        with patch("builtins.open") as mock_open:
+            self.run_metrics.write_reports("", None)
+
+        mock_open.assert_not_called()
+
+
+class TestMergeReports(unittest.TestCase):
+    """Test case for the merge_reports function."""
+
+    def write_shard(self, metrics_dir, elapsed, api_calls, remaining, repositories):
+        """Write the reports of one shard."""
+        now = [0.0]
+        shard = RunMetrics(clock=lambda: now[0])
+        shard.api_calls = api_calls
+        shard.api_bytes = api_calls * 10
+        shard.rate_limit_remaining = remaining
+        for full_name, seconds in repositories:
+            with shard.repository(full_name) as timings:
+                timings.stages.append(("clone", seconds))
+                timings.outcome = "pr_opened"
+                timings.fetched_bytes = 100
+            timings.seconds = seconds
+        now[0] = elapsed
+        shard.write_reports(metrics_dir, None)
+
+    def test_merge_reports(self):
+        """
+        Test that repositories are combined, API totals added and the slowest shard kept.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            first = os.path.join(tmp, "shard-0")
+            second = os.path.join(tmp, "shard-1")
+            self.write_shard(first, 60.0, 10, 4000, [("org/a", 1.0), ("org/b", 2.0)])
+            self.write_shard(second, 90.0, 5, 3500, [("org/c", 3.0)])
+
+            summary = merge_reports([first, second]).summary()
+
+        self.assertEqual(summary["repositories"], 3)
+        self.assertEqual(summary["outcomes"], {"pr_opened": 3})
+        self.assertEqual(summary["elapsed_seconds"], 90.0)
+        self.assertEqual(summary["repositories_per_hour"], 120.0)
+        self.assertEqual(summary["fetched_bytes"], 300)
+        self.assertEqual(
+            summary["api"],
+            {"calls": 15, "bytes": 150, "rate_limit_remaining_min": 3500},
+        )
+        self.assertEqual(
+            summary["stages"]["clone"],
+            {"count": 3, "total": 6.0, "p50": 2.0, "p95": 3.0},
+        )
+
+
+class TestPercentile(unittest.TestCase):
+    """Test case for the percentile function."""
+
+    def test_percentile(self):
+        """
+        Test the nearest-rank percentile, including the empty case.
+        """
+        self.assertEqual(percentile([3.0, 1.0, 2.0], 50), 2.0)
+        self.assertEqual(percentile([3.0, 1.0, 2.0], 95), 3.0)
+        self.assertEqual(percentile([5.0], 50), 5.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+
+class TestExportOpenTelemetry(unittest.TestCase):
+    """Test case for the export_opentelemetry function."""
+
+    def test_export_without_packages(self):
+        """
+        Test that a missing OpenTelemetry SDK is reported instead of failing the run.
+        """
+        with patch.dict(sys.modules, {"opentelemetry": None}):
+            with patch("builtins.print") as mock_print:
+                exported = export_opentelemetry(RunMetrics())
+
+        self.assertFalse(exported)
+        mock_print.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+"""Tests for the mirror_cache module."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from inventory import RepoRecord
+from mirror_cache import INDEX_FILE, MirrorCache, directory_size
+
+
+def make_mirror(root, full_name, size):
+    """Create a directory that stands in for a mirror of size bytes."""
+    path = os.path.join(root, f"{full_name}.git")
+    os.makedirs(path)
+    with open(os.path.join(path, "pack"), "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+
+class TestMirrorCache(unittest.TestCase):
+    """Test case for the MirrorCache class."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "mirrors")
+        self.now = 0.0
+
+    def clock(self):
+        """Return a time that moves forward on every call."""
+        self.now += 1
+        return self.now
+
+    def test_checkout_steps_clone(self):
+        """
+        Test that a repository without a mirror is cloned bare and checked out as a worktree.
+        """
+        cache = MirrorCache(self.root, 1000)
+        repo = RepoRecord("repo", "org/repo", "main")
+        mirror = os.path.join(self.root, "org/repo.git")
+
+        steps = cache.checkout_steps("github.com", repo, "repo")
+
+        self.assertEqual(
+            steps,
+            [
+                (
+                    "clone",
+                    ["clone", "--bare", "https://github.com/org/repo", mirror],
+                ),
+                ("prune", ["-C", mirror, "worktree", "prune"]),
+                (
+                    "worktree",
+                    [
+                        "-C",
+                        mirror,
+                        "worktree",
+                        "add",
+                        "--force",
+                        "--detach",
+                        os.path.abspath("repo"),
+                        "main",
+                    ],
+                ),
+            ],
+        )
+
+    def test_checkout_steps_fetch(self):
+        """
+        Test that an existing mirror is fetched instead of cloned.
+        """
+        mirror = make_mirror(self.root, "org/repo", 10)
+        cache = MirrorCache(self.root, 1000)
+
+        steps = cache.checkout_steps(
+            "github.com", RepoRecord("repo", "org/repo", "main"), "repo"
+        )
+
+        self.assertEqual(
+            steps[0],
+            (
+                "fetch",
+                [
+                    "-C",
+                    mirror,
+                    "fetch",
+                    "--prune",
+                    "origin",
+                    "+refs/heads/*:refs/heads/*",
+                ],
+            ),
+        )
+
+    def test_release_evicts_least_recently_used(self):
+        """
+        Test that the least recently used mirrors are removed once the cache is over its size.
+        """
+        cache = MirrorCache(self.root, 250, clock=self.clock)
+        repos = [RepoRecord(name, f"org/{name}", "main") for name in "abc"]
+        with patch("builtins.print"):
+            for repo in repos:
+                cache.checkout_steps("github.com", repo, repo.name)
+                make_mirror(self.root, repo.full_name, 100)
+                cache.release(repo)
+
+        self.assertFalse(os.path.exists(cache.path(repos[0])))
+        self.assertTrue(os.path.exists(cache.path(repos[1])))
+        self.assertTrue(os.path.exists(cache.path(repos[2])))
+        self.assertEqual(list(cache.entries), ["org/b", "org/c"])
+
+    def test_release_keeps_mirrors_in_use(self):
+        """
+        Test that a mirror that is checked out is not evicted.
+        """
+        cache = MirrorCache(self.root, 150, clock=self.clock)
+        busy = RepoRecord("busy", "org/busy", "main")
+        idle = RepoRecord("idle", "org/idle", "main")
+        cache.checkout_steps("github.com", busy, "busy")
+        make_mirror(self.root, "org/busy", 100)
+        cache.entries["org/busy"] = {"size": 100, "used": 0}
+        cache.checkout_steps("github.com", idle, "idle")
+        make_mirror(self.root, "org/idle", 100)
+
+        with patch("builtins.print") as mock_print:
+            cache.release(idle)
+
+        mock_print.assert_called_once_with("Evicting the mirror of org/idle")
+        self.assertTrue(os.path.exists(cache.path(busy)))
+
+    def test_release_eviction_failure(self):
+        """
+        Test that a mirror that cannot be deleted is reported and does not fail the release.
+        """
+        cache = MirrorCache(self.root, 150, clock=self.clock)
+        idle = RepoRecord("idle", "org/idle", "main")
+        cache.checkout_steps("github.com", idle, "idle")
+        make_mirror(self.root, "org/idle", 200)
+
+        with patch("shutil.rmtree", side_effect=PermissionError("denied")):
+            with patch("builtins.print") as mock_print:
+                cache.release(idle)
+
+        mock_print.assert_called_with("Failed to evict the mirror of org/idle: denied")
+        self.assertEqual(cache.entries, {})
+
+    def test_release_failed_clone(self):
+        """
+        Test that a mirror that was never created is dropped from the index.
+        """
+        cache = MirrorCache(self.root, 1000)
+        repo = RepoRecord("repo", "org/repo", "main")
+        cache.checkout_steps("github.com", repo, "repo")
+
+        cache.release(repo)
+
+        self.assertEqual(cache.entries, {})
+
+    def test_index_round_trip(self):
+        """
+        Test that the index is reused and mirrors missing from it are measured.
+        """
+        make_mirror(self.root, "org/known", 10)
+        make_mirror(self.root, "org/new", 20)
+        make_mirror(self.root, "org/deleted", 30)
+        cache = MirrorCache(self.root, 1000)
+        cache.entries["org/known"] = {"size": 12345, "used": 7}
+        cache.close()
+        os.rename(
+            os.path.join(self.root, "org/deleted.git"),
+            os.path.join(self.root, "org/deleted"),
+        )
+        with open(os.path.join(self.root, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        del index["org/new"]
+        with open(os.path.join(self.root, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(index, f)
+
+        cache = MirrorCache(self.root, 1000)
+
+        self.assertEqual(cache.entries["org/known"], {"size": 12345, "used": 7})
+        self.assertEqual(cache.entries["org/new"]["size"], 20)
+        self.assertNotIn("org/deleted", cache.entries)
+
+
+class TestDirectorySize(unittest.TestCase):
+    """Test case for the directory_size function."""
+
+    def test_directory_size(self):
+        """
+        Test that the sizes of nested files are added up.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "objects", "pack"))
+            with open(os.path.join(tmp, "HEAD"), "wb") as f:
+                f.write(b"x" * 10)
+            with open(os.path.join(tmp, "objects", "pack", "a.pack"), "wb") as f:
+                f.write(b"x" * 100)
+
+            self.assertEqual(directory_size(tmp), 110)
+
+    def test_directory_size_missing(self):
+        """
+        Test that a directory that does not exist has a size of 0.
+        """
+        self.assertEqual(directory_size("/does/not/exist"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
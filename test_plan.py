@@ -0,0 +1,65 @@
+"""Tests for the plan module."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import call, patch
+
+from inventory import RepoRecord
+from plan import estimate_seconds, previous_repository_seconds, print_plan
+
+
+class TestPlan(unittest.TestCase):
+    """Test case for the plan module."""
+
+    def test_estimate_seconds_paced(self):
+        """
+        Test that the rate limit bounds the estimate once the burst is used up.
+        """
+        self.assertEqual(estimate_seconds(1100, 500, 100, 10, 5.0), 7200.0)
+
+    def test_estimate_seconds_worked(self):
+        """
+        Test that the workers bound the estimate when the rate limit is not reached.
+        """
+        self.assertEqual(estimate_seconds(25, 500, 100, 10, 5.0), 15.0)
+        self.assertEqual(estimate_seconds(0, 500, 100, 10, 5.0), 0.0)
+
+    def test_previous_repository_seconds(self):
+        """
+        Test that the median repository time is read from the last report.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(previous_repository_seconds(tmp))
+            with open(os.path.join(tmp, "metrics.json"), "w", encoding="utf-8") as f:
+                json.dump({"stages": {"repository": {"p50": 2.5}}}, f)
+
+            self.assertEqual(previous_repository_seconds(tmp), 2.5)
+        self.assertIsNone(previous_repository_seconds(""))
+
+    def test_print_plan(self):
+        """
+        Test that every target is listed with the estimated cost of the run.
+        """
+        targets = [RepoRecord(f"r{i}", f"org/r{i}", "main") for i in range(3)]
+
+        with patch("builtins.print") as mock_print:
+            print_plan(targets, 250, "api", 500, 100, 10, "")
+
+        self.assertEqual(
+            mock_print.call_args_list,
+            [
+                call("Would open a pull request in org/r0"),
+                call("Would open a pull request in org/r1"),
+                call("Would open a pull request in org/r2"),
+                call(
+                    "Plan: 3 of 250 repositories need a pull request, about 18 API "
+                    "calls and 0 minutes (1.0s per repository from a default)"
+                ),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
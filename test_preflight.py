@@ -0,0 +1,278 @@
+"""Test cases for the preflight module."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import github3
+import requests
+from bundle import BundleFile
+from fake_github import FakeGitHub
+from inventory import RepoRecord
+from preflight import (
+    CONTRIBUTING_PATHS,
+    build_query,
+    file_groups,
+    filter_repositories,
+    graphql_url,
+    skip_reason,
+)
+from templates import Template
+
+BUNDLE = [
+    BundleFile("CONTRIBUTING.md", Template(""), CONTRIBUTING_PATHS),
+    BundleFile("SECURITY.md", Template(""), ["SECURITY.md", ".github/SECURITY.md"]),
+]
+
+
+def repo_result(files=(), branch=False, open_pulls=0):
+    """Build the GraphQL result of one repository."""
+    result = {f"f{index}": None for index in range(3)}
+    for index in files:
+        result[f"f{index}"] = {"id": "blob"}
+    result["ref"] = {"id": "ref"} if branch else None
+    result["pullRequests"] = {"totalCount": open_pulls}
+    return result
+
+
+def make_connection(*payloads, base_url="https://api.github.com"):
+    """Build a connection whose session returns the given GraphQL payloads in order."""
+    connection = MagicMock()
+    connection.session.base_url = base_url
+    responses = []
+    for payload in payloads:
+        response = MagicMock()
+        response.json.return_value = payload
+        responses.append(response)
+    connection.session.post.side_effect = responses
+    return connection
+
+
+class TestPreflight(unittest.TestCase):
+    """Test case for the preflight module."""
+
+    def test_graphql_url(self):
+        """
+        Test the GraphQL endpoint for GitHub.com and GitHub Enterprise.
+        """
+        connection = MagicMock()
+        connection.session.base_url = "https://api.github.com"
+        self.assertEqual(graphql_url(connection), "https://api.github.com/graphql")
+
+        connection.session.base_url = "https://github.example.com/api/v3"
+        self.assertEqual(
+            graphql_url(connection), "https://github.example.com/api/graphql"
+        )
+
+    def test_build_query(self):
+        """
+        Test that the query has one aliased repository per entry and uses variables.
+        """
+        query = build_query(2, ["CONTRIBUTING.md"], "contributing-doc")
+
+        self.assertTrue(
+            query.startswith(
+                "query($o0: String!, $n0: String!, $o1: String!, $n1: String!)"
+            )
+        )
+        self.assertIn("r0: repository(owner: $o0, name: $n0)", query)
+        self.assertIn("r1: repository(owner: $o1, name: $n1)", query)
+        self.assertIn('f0: object(expression: "HEAD:CONTRIBUTING.md")', query)
+        self.assertIn(
+            'pullRequests(headRefName: "contributing-doc", states: OPEN)', query
+        )
+
+    def test_skip_reason(self):
+        """
+        Test the reasons a repository is skipped.
+        """
+        self.assertIsNone(skip_reason(repo_result()))
+        self.assertIsNone(skip_reason(repo_result(branch=True)))
+        self.assertEqual(
+            skip_reason(repo_result(files=[1])),
+            ".github/CONTRIBUTING.md already exists",
+        )
+        self.assertEqual(
+            skip_reason(repo_result(open_pulls=1)), "pull request already open"
+        )
+        self.assertEqual(skip_reason(None), "repository not found or not accessible")
+
+    def test_skip_reason_bundle(self):
+        """
+        Test that a repository is only skipped once it has every file of the bundle.
+        """
+        groups = file_groups(BUNDLE)
+
+        self.assertIsNone(skip_reason(repo_result(files=[1]), groups))
+        self.assertEqual(
+            skip_reason(repo_result(files=[1, 4]), groups),
+            ".github/CONTRIBUTING.md, .github/SECURITY.md already exist",
+        )
+
+    def test_filter_repositories_batches(self):
+        """
+        Test that repositories are checked in batches and pruned.
+        """
+        repos = [RepoRecord(f"repo{i}", f"org/repo{i}", "main") for i in range(5)]
+        connection = make_connection(
+            {"data": {"r0": repo_result(), "r1": repo_result(files=[0])}},
+            {"data": {"r0": repo_result(open_pulls=1), "r1": repo_result()}},
+            {"data": {"r0": None}},
+        )
+
+        with patch("builtins.print"):
+            result = list(filter_repositories(connection, repos, "contributing-doc", 2))
+
+        self.assertEqual(
+            [repo.full_name for repo in result], ["org/repo0", "org/repo3"]
+        )
+        self.assertEqual(connection.session.post.call_count, 3)
+        _, kwargs = connection.session.post.call_args_list[0]
+        self.assertEqual(
+            kwargs["json"]["variables"],
+            {"o0": "org", "n0": "repo0", "o1": "org", "n1": "repo1"},
+        )
+
+    def test_filter_repositories_is_lazy(self):
+        """
+        Test that no query is made until repositories are requested.
+        """
+        connection = make_connection({"data": {"r0": repo_result()}})
+
+        result = filter_repositories(
+            connection, [RepoRecord("repo", "org/repo", "main")], "b"
+        )
+
+        connection.session.post.assert_not_called()
+        self.assertEqual(len(list(result)), 1)
+
+    def test_filter_repositories_query_failure(self):
+        """
+        Test that a failed query passes its batch through unchanged.
+        """
+        repos = [
+            RepoRecord("repo0", "org/repo0", "main"),
+            RepoRecord("repo1", "org/repo1", "main"),
+        ]
+        connection = MagicMock()
+        connection.session.base_url = "https://api.github.com"
+        connection.session.post.side_effect = requests.exceptions.ConnectionError(
+            "boom"
+        )
+
+        with patch("builtins.print") as mock_print:
+            result = list(filter_repositories(connection, repos, "contributing-doc"))
+
+        self.assertEqual(result, repos)
+        mock_print.assert_called_once_with(
+            "Pre-flight check failed, processing batch without it: boom"
+        )
+
+    def test_filter_repositories_errors_only(self):
+        """
+        Test that a response with errors and no data passes its batch through unchanged.
+        """
+        repos = [
+            RepoRecord("repo0", "org/repo0", "main"),
+            RepoRecord("repo1", "org/repo1", "main"),
+        ]
+        errors = [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]
+        connection = make_connection({"errors": errors})
+
+        with patch("builtins.print") as mock_print:
+            result = list(filter_repositories(connection, repos, "contributing-doc"))
+
+        self.assertEqual(result, repos)
+        mock_print.assert_called_once_with(
+            "Pre-flight check failed, processing batch without it: "
+            f"no data in the response: {errors}"
+        )
+
+    def test_filter_repositories_partial_errors(self):
+        """
+        Test that only a repository reported as not found is skipped when a query has errors.
+        """
+        repos = [
+            RepoRecord(name, f"org/{name}", "main")
+            for name in ("todo", "missing", "timeout")
+        ]
+        errors = [
+            {"type": "NOT_FOUND", "path": ["r1"]},
+            {"message": "Something went wrong", "path": ["r2"]},
+        ]
+        connection = make_connection(
+            {"data": {"r0": repo_result(), "r1": None, "r2": None}, "errors": errors}
+        )
+
+        with patch("builtins.print") as mock_print:
+            result = list(filter_repositories(connection, repos, "contributing-doc"))
+
+        self.assertEqual([repo.name for repo in result], ["todo", "timeout"])
+        mock_print.assert_any_call(
+            "Skipping org/missing: repository not found or not accessible"
+        )
+        mock_print.assert_any_call(f"Pre-flight check failed for org/timeout: {errors}")
+
+
+class TestFilterRepositoriesAgainstFakeGitHub(unittest.TestCase):
+    """Test case for filter_repositories against the local fake GraphQL endpoint."""
+
+    def test_filter_repositories(self):
+        """
+        Test that the query is answered per repository and only the ones to do are kept.
+        """
+        with FakeGitHub() as server:
+            server.add_repository("org/todo")
+            server.add_repository("org/done", files={".github/CONTRIBUTING.md": "x"})
+            server.add_repository("org/open").branches["contributing-doc"] = "sha"
+            server.repositories["org/open"].pulls.append({"head": "contributing-doc"})
+            connection = github3.GitHubEnterprise(url=server.url, token="token")
+            repos = [
+                RepoRecord(name, f"org/{name}", "main")
+                for name in ("todo", "done", "open", "missing")
+            ]
+
+            with patch("builtins.print") as mock_print:
+                kept = list(filter_repositories(connection, repos, "contributing-doc"))
+
+            self.assertEqual(server.requests, [("POST", "/api/graphql")])
+        self.assertEqual([repo.name for repo in kept], ["todo"])
+        mock_print.assert_any_call(
+            "Skipping org/done: .github/CONTRIBUTING.md already exists"
+        )
+        mock_print.assert_any_call("Skipping org/open: pull request already open")
+        mock_print.assert_any_call(
+            "Skipping org/missing: repository not found or not accessible"
+        )
+
+    def test_filter_repositories_bundle(self):
+        """
+        Test that the files of a bundle are checked in the same query and the missing ones kept.
+        """
+        with FakeGitHub() as server:
+            server.add_repository("org/todo", files={"SECURITY.md": "x"})
+            server.add_repository(
+                "org/done",
+                files={"CONTRIBUTING.md": "x", ".github/SECURITY.md": "x"},
+            )
+            connection = github3.GitHubEnterprise(url=server.url, token="token")
+            repos = [
+                RepoRecord(name, f"org/{name}", "main") for name in ("todo", "done")
+            ]
+
+            with patch("builtins.print") as mock_print:
+                kept = list(
+                    filter_repositories(
+                        connection, repos, "contributing-doc", files=BUNDLE
+                    )
+                )
+
+            self.assertEqual(server.requests, [("POST", "/api/graphql")])
+        self.assertEqual([repo.name for repo in kept], ["todo"])
+        self.assertEqual(kept[0].missing, ("CONTRIBUTING.md",))
+        mock_print.assert_any_call(
+            "Skipping org/done: CONTRIBUTING.md, .github/SECURITY.md already exist"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
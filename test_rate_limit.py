@@ -0,0 +1,211 @@
+"""Test cases for the rate_limit module."""
+
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import requests
+from fake_github import FakeGitHub
+from rate_limit import SECONDARY_RATE_LIMIT_BACKOFF, RateLimiter, is_rate_limited
+
+
+class FakeClock:
+    """A clock whose time only moves when something sleeps on it."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """Advance the fake time instead of sleeping."""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Test case for the RateLimiter class."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_limiter(self, rate_per_hour=3600, burst=2):
+        """Create a limiter driven by the fake clock."""
+        return RateLimiter(
+            rate_per_hour, burst, clock=self.clock.time, sleep=self.clock.sleep
+        )
+
+    def test_burst_is_not_delayed(self):
+        """Tokens in the bucket are handed out without waiting."""
+        limiter = self.make_limiter(burst=3)
+        for _ in range(3):
+            self.assertEqual(limiter.acquire(), 0)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_empty_bucket_waits_for_refill(self):
+        """Once the bucket is empty, acquire waits one refill interval per token."""
+        limiter = self.make_limiter(rate_per_hour=360, burst=1)
+        limiter.acquire()
+        waited = limiter.acquire()
+        self.assertAlmostEqual(waited, 10)
+        self.assertAlmostEqual(limiter.acquire(), 10)
+
+    def test_acquire_async_waits_on_the_event_loop(self):
+        """acquire_async waits with asyncio.sleep instead of blocking the thread."""
+        limiter = self.make_limiter(rate_per_hour=360, burst=1)
+
+        async def advance(seconds):
+            self.clock.now += seconds
+
+        with patch("asyncio.sleep", AsyncMock(side_effect=advance)) as sleep:
+            self.assertEqual(asyncio.run(limiter.acquire_async()), 0)
+            self.assertAlmostEqual(asyncio.run(limiter.acquire_async()), 10)
+
+        sleep.assert_awaited_once()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_wait_time_does_not_take_a_token(self):
+        """wait_time reports the wait for the next token without taking it."""
+        limiter = self.make_limiter(rate_per_hour=360, burst=1)
+        self.assertEqual(limiter.wait_time(), 0)
+        self.assertEqual(limiter.wait_time(), 0)
+        limiter.acquire()
+        self.assertAlmostEqual(limiter.wait_time(), 10)
+        limiter.observe(429, {"Retry-After": "30"})
+        self.assertAlmostEqual(limiter.wait_time(), 30)
+
+    def test_bucket_refills_while_idle(self):
+        """Idle time refills the bucket up to the burst size."""
+        limiter = self.make_limiter(rate_per_hour=3600, burst=2)
+        limiter.acquire()
+        limiter.acquire()
+        self.clock.now += 3600
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertAlmostEqual(limiter.acquire(), 1)
+
+    def test_retry_after_blocks(self):
+        """A Retry-After header blocks the bucket for that many seconds."""
+        limiter = self.make_limiter()
+        limiter.observe(403, {"Retry-After": "30"}, "secondary rate limit")
+        self.assertAlmostEqual(limiter.acquire(), 30)
+
+    def test_exhausted_primary_limit_waits_for_reset(self):
+        """No tokens are handed out until X-RateLimit-Reset once Remaining hits 0."""
+        limiter = self.make_limiter()
+        reset = int(self.clock.now) + 120
+        limiter.observe(
+            200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)}
+        )
+        self.assertEqual(limiter.remaining, 0)
+        limiter.acquire()
+        self.assertGreaterEqual(self.clock.now, reset)
+
+    def test_headroom_does_not_block(self):
+        """Remaining API calls do not slow the limiter down."""
+        limiter = self.make_limiter()
+        limiter.observe(
+            200,
+            {"X-RateLimit-Remaining": "4999", "X-RateLimit-Reset": "1700003600"},
+        )
+        self.assertEqual(limiter.acquire(), 0)
+        self.assertEqual(limiter.remaining, 4999)
+
+    def test_other_resources_do_not_overwrite_core(self):
+        """A GraphQL budget running out does not stand in for the REST one."""
+        limiter = self.make_limiter()
+        limiter.observe(
+            200,
+            {
+                "X-RateLimit-Resource": "core",
+                "X-RateLimit-Remaining": "4999",
+                "X-RateLimit-Reset": "1700003600",
+            },
+        )
+        limiter.observe(
+            200,
+            {
+                "X-RateLimit-Resource": "graphql",
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": "1700001800",
+            },
+        )
+        self.assertEqual(limiter.remaining, 4999)
+        self.assertEqual(limiter.reset_at, 1700003600)
+        self.assertEqual(limiter.acquire(), 0)
+
+    def test_secondary_rate_limit_without_retry_after(self):
+        """A secondary rate limit without Retry-After backs off for a minute."""
+        limiter = self.make_limiter()
+        limiter.observe(429, {})
+        self.assertAlmostEqual(limiter.acquire(), SECONDARY_RATE_LIMIT_BACKOFF)
+
+    def test_forbidden_is_not_a_rate_limit(self):
+        """A plain 403 (e.g. missing permissions) does not pause the run."""
+        limiter = self.make_limiter()
+        limiter.observe(403, {}, "Resource not accessible by integration")
+        self.assertEqual(limiter.acquire(), 0)
+
+    def test_is_rate_limited(self):
+        """Only a 429 or a 403 that names a rate limit is retried once it resets."""
+        self.assertTrue(is_rate_limited(429, {}))
+        self.assertTrue(is_rate_limited(403, {"X-RateLimit-Remaining": "0"}))
+        self.assertTrue(
+            is_rate_limited(403, {}, "You have exceeded a secondary rate limit")
+        )
+        self.assertFalse(
+            is_rate_limited(403, {}, "Resource not accessible by integration")
+        )
+        self.assertFalse(is_rate_limited(422, {"X-RateLimit-Remaining": "0"}))
+
+    def test_attach_registers_response_hook(self):
+        """Responses made through an attached session are observed."""
+        limiter = self.make_limiter()
+        session = MagicMock()
+        session.hooks = {"response": []}
+        limiter.attach(session)
+
+        response = MagicMock()
+        response.status_code = 429
+        response.headers = {"Retry-After": "5"}
+        response.text = "You have exceeded a secondary rate limit"
+        for hook in session.hooks["response"]:
+            self.assertIs(hook(response), response)
+
+        self.assertAlmostEqual(limiter.acquire(), 5)
+
+    def test_invalid_configuration(self):
+        """A zero rate or burst is rejected."""
+        with self.assertRaises(ValueError):
+            RateLimiter(0, 1)
+        with self.assertRaises(ValueError):
+            RateLimiter(1, 0)
+
+
+class TestRateLimiterAgainstFakeGitHub(unittest.TestCase):
+    """Test case for a RateLimiter attached to a session talking to the fake server."""
+
+    def test_exhausted_rate_limit_blocks(self):
+        """
+        Test that the limiter blocks until the reset once the fake runs out of requests.
+        """
+        clock = FakeClock()
+        limiter = RateLimiter(3600, 10, clock=clock.time, sleep=clock.sleep)
+        with FakeGitHub(rate_limit=2) as server, requests.Session() as session:
+            server.clock = clock.time
+            limiter.attach(session)
+            url = f"{server.url}/api/v3/repos/org/missing"
+
+            with patch("builtins.print"):
+                statuses = [session.get(url, timeout=5).status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [404, 404, 403])
+        self.assertEqual(limiter.remaining, 0)
+        self.assertEqual(limiter.blocked_until, int(clock.now) + 3600)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""Tests for the scheduler module."""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from inventory import RepoRecord
+from metrics import RepositoryTimings, RunMetrics
+from scheduler import (
+    SECONDS_PER_MB,
+    expected_seconds,
+    load_history,
+    longest_first,
+    route_by_size,
+)
+
+
+def record(name, size=0):
+    """Return a repository record of size KB."""
+    return RepoRecord(name, f"org/{name}", "main", size=size)
+
+
+class TestScheduler(unittest.TestCase):
+    """Test case for the scheduler module."""
+
+    def test_load_history(self):
+        """
+        Test that the last run's time of each repository is read, leaving out errors.
+        """
+        run_metrics = RunMetrics()
+        for full_name, outcome, seconds in [
+            ("org/done", "pr_opened", 12.5),
+            ("org/broken", "error", 0.1),
+        ]:
+            timings = RepositoryTimings(full_name)
+            timings.outcome = outcome
+            timings.seconds = seconds
+            run_metrics.repositories.append(timings)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            run_metrics.write_csv(os.path.join(tmp, "metrics.csv"))
+
+            self.assertEqual(load_history(tmp), {"org/done": 12.5})
+            self.assertEqual(load_history(os.path.join(tmp, "missing")), {})
+        self.assertEqual(load_history(""), {})
+
+    def test_expected_seconds(self):
+        """
+        Test that the last run's time wins over the size, which counts only for clones.
+        """
+        large = record("large", size=100 * 1024)
+
+        self.assertEqual(expected_seconds(large, {}, 5.0), 5.0 + 100 * SECONDS_PER_MB)
+        self.assertEqual(expected_seconds(large, {"org/large": 42.0}, 5.0), 42.0)
+        self.assertEqual(expected_seconds(large, {}, 5.0, api_size_kb=1024), 5.0)
+
+    def test_longest_first(self):
+        """
+        Test that the largest repositories come first and ties keep the inventory order.
+        """
+        repos = [
+            record("a"),
+            record("b", size=2048),
+            record("c"),
+            record("d", size=4096),
+            record("e"),
+        ]
+
+        self.assertEqual(
+            [repo.name for repo in longest_first(repos, {"org/e": 30.0}, 5.0)],
+            ["e", "d", "b", "a", "c"],
+        )
+
+    def test_route_by_size(self):
+        """
+        Test that only repositories above the size go to the API worker.
+        """
+        git_worker, api_worker = MagicMock(), MagicMock()
+        worker = route_by_size(git_worker, api_worker, 1024)
+
+        worker(record("small", size=1024), timings="small")
+        worker(record("large", size=1025), timings="large")
+
+        git_worker.assert_called_once_with(record("small", size=1024), timings="small")
+        api_worker.assert_called_once_with(record("large", size=1025), timings="large")
+
+
+if __name__ == "__main__":
+    unittest.main()
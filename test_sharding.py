@@ -0,0 +1,50 @@
+"""Tests for the sharding module."""
+
+import unittest
+
+from inventory import RepoRecord
+from sharding import in_shard, shard_of
+
+
+def records(count):
+    """Return count repositories of one organization."""
+    return [RepoRecord(f"repo-{i}", f"org/repo-{i}", "main") for i in range(count)]
+
+
+class TestSharding(unittest.TestCase):
+    """Test case for the sharding module."""
+
+    def test_shard_of_is_stable(self):
+        """
+        Test that the shard depends only on the name, not its case or the process.
+        """
+        self.assertEqual(shard_of("org/repo", 4), shard_of("org/repo", 4))
+        self.assertEqual(shard_of("Org/Repo", 4), shard_of("org/repo", 4))
+        # Fixed value, so a change of hash would show up as a reshuffle
+        self.assertEqual(shard_of("github/automatic-contrib-prs", 7), 4)
+
+    def test_shards_partition_the_repositories(self):
+        """
+        Test that every repository is in exactly one shard and shards are about even.
+        """
+        repos = records(1000)
+
+        shards = [list(in_shard(repos, index, 4)) for index in range(4)]
+
+        names = sorted(repo.full_name for shard in shards for repo in shard)
+        self.assertEqual(names, sorted(repo.full_name for repo in repos))
+        for shard in shards:
+            self.assertGreater(len(shard), 200)
+            self.assertLess(len(shard), 300)
+
+    def test_single_shard(self):
+        """
+        Test that with one shard every repository is kept, in order.
+        """
+        repos = records(5)
+
+        self.assertEqual(list(in_shard(iter(repos), 0, 1)), repos)
+
+
+if __name__ == "__main__":
+    unittest.main()
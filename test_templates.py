@@ -0,0 +1,127 @@
+"""Test cases for the templates module."""
+
+import os
+import tempfile
+import unittest
+
+from inventory import RepoRecord
+from templates import Template, load_template, template_variables
+
+REPO = RepoRecord(
+    "my-repo",
+    "my-org/my-repo",
+    "trunk",
+    owners=("octocat", "hubot"),
+    topics=("python", "innersource"),
+)
+
+
+class TestTemplate(unittest.TestCase):
+    """Test case for the Template class."""
+
+    def test_project_name(self):
+        """
+        Test that every Project-Name is replaced with the repository name.
+        """
+        template = Template("# Project-Name\nSee Project-Name/issues\n")
+
+        self.assertEqual(template.render(REPO), "# my-repo\nSee my-repo/issues\n")
+
+    def test_variables(self):
+        """
+        Test that every variable is rendered from the repository record.
+        """
+        template = Template(
+            "{{name}} {{ full_name }} {{owner}} {{ default_branch }} "
+            "{{owners}} {{topics}}"
+        )
+
+        self.assertEqual(
+            template.render(REPO),
+            "my-repo my-org/my-repo my-org trunk @octocat, @hubot python, innersource",
+        )
+
+    def test_literal_braces(self):
+        """
+        Test that braces that are not placeholders are kept as they are.
+        """
+        template = Template("{ json: {} } {{ name }} {{{{")
+
+        self.assertEqual(template.render(REPO), "{ json: {} } my-repo {{{{")
+
+    def test_workflow_expressions(self):
+        """
+        Test that GitHub Actions expressions in a workflow template are kept as they are.
+        """
+        template = Template(
+            "name: {{ name }} CI\n"
+            "token: ${{ secrets.TOKEN }}\n"
+            "os: {{ matrix.os }}\n"
+            "ref: ${{ github }} ${{name}}\n"
+        )
+
+        self.assertEqual(
+            template.render(REPO),
+            "name: my-repo CI\n"
+            "token: ${{ secrets.TOKEN }}\n"
+            "os: {{ matrix.os }}\n"
+            "ref: ${{ github }} ${{name}}\n",
+        )
+
+    def test_special_characters_in_names(self):
+        """
+        Test that names with characters special to sed or str.format render literally.
+        """
+        repo = RepoRecord("a/b&c\\1{0}", "org/a/b&c\\1{0}", "main")
+
+        self.assertEqual(Template("Project-Name").render(repo), "a/b&c\\1{0}")
+
+    def test_unknown_variable(self):
+        """
+        Test that an unknown variable fails when the template is compiled.
+        """
+        with self.assertRaises(ValueError) as context_manager:
+            Template("{{ nmae }}")
+
+        self.assertEqual(
+            str(context_manager.exception),
+            "Unknown template variable nmae, expected one of: "
+            "name, full_name, owner, default_branch, owners, topics",
+        )
+
+    def test_empty_lists(self):
+        """
+        Test that a repository without owners or topics renders empty strings.
+        """
+        variables = template_variables(RepoRecord("repo", "org/repo", "main"))
+
+        self.assertEqual(variables["owners"], "")
+        self.assertEqual(variables["topics"], "")
+
+    def test_load_shipped_template(self):
+        """
+        Test that the shipped CONTRIBUTING template renders without placeholders left.
+        """
+        path = os.path.join(os.path.dirname(__file__), "CONTRIBUTING-template.md")
+
+        rendered = load_template(path).render(REPO)
+
+        self.assertIn("# Contributing to my-repo", rendered)
+        self.assertNotIn("Project-Name", rendered)
+        self.assertNotIn("{{", rendered)
+
+    def test_load_template(self):
+        """
+        Test that a template file is read and compiled.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".md", delete=False) as file:
+            file.write("Welcome to {{ full_name }}\n")
+        self.addCleanup(os.remove, file.name)
+
+        self.assertEqual(
+            load_template(file.name).render(REPO), "Welcome to my-org/my-repo\n"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,327 @@
+"""Tests for the tracker module."""
+
+import csv
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import github3
+from fake_github import FakeGitHub
+from installations import Installation
+from journal import FAILED, PR_OPENED, RunJournal
+from tracker import (
+    PullRequestState,
+    build_mutation,
+    build_query,
+    build_search_query,
+    fetch_states,
+    refresh_branches,
+    search_states,
+    summarize,
+    track,
+)
+
+BRANCH = "contributing-doc"
+
+
+def node(state="OPEN", merged_at=None, merge_state="CLEAN"):
+    """Return a pull request node as the tracking query answers it."""
+    return {
+        "id": "PR_1",
+        "number": 1,
+        "url": "https://github.com/org/repo/pull/1",
+        "state": state,
+        "createdAt": "2024-01-01T00:00:00Z",
+        "mergedAt": merged_at,
+        "closedAt": merged_at,
+        "headRefOid": "abc",
+        "mergeStateStatus": merge_state,
+    }
+
+
+class TestTracker(unittest.TestCase):
+    """Test case for the tracker module."""
+
+    def test_build_query(self):
+        """
+        Test that each repository asks for its latest pull request from the branch.
+        """
+        query = build_query(2, BRANCH)
+
+        self.assertTrue(
+            query.startswith(
+                "query($o0: String!, $n0: String!, $o1: String!, $n1: String!)"
+            )
+        )
+        self.assertIn("r1: repository(owner: $o1, name: $n1)", query)
+        self.assertIn(
+            'pullRequests(headRefName: "contributing-doc", first: 1, '
+            "orderBy: {field: CREATED_AT, direction: DESC})",
+            query,
+        )
+        self.assertIn("mergeStateStatus", query)
+
+    def test_build_search_query(self):
+        """
+        Test that the search asks for a page of pull requests and their repositories.
+        """
+        query = build_search_query()
+
+        self.assertTrue(query.startswith("query($query: String!, $cursor: String)"))
+        self.assertIn(
+            "search(type: ISSUE, query: $query, first: 100, after: $cursor)", query
+        )
+        self.assertIn("pageInfo { hasNextPage endCursor }", query)
+        self.assertIn("... on PullRequest { repository { nameWithOwner }", query)
+
+    def test_build_mutation(self):
+        """
+        Test that the updates are aliased mutations taking one input each.
+        """
+        self.assertEqual(
+            build_mutation(2),
+            "mutation($i0: UpdatePullRequestBranchInput!, "
+            "$i1: UpdatePullRequestBranchInput!) { "
+            "u0: updatePullRequestBranch(input: $i0) { pullRequest { id } } "
+            "u1: updatePullRequestBranch(input: $i1) { pullRequest { id } } }",
+        )
+
+    def test_pull_request_state(self):
+        """
+        Test the time to merge and which open pull requests are stale or conflicted.
+        """
+        merged = PullRequestState(
+            "org/repo", node("MERGED", merged_at="2024-01-02T12:00:00Z")
+        )
+        behind = PullRequestState("org/repo", node(merge_state="BEHIND"))
+        dirty = PullRequestState("org/repo", node(merge_state="DIRTY"))
+        closed = PullRequestState("org/repo", node("CLOSED", merge_state="DIRTY"))
+
+        self.assertEqual(merged.hours_to_merge, 36.0)
+        self.assertFalse(merged.stale)
+        self.assertIsNone(behind.hours_to_merge)
+        self.assertTrue(behind.stale)
+        self.assertFalse(behind.conflicted)
+        self.assertTrue(dirty.conflicted)
+        self.assertFalse(dirty.stale)
+        self.assertFalse(closed.conflicted)
+
+    def test_summarize(self):
+        """
+        Test the counts, the merge rate of decided pull requests and the time to merge.
+        """
+        states = [
+            PullRequestState("org/a", node("MERGED", merged_at="2024-01-01T02:00:00Z")),
+            PullRequestState("org/b", node("MERGED", merged_at="2024-01-01T10:00:00Z")),
+            PullRequestState("org/c", node("CLOSED")),
+            PullRequestState("org/d", node(merge_state="BEHIND")),
+            PullRequestState("org/e", node(merge_state="DIRTY")),
+        ]
+
+        summary = summarize(states, states[3:4])
+
+        self.assertEqual(
+            summary,
+            {
+                "pull_requests": 5,
+                "open": 2,
+                "merged": 2,
+                "closed": 1,
+                "merge_rate": 0.667,
+                "stale": 1,
+                "conflicted": 1,
+                "refreshed": 1,
+                "hours_to_merge": {"p50": 2.0, "p95": 10.0},
+            },
+        )
+
+
+class TestTrackerAgainstFakeGitHub(unittest.TestCase):
+    """Test case for tracking pull requests against the local fake GraphQL endpoint."""
+
+    def setUp(self):
+        self.server = FakeGitHub()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.connection = github3.GitHubEnterprise(url=self.server.url, token="token")
+
+    def add_pull(self, full_name, **fields):
+        """Add a pull request from the action's branch, and its repository if it is new."""
+        repository = self.server.repositories.get(
+            full_name
+        ) or self.server.add_repository(full_name)
+        pull = {
+            "number": len(repository.pulls) + 1,
+            "head": BRANCH,
+            "head_sha": "head",
+            "base": "main",
+            "state": "OPEN",
+            "created_at": "2024-01-01T00:00:00Z",
+            "merged_at": None,
+            "closed_at": None,
+            "merge_state": "CLEAN",
+        }
+        pull.update(fields)
+        repository.pulls.append(pull)
+        return pull
+
+    def test_fetch_states(self):
+        """
+        Test that repositories are queried in batches and those without a pull request left out.
+        """
+        self.add_pull("org/open", merge_state="BEHIND")
+        self.add_pull(
+            "org/merged",
+            state="MERGED",
+            merged_at="2024-01-01T06:00:00Z",
+            closed_at="2024-01-01T06:00:00Z",
+        )
+        self.server.add_repository("org/none")
+
+        states = fetch_states(
+            self.connection,
+            ["org/open", "org/merged", "org/none", "org/missing"],
+            BRANCH,
+            batch_size=2,
+        )
+
+        self.assertEqual(self.server.requests, [("POST", "/api/graphql")] * 2)
+        self.assertEqual(
+            [(state.full_name, state.state) for state in states],
+            [("org/open", "OPEN"), ("org/merged", "MERGED")],
+        )
+        self.assertTrue(states[0].stale)
+        self.assertEqual(states[1].hours_to_merge, 6.0)
+
+    def test_search_states(self):
+        """
+        Test that the search is paged and only the latest pull request of a repository is kept.
+        """
+        for i in range(150):
+            self.add_pull(
+                f"org/repo-{i:03}",
+                created_at=f"2024-01-01T00:{i // 60:02}:{i % 60:02}Z",
+            )
+        self.add_pull("org/repo-000", state="CLOSED", created_at="2023-12-31T00:00:00Z")
+        self.add_pull("org/repo-001", state="MERGED", created_at="2024-02-01T00:00:00Z")
+        self.add_pull("other/repo")
+        self.add_pull("org/other-branch", head="feature")
+
+        states = search_states(self.connection, "org", BRANCH)
+
+        self.assertEqual(self.server.requests, [("POST", "/api/graphql")] * 2)
+        self.assertEqual(len(states), 150)
+        self.assertEqual(
+            [(state.full_name, state.state) for state in states[:2]],
+            [("org/repo-001", "MERGED"), ("org/repo-149", "OPEN")],
+        )
+        self.assertEqual(
+            (states[-1].full_name, states[-1].state), ("org/repo-000", "OPEN")
+        )
+
+    def test_refresh_branches(self):
+        """
+        Test that only stale branches are updated, in one mutation paced by the limiter.
+        """
+        behind = self.add_pull("org/behind", merge_state="BEHIND")
+        moved = self.add_pull("org/moved", merge_state="BEHIND")
+        self.add_pull("org/current")
+        states = fetch_states(
+            self.connection, ["org/behind", "org/moved", "org/current"], BRANCH
+        )
+        moved["head_sha"] = "pushed since"
+        limiter = MagicMock()
+        self.server.requests.clear()
+
+        with patch("builtins.print") as mock_print:
+            refreshed = refresh_branches(self.connection, states, limiter)
+
+        self.assertEqual([state.full_name for state in refreshed], ["org/behind"])
+        self.assertEqual(behind["merge_state"], "CLEAN")
+        self.assertEqual(limiter.acquire.call_count, 2)
+        self.assertEqual(self.server.requests, [("POST", "/api/graphql")])
+        mock_print.assert_any_call(
+            f"Failed to update the branch of {self.server.url}/org/moved/pull/1"
+        )
+
+    def test_track(self):
+        """
+        Test that the pull requests of the organization are found, reported and refreshed.
+        """
+        self.add_pull("org/behind", merge_state="BEHIND")
+        self.add_pull(
+            "org/merged",
+            state="MERGED",
+            merged_at="2024-01-01T04:00:00Z",
+            closed_at="2024-01-01T04:00:00Z",
+        )
+        self.add_pull("org/conflict", merge_state="DIRTY")
+        self.server.add_repository("org/none")
+        installation = Installation("org", self.connection, None, MagicMock())
+
+        with tempfile.TemporaryDirectory() as tmp, patch(
+            "builtins.print"
+        ) as mock_print:
+            step_summary = os.path.join(tmp, "summary.md")
+            summary = track(
+                [installation],
+                None,
+                BRANCH,
+                True,
+                os.path.join(tmp, "metrics"),
+                step_summary,
+            )
+            with open(
+                os.path.join(tmp, "metrics", "pull_requests.csv"),
+                encoding="utf-8",
+                newline="",
+            ) as report:
+                rows = list(csv.DictReader(report))
+            with open(step_summary, encoding="utf-8") as summary_file:
+                markdown = summary_file.read()
+
+        self.assertEqual(
+            (
+                summary["pull_requests"],
+                summary["merged"],
+                summary["refreshed"],
+                summary["conflicted"],
+            ),
+            (3, 1, 1, 1),
+        )
+        self.assertEqual(summary["merge_rate"], 1.0)
+        self.assertEqual(
+            sorted((row["repository"], row["hours_to_merge"]) for row in rows),
+            [("org/behind", ""), ("org/conflict", ""), ("org/merged", "4.00")],
+        )
+        self.assertIn("| 3 | 2 | 1 | 0 | 100% | 4.0 | 4.0 | 1 | 1 | 1 |", markdown)
+        mock_print.assert_any_call(
+            f"{self.server.url}/org/conflict/pull/1 conflicts with its base branch"
+        )
+
+    def test_track_falls_back_to_journal(self):
+        """
+        Test that the repositories in the journal are still tracked when the search fails.
+        """
+        self.add_pull("org/opened")
+        self.add_pull("org/failed")
+        run_journal = RunJournal(None)
+        run_journal.record("org/opened", PR_OPENED)
+        run_journal.record("org/failed", FAILED)
+        installation = Installation("org", self.connection, None, MagicMock())
+        self.server.failures.append(502)
+
+        with patch("builtins.print") as mock_print:
+            summary = track([installation], run_journal, BRANCH, False, "", None)
+
+        self.assertEqual(summary["pull_requests"], 1)
+        self.assertEqual(self.server.requests, [("POST", "/api/graphql")] * 2)
+        mock_print.assert_any_call(
+            f"Searching the pull requests of org failed: 502 Server Error: "
+            f"Bad Gateway for url: {self.server.url}/api/graphql"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Tests for the workspaces module."""
+
+import asyncio
+import fcntl
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from inventory import RepoRecord
+from workspaces import LOCK_FILE, RUN_PREFIX, Workspace
+
+
+def fill(directory, size):
+    """Write a file of size bytes in directory, like a clone would."""
+    with open(os.path.join(directory, "pack"), "wb") as f:
+        f.write(b"x" * size)
+
+
+class TestWorkspace(unittest.TestCase):
+    """Test case for the Workspace class."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "work")
+        self.tmpfs = os.path.join(tmp.name, "tmpfs")
+
+    def open_workspace(self, **kwargs):
+        """Return a workspace in self.root that is closed at the end of the test."""
+        with patch("builtins.print"):
+            work = Workspace(self.root, **kwargs)
+        self.addCleanup(work.close)
+        return work
+
+    def test_acquire_and_release(self):
+        """
+        Test that every checkout gets its own directory, deleted in the background.
+        """
+        work = self.open_workspace()
+        first = work.acquire(RepoRecord("repo", "org/repo", "main"))
+        second = work.acquire(RepoRecord("repo", "other/repo", "main"))
+        fill(first, 10)
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(os.listdir(first), ["pack"])
+        self.assertEqual(os.listdir(second), [])
+
+        work.release(first, 10)
+        work.release(second)
+        work.close()
+
+        self.assertFalse(os.path.exists(first))
+        self.assertEqual(os.listdir(self.root), [LOCK_FILE])
+
+    def test_acquire_waits_for_deletion(self):
+        """
+        Test that a clone past max_bytes waits until enough checkouts are deleted.
+        """
+        work = self.open_workspace(max_bytes=3 * 1024 * 1024)
+        repo = RepoRecord("repo", "org/repo", "main", size=1024)
+        first = work.acquire(repo)
+        acquired = []
+        waiting = threading.Thread(target=lambda: acquired.append(work.acquire(repo)))
+
+        waiting.start()
+        waiting.join(0.2)
+        self.assertEqual(acquired, [])
+
+        work.release(first)
+        waiting.join(5)
+        self.assertEqual(len(acquired), 1)
+        self.assertFalse(os.path.exists(first))
+
+    def test_acquire_async_waits_for_deletion(self):
+        """
+        Test that acquire_async also waits, without blocking the event loop.
+        """
+        work = self.open_workspace(max_bytes=1024)
+        first = work.acquire(RepoRecord("first", "org/first", "main"))
+        work.release(first, 2048)
+
+        second = asyncio.run(
+            work.acquire_async(RepoRecord("second", "org/second", "main", size=1))
+        )
+
+        self.assertFalse(os.path.exists(first))
+        self.assertTrue(os.path.isdir(second))
+
+    def test_tmpfs(self):
+        """
+        Test that repositories of a known size go to tmpfs while they fit.
+        """
+        work = self.open_workspace(tmpfs_root=self.tmpfs, tmpfs_max_bytes=5 * 1024)
+        small = work.acquire(RepoRecord("small", "org/small", "main", size=2))
+        large = work.acquire(RepoRecord("large", "org/large", "main", size=2))
+        unknown = work.acquire(RepoRecord("unknown", "org/unknown", "main"))
+
+        self.assertTrue(small.startswith(self.tmpfs))
+        self.assertTrue(large.startswith(self.root))
+        self.assertTrue(unknown.startswith(self.root))
+
+        work.release(small)
+        work.close()
+        self.assertEqual(os.listdir(self.tmpfs), [LOCK_FILE])
+
+    def test_orphans_are_removed(self):
+        """
+        Test that the directories of runs that ended without closing are removed.
+        """
+        orphan = os.path.join(self.root, f"{RUN_PREFIX}crashed")
+        live = os.path.join(self.root, f"{RUN_PREFIX}live")
+        for run_dir in (orphan, live):
+            os.makedirs(os.path.join(run_dir, "repo-x"))
+            fill(os.path.join(run_dir, "repo-x"), 10)
+            with open(os.path.join(run_dir, LOCK_FILE), "w", encoding="utf-8"):
+                pass
+        with open(os.path.join(live, LOCK_FILE), "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            with patch("builtins.print") as mock_print:
+                work = Workspace(self.root)
+                work.close()
+
+            mock_print.assert_called_once_with(
+                "Removing 1 workspaces left by earlier runs"
+            )
+            self.assertEqual(
+                sorted(os.listdir(self.root)), [LOCK_FILE, f"{RUN_PREFIX}live"]
+            )
+
+    def test_run_directory_is_locked_before_others_look(self):
+        """
+        Test that a run directory is only created while no other run is collecting orphans.
+        """
+        os.makedirs(self.root)
+        opened = []
+        with open(os.path.join(self.root, LOCK_FILE), "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            thread = threading.Thread(
+                target=lambda: opened.append(self.open_workspace())
+            )
+            thread.start()
+            thread.join(0.2)
+
+            self.assertTrue(thread.is_alive())
+            self.assertEqual(os.listdir(self.root), [LOCK_FILE])
+        thread.join()
+
+        run_dirs = [name for name in os.listdir(self.root) if name != LOCK_FILE]
+        self.assertEqual(len(run_dirs), 1)
+        self.assertTrue(run_dirs[0].startswith(RUN_PREFIX))
+        with patch("builtins.print"):
+            Workspace(self.root).close()
+        self.assertTrue(os.path.isdir(os.path.join(self.root, run_dirs[0])))
+
+
+if __name__ == "__main__":
+    unittest.main()
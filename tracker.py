@@ -0,0 +1,437 @@
+"""Follow the pull requests the action has opened: their state, merge rate, stale and conflicting branches."""
+
+import csv
+import itertools
+import os
+from datetime import datetime
+
+import journal
+import metrics
+import preflight
+import requests
+
+BATCH_SIZE = preflight.BATCH_SIZE
+UPDATE_BATCH_SIZE = 25
+SEARCH_PAGE_SIZE = 100
+# GitHub search returns no more than this many results for a query
+SEARCH_LIMIT = 1000
+# mergeStateStatus, which tells a branch that is behind its base, is a preview field
+MERGE_INFO_PREVIEW = "application/vnd.github.merge-info-preview+json"
+PULL_REQUEST_FIELDS = (
+    "id number url state createdAt mergedAt closedAt headRefOid mergeStateStatus"
+)
+
+
+class PullRequestState:
+    # pylint: disable=too-many-instance-attributes
+    """
+    The latest pull request from the action's branch in one repository.
+
+    Attributes:
+        full_name (str): The owner/name of the repository
+        node_id (str): The GraphQL id of the pull request
+        number (int): The pull request number
+        url (str): The pull request URL
+        state (str): "OPEN", "MERGED" or "CLOSED"
+        created_at (str): When the pull request was opened
+        merged_at (str | None): When it was merged, if it was
+        closed_at (str | None): When it was merged or closed, if it was
+        head_oid (str): The commit at the tip of the branch
+        merge_state (str): The mergeStateStatus, "BEHIND" once the default branch has
+            moved on and "DIRTY" once it conflicts with the branch
+    """
+
+    def __init__(self, full_name: str, node: dict):
+        self.full_name = full_name
+        self.node_id = node["id"]
+        self.number = node["number"]
+        self.url = node["url"]
+        self.state = node["state"]
+        self.created_at = node["createdAt"]
+        self.merged_at = node.get("mergedAt")
+        self.closed_at = node.get("closedAt")
+        self.head_oid = node.get("headRefOid")
+        self.merge_state = node.get("mergeStateStatus") or "UNKNOWN"
+
+    @property
+    def hours_to_merge(self) -> float | None:
+        """Return the hours from opening to merging, or None if it is not merged."""
+        if not self.merged_at:
+            return None
+        opened = datetime.fromisoformat(self.created_at.replace("Z", "+00:00"))
+        merged = datetime.fromisoformat(self.merged_at.replace("Z", "+00:00"))
+        return (merged - opened).total_seconds() / 3600
+
+    @property
+    def stale(self) -> bool:
+        """Return whether the pull request is open and its branch is behind the default branch."""
+        return self.state == "OPEN" and self.merge_state == "BEHIND"
+
+    @property
+    def conflicted(self) -> bool:
+        """Return whether the pull request is open and conflicts with the default branch."""
+        return self.state == "OPEN" and self.merge_state == "DIRTY"
+
+
+def build_query(count, branch_name):
+    """
+    Build a query for the latest pull request from branch_name in count repositories.
+
+    Args:
+        count (int): the number of repositories, passed as $o<i>/$n<i> variables
+        branch_name (str): the branch the action pushes to
+
+    Returns:
+        str: the GraphQL query
+    """
+    variables = ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(count))
+    fields = (
+        f'pullRequests(headRefName: "{branch_name}", first: 1, '
+        "orderBy: {field: CREATED_AT, direction: DESC}) "
+        f"{{ nodes {{ {PULL_REQUEST_FIELDS} }} }}"
+    )
+    repositories = " ".join(
+        f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ {fields} }}"
+        for i in range(count)
+    )
+    return f"query({variables}) {{ {repositories} }}"
+
+
+def build_search_query():
+    """
+    Build a query for one page of the pull requests a search matches.
+
+    The search is passed as $query and the cursor of the page as $cursor.
+    """
+    return (
+        "query($query: String!, $cursor: String) { "
+        f"search(type: ISSUE, query: $query, first: {SEARCH_PAGE_SIZE}, after: $cursor) {{ "
+        "issueCount pageInfo { hasNextPage endCursor } "
+        "nodes { ... on PullRequest { repository { nameWithOwner } "
+        f"{PULL_REQUEST_FIELDS} }} }} }} }}"
+    )
+
+
+def build_mutation(count):
+    """
+    Build a mutation that brings count pull request branches up to date with their base.
+
+    The inputs are passed as $i<i> variables of type UpdatePullRequestBranchInput.
+    """
+    variables = ", ".join(f"$i{i}: UpdatePullRequestBranchInput!" for i in range(count))
+    updates = " ".join(
+        f"u{i}: updatePullRequestBranch(input: $i{i}) {{ pullRequest {{ id }} }}"
+        for i in range(count)
+    )
+    return f"mutation({variables}) {{ {updates} }}"
+
+
+def fetch_states(github_connection, full_names, branch_name, batch_size=BATCH_SIZE):
+    """
+    Return the latest pull request from branch_name in each repository.
+
+    Repositories are queried batch_size at a time. A repository without such
+    a pull request, or that cannot be read, is left out, and so is a batch
+    whose query fails.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        full_names (Iterable[str]): the owner/name of each repository
+        branch_name (str): the branch the action pushes to
+        batch_size (int): the number of repositories per query
+
+    Returns:
+        list[PullRequestState]: the pull requests found
+    """
+    url = preflight.graphql_url(github_connection)
+    states = []
+    full_names = iter(full_names)
+    while batch := list(itertools.islice(full_names, batch_size)):
+        variables = {}
+        for i, full_name in enumerate(batch):
+            variables[f"o{i}"], variables[f"n{i}"] = full_name.split("/", 1)
+        try:
+            response = github_connection.session.post(
+                url,
+                json={
+                    "query": build_query(len(batch), branch_name),
+                    "variables": variables,
+                },
+                headers={"Accept": MERGE_INFO_PREVIEW},
+            )
+            response.raise_for_status()
+            data = response.json().get("data") or {}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Tracking failed for a batch of {len(batch)} repositories: {e}")
+            continue
+        for i, full_name in enumerate(batch):
+            nodes = ((data.get(f"r{i}") or {}).get("pullRequests") or {}).get("nodes")
+            if nodes:
+                states.append(PullRequestState(full_name, nodes[0]))
+    return states
+
+
+def search_states(github_connection, organization, branch_name):
+    """
+    Return the latest pull request from branch_name in each repository of an organization.
+
+    The pull requests are found with a search, a page of SEARCH_PAGE_SIZE
+    per query, so repositories the journal does not know about are found
+    too. GitHub stops a search at SEARCH_LIMIT results. If the search fails
+    the pull requests found so far are returned.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        organization (str): the organization to search
+        branch_name (str): the branch the action pushes to
+
+    Returns:
+        list[PullRequestState]: the pull requests found, newest first
+    """
+    url = preflight.graphql_url(github_connection)
+    search = f"org:{organization} is:pr head:{branch_name} sort:created-desc"
+    latest: dict[str, PullRequestState] = {}
+    cursor = None
+    while True:
+        try:
+            response = github_connection.session.post(
+                url,
+                json={
+                    "query": build_search_query(),
+                    "variables": {"query": search, "cursor": cursor},
+                },
+                headers={"Accept": MERGE_INFO_PREVIEW},
+            )
+            response.raise_for_status()
+            result = (response.json().get("data") or {})["search"]
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            print(f"Searching the pull requests of {organization} failed: {e}")
+            break
+        for node in result["nodes"]:
+            full_name = node["repository"]["nameWithOwner"]
+            # Newest first, so the first pull request of a repository is its latest
+            if full_name not in latest:
+                latest[full_name] = PullRequestState(full_name, node)
+        if not result["pageInfo"]["hasNextPage"]:
+            if result["issueCount"] > SEARCH_LIMIT:
+                print(
+                    f"{organization} has {result['issueCount']} pull requests from "
+                    f"{branch_name}: search returns the latest {SEARCH_LIMIT}"
+                )
+            break
+        cursor = result["pageInfo"]["endCursor"]
+    return list(latest.values())
+
+
+def refresh_branches(github_connection, states, limiter, batch_size=UPDATE_BATCH_SIZE):
+    """
+    Rebase the branch of every stale pull request onto its default branch.
+
+    The updates are sent batch_size at a time as one mutation. Each update
+    pushes a commit, so each one waits for the limiter like a new pull
+    request would. expectedHeadOid makes GitHub refuse a branch that changed
+    since it was read.
+
+    Args:
+        github_connection (github3.GitHub): the GitHub connection object
+        states (Iterable[PullRequestState]): the pull requests to look at
+        limiter (rate_limit.RateLimiter): the rate limit budget of the connection
+        batch_size (int): the number of updates per mutation
+
+    Returns:
+        list[PullRequestState]: the pull requests whose branch was updated
+    """
+    url = preflight.graphql_url(github_connection)
+    refreshed = []
+    stale = iter([state for state in states if state.stale])
+    while batch := list(itertools.islice(stale, batch_size)):
+        for _ in batch:
+            limiter.acquire()
+        variables = {
+            f"i{i}": {
+                "pullRequestId": state.node_id,
+                "expectedHeadOid": state.head_oid,
+                "updateMethod": "REBASE",
+            }
+            for i, state in enumerate(batch)
+        }
+        try:
+            response = github_connection.session.post(
+                url,
+                json={"query": build_mutation(len(batch)), "variables": variables},
+            )
+            response.raise_for_status()
+            body = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Failed to update {len(batch)} pull request branches: {e}")
+            continue
+        data = body.get("data") or {}
+        for i, state in enumerate(batch):
+            if data.get(f"u{i}"):
+                print(f"Updated the branch of {state.url}")
+                refreshed.append(state)
+            else:
+                print(f"Failed to update the branch of {state.url}")
+    return refreshed
+
+
+def summarize(states, refreshed=()) -> dict:
+    """
+    Return the counts, merge rate and time to merge of the pull requests.
+
+    Args:
+        states (list[PullRequestState]): the pull requests
+        refreshed (Collection[PullRequestState]): those whose branch was updated
+
+    Returns:
+        dict: the summary
+    """
+    counts = {"OPEN": 0, "MERGED": 0, "CLOSED": 0}
+    for state in states:
+        counts[state.state] = counts.get(state.state, 0) + 1
+    hours = [
+        state.hours_to_merge for state in states if state.hours_to_merge is not None
+    ]
+    decided = counts["MERGED"] + counts["CLOSED"]
+    return {
+        "pull_requests": len(states),
+        "open": counts["OPEN"],
+        "merged": counts["MERGED"],
+        "closed": counts["CLOSED"],
+        "merge_rate": round(counts["MERGED"] / decided, 3) if decided else 0.0,
+        "stale": sum(state.stale for state in states),
+        "conflicted": sum(state.conflicted for state in states),
+        "refreshed": len(refreshed),
+        "hours_to_merge": {
+            f"p{p}": round(metrics.percentile(hours, p), 1) for p in metrics.PERCENTILES
+        },
+    }
+
+
+def job_summary(summary: dict) -> str:
+    """Return the summary as Markdown for the GitHub Actions job summary."""
+    hours = summary["hours_to_merge"]
+    return (
+        "## automatic-contrib-prs pull requests\n"
+        "\n"
+        "| Pull requests | Open | Merged | Closed | Merge rate "
+        "| p50 to merge (h) | p95 to merge (h) | Behind | Updated | Conflicts |\n"
+        "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |\n"
+        f"| {summary['pull_requests']} | {summary['open']} | {summary['merged']} "
+        f"| {summary['closed']} | {summary['merge_rate']:.0%} "
+        f"| {hours['p50']:.1f} | {hours['p95']:.1f} "
+        f"| {summary['stale']} | {summary['refreshed']} | {summary['conflicted']} |\n"
+    )
+
+
+def write_csv(path: str, states) -> None:
+    """Write one row per pull request to path as CSV."""
+    with open(path, "w", encoding="utf-8", newline="") as report:
+        writer = csv.writer(report)
+        writer.writerow(
+            [
+                "repository",
+                "url",
+                "state",
+                "merge_state",
+                "created_at",
+                "merged_at",
+                "closed_at",
+                "hours_to_merge",
+            ]
+        )
+        for state in states:
+            hours = state.hours_to_merge
+            writer.writerow(
+                [
+                    state.full_name,
+                    state.url,
+                    state.state,
+                    state.merge_state,
+                    state.created_at,
+                    state.merged_at or "",
+                    state.closed_at or "",
+                    "" if hours is None else f"{hours:.2f}",
+                ]
+            )
+
+
+def opened_pull_requests(run_journal) -> list[str]:
+    """Return the repositories the journal records a pull request opened in, if there is a journal."""
+    if run_journal is None:
+        return []
+    return [
+        full_name
+        for full_name, entry in run_journal.entries.items()
+        if entry["stage"] == journal.PR_OPENED
+    ]
+
+
+def track(
+    run_installations, run_journal, branch_name, refresh, metrics_dir, step_summary
+):
+    """
+    Report on every pull request from branch_name, and update the branches behind their base.
+
+    The pull requests of each installation's organization are searched for.
+    Repositories the journal records a pull request in that the search did
+    not return, past SEARCH_LIMIT for instance, are queried by name.
+    Branches that conflict with their base cannot be updated and are listed
+    for someone to resolve.
+
+    Args:
+        run_installations (list[installations.Installation]): the organizations of the run
+        run_journal (journal.RunJournal | None): the journal of earlier runs, if there is one
+        branch_name (str): the branch the action pushes to
+        refresh (bool): whether to update the branches that are behind
+        metrics_dir (str): the directory for pull_requests.csv, or "" for none
+        step_summary (str | None): the GITHUB_STEP_SUMMARY file, if running in Actions
+
+    Returns:
+        dict: the summary of summarize()
+    """
+    full_names = opened_pull_requests(run_journal)
+    states: list[PullRequestState] = []
+    refreshed: list[PullRequestState] = []
+    for installation in run_installations:
+        organization = installation.organization.lower()
+        found = search_states(
+            installation.github_connection, installation.organization, branch_name
+        )
+        searched = {state.full_name.lower() for state in found}
+        repositories = [
+            full_name
+            for full_name in full_names
+            if full_name.lower() not in searched
+            and (
+                len(run_installations) == 1
+                or full_name.split("/", 1)[0].lower() == organization
+            )
+        ]
+        found += fetch_states(installation.github_connection, repositories, branch_name)
+        states.extend(found)
+        if refresh:
+            refreshed.extend(
+                refresh_branches(
+                    installation.github_connection, found, installation.limiter
+                )
+            )
+    for state in states:
+        if state.conflicted:
+            print(f"{state.url} conflicts with its base branch")
+    summary = summarize(states, refreshed)
+    print(
+        f"Tracked {summary['pull_requests']} pull requests: {summary['open']} open "
+        f"({summary['stale']} behind, {summary['refreshed']} updated, "
+        f"{summary['conflicted']} with conflicts), "
+        f"{summary['merged']} merged, {summary['closed']} closed, "
+        f"merge rate {summary['merge_rate']:.0%}, "
+        f"median time to merge {summary['hours_to_merge']['p50']:.1f}h"
+    )
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        write_csv(os.path.join(metrics_dir, "pull_requests.csv"), states)
+    if step_summary:
+        with open(step_summary, "a", encoding="utf-8") as summary_file:
+            summary_file.write(job_summary(summary))
+    return summary
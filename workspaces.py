@@ -0,0 +1,225 @@
+"""Give each repository its own working directory, and delete them off the critical path."""
+
+import fcntl
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import IO
+
+# Memory-backed on Linux: a checkout there never waits on the runner's disk
+TMPFS_DIR = "/dev/shm"
+RUN_PREFIX = "run-"
+TRASH_PREFIX = "trash-"
+LOCK_FILE = ".lock"
+# A checkout takes about the size GitHub reports for the packed objects, and as
+# much again for the files checked out
+CHECKOUT_FACTOR = 2
+# How often acquire_async looks for room again
+POLL_SECONDS = 0.05
+
+
+def default_root() -> str:
+    """Return the directory the workspaces are kept in when WORKSPACE_DIR is not set."""
+    return os.path.join(tempfile.gettempdir(), "automatic-contrib-prs")
+
+
+def default_tmpfs_root() -> str:
+    """Return the directory for workspaces on tmpfs, or "" if there is no tmpfs."""
+    if not os.path.isdir(TMPFS_DIR):
+        print(f"{TMPFS_DIR} does not exist, every repository is checked out on disk")
+        return ""
+    return os.path.join(TMPFS_DIR, "automatic-contrib-prs")
+
+
+def collect_orphans(root: str) -> list[str]:
+    """
+    Move the run directories of runs that are no longer running out of the way.
+
+    A run holds a lock on the lock file of its run directory until it closes
+    its workspace, so a directory whose lock can be taken was left by a run
+    that crashed or was cancelled. The run directory is renamed, so no later
+    run looks at it again, and returned to be deleted along with any
+    directory an earlier run renamed but did not finish deleting. It must be
+    called with the lock file of root locked, which a run also holds until
+    its run directory is locked.
+
+    Args:
+        root (str): the directory the run directories are in
+
+    Returns:
+        list[str]: the directories to delete
+    """
+    orphans = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.startswith(TRASH_PREFIX):
+            orphans.append(path)
+            continue
+        if not name.startswith(RUN_PREFIX):
+            continue
+        try:
+            with open(os.path.join(path, LOCK_FILE), "a", encoding="utf-8") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                trash = tempfile.mkdtemp(prefix=TRASH_PREFIX, dir=root)
+                os.rename(path, os.path.join(trash, name))
+        except BlockingIOError:
+            continue
+        except OSError as e:
+            print(f"Unable to remove the workspace {path} of an earlier run: {e}")
+            continue
+        orphans.append(trash)
+    return orphans
+
+
+class Workspace:
+    # pylint: disable=too-many-instance-attributes
+    """
+    The working directories of one run, one per repository.
+
+    Every checkout gets a new directory under a run directory of its own, so
+    runs and repositories of the same name never share one. A repository
+    whose checkout is expected to fit in what is left of tmpfs_max_bytes is
+    checked out in tmpfs_root instead of root. Released directories are
+    deleted by a background thread, so no worker waits for a large checkout
+    to be deleted. Until a directory is deleted it still counts towards
+    max_bytes, and acquire waits for room when a new checkout would go past
+    it, so deletion that falls behind holds back new clones instead of
+    filling the disk.
+
+    Attributes:
+        root (str): The directory the run directories are created in
+        max_bytes (int): The size of the checkouts on disk that acquire waits for, or 0 for no limit
+        tmpfs_root (str): The directory on tmpfs, or "" if none is used
+        tmpfs_max_bytes (int): The size of the checkouts on tmpfs, or 0 if none is used
+    """
+
+    def __init__(
+        self, root: str, max_bytes: int = 0, tmpfs_root: str = "", tmpfs_max_bytes=0
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.tmpfs_root = tmpfs_root if tmpfs_max_bytes else ""
+        self.tmpfs_max_bytes = tmpfs_max_bytes if self.tmpfs_root else 0
+        self._condition = threading.Condition()
+        # The (on tmpfs, bytes) of every directory that is not deleted yet
+        self._reserved: dict[str, tuple[bool, int]] = {}
+        self._deletions: queue.Queue[str | None] = queue.Queue()
+        self._locks: list[IO[str]] = []
+        self._run_dirs: dict[bool, str] = {}
+        orphans = []
+        for on_tmpfs, directory in ((False, self.root), (True, self.tmpfs_root)):
+            if not directory:
+                continue
+            os.makedirs(directory, exist_ok=True)
+            if on_tmpfs:
+                # Never plan on more memory than is free
+                self.tmpfs_max_bytes = min(
+                    self.tmpfs_max_bytes, shutil.disk_usage(directory).free
+                )
+            # Runs sharing a directory take turns to collect orphans and create
+            # their run directory, so none is collected before its run locked it
+            with open(
+                os.path.join(directory, LOCK_FILE), "a", encoding="utf-8"
+            ) as root_lock:
+                fcntl.flock(root_lock, fcntl.LOCK_EX)
+                orphans.extend(collect_orphans(directory))
+                run_dir = tempfile.mkdtemp(prefix=RUN_PREFIX, dir=directory)
+                # pylint: disable=consider-using-with
+                lock = open(os.path.join(run_dir, LOCK_FILE), "a", encoding="utf-8")
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._locks.append(lock)
+            self._run_dirs[on_tmpfs] = run_dir
+        if orphans:
+            print(f"Removing {len(orphans)} workspaces left by earlier runs")
+        for orphan in orphans:
+            self._deletions.put(orphan)
+        self._deleter = threading.Thread(
+            target=self._delete, name="workspace-cleanup", daemon=True
+        )
+        self._deleter.start()
+
+    def _used(self, on_tmpfs: bool) -> int:
+        """Return the bytes reserved on tmpfs or on disk."""
+        return sum(size for tmpfs, size in self._reserved.values() if tmpfs == on_tmpfs)
+
+    def _try_acquire(self, repo) -> str | None:
+        """Create and reserve a directory for repo if there is room, with the lock held."""
+        expected = repo.size * 1024 * CHECKOUT_FACTOR
+        # The size of a repository missing from the inventory is unknown, so
+        # only one with a known size is trusted to fit in memory
+        on_tmpfs = bool(
+            self.tmpfs_max_bytes
+        ) and 0 < expected <= self.tmpfs_max_bytes - self._used(True)
+        if not on_tmpfs and self.max_bytes:
+            used = self._used(False)
+            # The first checkout always fits, or a repository larger than
+            # max_bytes would wait forever
+            if used and used + expected > self.max_bytes:
+                return None
+        directory = tempfile.mkdtemp(
+            prefix=f"{repo.name}-", dir=self._run_dirs[on_tmpfs]
+        )
+        self._reserved[directory] = (on_tmpfs, expected)
+        return directory
+
+    def acquire(self, repo) -> str:
+        """
+        Return a new empty directory to check repo out into, waiting for room.
+
+        Args:
+            repo (inventory.RepoRecord): the repository to check out
+
+        Returns:
+            str: the directory, to be passed to release once done
+        """
+        with self._condition:
+            directory = None
+            while directory is None:
+                directory = self._try_acquire(repo)
+                if directory is None:
+                    self._condition.wait()
+            return directory
+
+    async def acquire_async(self, repo) -> str:
+        """The same as acquire, waiting on the event loop instead of blocking a thread."""
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        while True:
+            with self._condition:
+                directory = self._try_acquire(repo)
+            if directory is not None:
+                return directory
+            await asyncio.sleep(POLL_SECONDS)
+
+    def release(self, directory: str, used_bytes: int = 0) -> None:
+        """
+        Hand a directory from acquire to the background thread to delete.
+
+        Args:
+            directory (str): the directory to delete
+            used_bytes (int): the size measured in it, counted until it is
+                deleted when larger than the size expected
+        """
+        with self._condition:
+            on_tmpfs, expected = self._reserved[directory]
+            self._reserved[directory] = (on_tmpfs, max(expected, used_bytes))
+        self._deletions.put(directory)
+
+    def _delete(self) -> None:
+        """Delete the released directories one at a time until close is called."""
+        while (directory := self._deletions.get()) is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+            with self._condition:
+                self._reserved.pop(directory, None)
+                self._condition.notify_all()
+
+    def close(self) -> None:
+        """Wait for the released directories to be deleted, then delete the run directories."""
+        self._deletions.put(None)
+        self._deleter.join()
+        for run_dir in self._run_dirs.values():
+            shutil.rmtree(run_dir, ignore_errors=True)
+        for lock in self._locks:
+            lock.close()